@@ -0,0 +1,319 @@
+"""
+Envio de alertas por email em segundo plano
+Os alertas entram em uma fila e uma thread os envia: os alertas de uma execução são
+agrupados em um único email (com screenshots e diagnósticos), a conexão SMTP é reaproveitada
+e a fila é esvaziada ao final da execução ou do processo
+"""
+import os
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+from config import Config
+
+
+class Alert:
+    """Um alerta: mensagem, screenshot ou diagnóstico (em memória) e execução de origem"""
+    
+    def __init__(self, message, screenshot=None, screenshot_path=None, run_id=None, snapshot=None):
+        self.message = message
+        self.screenshot = screenshot
+        self.screenshot_format = "png"
+        self.screenshot_path = screenshot_path
+        self.run_id = run_id
+        self.snapshot = snapshot
+        self.bundle_path = None
+        self.url = None
+        self.created_at = datetime.now()
+
+
+class AlertDispatcher:
+    """Fila de alertas drenada por uma thread com uma sessão SMTP reaproveitada"""
+    
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._smtp = None
+        # Registrado uma única vez, mesmo que a thread seja recriada (flush sem thread não faz nada)
+        atexit.register(self.flush)
+    
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="alertas", daemon=True)
+                self._thread.start()
+    
+    def submit(self, alert):
+        """Coloca o alerta na fila (retorna imediatamente)"""
+        self._ensure_worker()
+        self._queue.put(("alert", alert))
+    
+    def flush(self, wait=True, timeout=None):
+        """
+        Envia os alertas pendentes em um único email
+        
+        Args:
+            wait: Aguarda o envio terminar
+            timeout: Tempo máximo de espera em segundos (se None, usa Config.ALERT_FLUSH_TIMEOUT)
+        
+        Returns:
+            bool: True se os alertas foram enviados (ou não havia alertas)
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        if not wait:
+            return True
+        return done.wait(Config.ALERT_FLUSH_TIMEOUT if timeout is None else timeout)
+    
+    def _run(self):
+        pending = []
+        first_at = None
+        while True:
+            if pending:
+                # Execuções longas: o resumo sai no máximo ALERT_DIGEST_MAX_DELAY após o primeiro alerta
+                timeout = max(0, first_at + Config.ALERT_DIGEST_MAX_DELAY - time.monotonic())
+            elif self._smtp is not None:
+                timeout = Config.ALERT_SMTP_IDLE_SECONDS
+            else:
+                timeout = None
+            
+            try:
+                kind, payload = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                if pending:
+                    self._deliver(pending)
+                    pending = []
+                else:
+                    self._close_smtp()
+                continue
+            
+            if kind == "alert":
+                self._prepare(payload)
+                if not pending:
+                    first_at = time.monotonic()
+                pending.append(payload)
+            elif kind == "flush":
+                if pending:
+                    self._deliver(pending)
+                    pending = []
+                self._close_smtp()
+                payload.set()
+    
+    def _prepare(self, alert):
+        """Grava o diagnóstico do alerta (compressão e disco fora do fluxo principal)"""
+        if alert.snapshot is None:
+            return
+        from diagnostics import write_bundle
+        
+        snapshot, alert.snapshot = alert.snapshot, None
+        alert.screenshot = snapshot["screenshot"]
+        alert.screenshot_format = snapshot["screenshot_format"] or "png"
+        alert.url = snapshot["url"]
+        try:
+            alert.bundle_path = write_bundle(snapshot, alert.message, alert.run_id)
+            print(f"🩺 Diagnóstico salvo em: {alert.bundle_path}")
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar diagnóstico: {e}")
+    
+    def _connection(self):
+        """Retorna a sessão SMTP aberta (verificada com NOOP) ou abre uma nova"""
+        import smtplib
+        
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close_smtp()
+        
+        smtp = smtplib.SMTP(Config.EMAIL_SMTP_SERVER, Config.EMAIL_SMTP_PORT, timeout=30)
+        smtp.starttls()
+        smtp.login(Config.EMAIL_FROM, Config.EMAIL_PASSWORD)
+        self._smtp = smtp
+        return smtp
+    
+    def _close_smtp(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+    
+    def _deliver(self, alerts):
+        """Envia os alertas em um único email; sem email configurado, grava os screenshots em disco"""
+        import smtplib
+        
+        try:
+            if not (Config.EMAIL_FROM and Config.EMAIL_TO and Config.EMAIL_PASSWORD):
+                Config.load_email_config()
+            if not (Config.EMAIL_FROM and Config.EMAIL_TO and Config.EMAIL_PASSWORD):
+                print("⚠️ Email não configurado. Execute 'python save_email_config.py' ou configure secrets no GitHub")
+                for path in save_screenshots(alerts):
+                    print(f"📸 Evidência salva em: {path}")
+                return
+            
+            message = build_digest(alerts)
+            for attempt in range(2):
+                try:
+                    self._connection().sendmail(Config.EMAIL_FROM, Config.EMAIL_TO, message.as_string())
+                    break
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    # Sessão reaproveitada caiu: reconecta uma vez
+                    self._close_smtp()
+                    if attempt:
+                        raise
+            print(f"✅ Email com {len(alerts)} alerta(s) enviado para {Config.EMAIL_TO}")
+        except Exception as e:
+            print(f"❌ Erro ao enviar email: {e}")
+            self._close_smtp()
+
+
+def _screenshot_filename(alert, index):
+    extension = "jpg" if alert.screenshot_format == "jpeg" else "png"
+    return f"screenshot_error_{alert.created_at.strftime('%Y%m%d_%H%M%S')}_{index}.{extension}"
+
+
+def save_screenshots(alerts):
+    """
+    Grava em Config.DIAGNOSTICS_DIR os screenshots que estão apenas em memória e retorna os
+    caminhos (ou os diagnósticos)
+    """
+    paths = []
+    for index, alert in enumerate(alerts, start=1):
+        if alert.bundle_path:
+            paths.append(alert.bundle_path)
+        elif alert.screenshot:
+            os.makedirs(Config.DIAGNOSTICS_DIR, exist_ok=True)
+            path = os.path.join(Config.DIAGNOSTICS_DIR, _screenshot_filename(alert, index))
+            with open(path, "wb") as f:
+                f.write(alert.screenshot)
+            paths.append(path)
+        elif alert.screenshot_path:
+            paths.append(alert.screenshot_path)
+    if paths:
+        from diagnostics import enforce_retention
+        enforce_retention()
+    return paths
+
+
+def build_digest(alerts):
+    """
+    Monta um email com todos os alertas, screenshots e diagnósticos
+    
+    Args:
+        alerts: Lista de Alert
+    
+    Returns:
+        MIMEMultipart: Mensagem pronta para envio
+    """
+    import html
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.mime.image import MIMEImage
+    from email.mime.application import MIMEApplication
+    
+    msg = MIMEMultipart()
+    msg['From'] = Config.EMAIL_FROM
+    msg['To'] = Config.EMAIL_TO
+    count = f"{len(alerts)} alertas" if len(alerts) > 1 else "1 alerta"
+    msg['Subject'] = f"🚨 Erro no Script BPO ({count}) - {alerts[0].created_at.strftime('%d/%m/%Y %H:%M:%S')}"
+    
+    items = "".join(
+        f"<li><p><strong>{alert.created_at.strftime('%d/%m/%Y %H:%M:%S')}</strong>"
+        f"{f' (execução {alert.run_id})' if alert.run_id else ''}"
+        f"{f'<br>URL: {html.escape(alert.url)}' if alert.url else ''}</p>"
+        f"<pre>{html.escape(alert.message)}</pre></li>"
+        for alert in alerts
+    )
+    body = f"""
+    <html>
+    <body>
+        <h2>Erro Detectado no Script BPO</h2>
+        <ol>{items}</ol>
+        <p>Diagnósticos (.zip com screenshot, DOM, console e requisições) ou screenshots anexados abaixo, na ordem dos alertas.</p>
+    </body>
+    </html>
+    """
+    msg.attach(MIMEText(body, 'html'))
+    
+    for index, alert in enumerate(alerts, start=1):
+        # O diagnóstico já contém o screenshot: a imagem só vai avulsa quando não há .zip
+        if alert.bundle_path and os.path.exists(alert.bundle_path):
+            with open(alert.bundle_path, 'rb') as f:
+                bundle = MIMEApplication(f.read(), _subtype="zip")
+            bundle.add_header('Content-Disposition', 'attachment', filename=os.path.basename(alert.bundle_path))
+            msg.attach(bundle)
+            continue
+        data = alert.screenshot
+        subtype = alert.screenshot_format
+        filename = _screenshot_filename(alert, index)
+        if data is None and alert.screenshot_path and os.path.exists(alert.screenshot_path):
+            with open(alert.screenshot_path, 'rb') as f:
+                data = f.read()
+            subtype = "png"
+            filename = os.path.basename(alert.screenshot_path)
+        if data:
+            img = MIMEImage(data, _subtype=subtype)
+            img.add_header('Content-Disposition', 'attachment', filename=filename)
+            msg.attach(img)
+    return msg
+
+
+_DISPATCHER = AlertDispatcher()
+
+
+def enqueue_alert(driver, error_message, screenshot_path=None):
+    """
+    Registra um alerta de erro sem bloquear o fluxo
+    
+    Só o estado da página é lido na hora (em memória, para refletir o momento do erro); com
+    Config.DIAGNOSTICS_ENABLED, inclui URL, DOM e logs (ver diagnostics.py). Compressão, gravação
+    e envio do email ficam com a thread de alertas.
+    
+    Args:
+        driver: Instância do WebDriver (ou None)
+        error_message: Mensagem de erro
+        screenshot_path: Screenshot já salvo (se None, captura um novo)
+    """
+    from instrumentation import current_run, increment
+    
+    if not Config.EMAIL_ALERT_ENABLED:
+        print("⚠️ Alertas de email desabilitados")
+        return
+    
+    screenshot = None
+    snapshot = None
+    if screenshot_path is None and driver:
+        try:
+            if Config.DIAGNOSTICS_ENABLED:
+                from diagnostics import capture_snapshot
+                snapshot = capture_snapshot(driver)
+            else:
+                screenshot = driver.get_screenshot_as_png()
+        except Exception as screenshot_error:
+            print(f"⚠️ Erro ao tirar screenshot: {screenshot_error}")
+    
+    _DISPATCHER.submit(Alert(str(error_message), screenshot, screenshot_path, current_run().run_id, snapshot))
+    increment("alerts")
+    print("📨 Alerta registrado (enviado em segundo plano)")
+
+
+def flush_alerts(wait=True, timeout=None):
+    """
+    Envia os alertas pendentes da execução em um único email
+    
+    Args:
+        wait: Aguarda o envio terminar (False no modo daemon)
+        timeout: Tempo máximo de espera em segundos (se None, usa Config.ALERT_FLUSH_TIMEOUT)
+    
+    Returns:
+        bool: True se os alertas foram enviados (ou não havia alertas)
+    """
+    return _DISPATCHER.flush(wait, timeout)
@@ -0,0 +1 @@
+"""Benchmarks offline do script BPO (site local, backend falso do Google Sheets e CSVs sintéticos)"""
@@ -0,0 +1,152 @@
+"""
+Backend falso do gspread para benchmarks
+Implementa as chamadas usadas pelo envio (clear, update, batch_update, batch_clear,
+values_batch_update, add_rows...) em memória, com latência simulada por requisição
+e falhas de escrita opcionais (cota esgotada, rede) para testar envios interrompidos
+"""
+import re
+import time
+import threading
+
+
+def _row_of(range_name):
+    """Linha inicial de um intervalo ("A10", "'Aba'!A10:N20" -> 10)"""
+    match = re.search(r"[A-Z]+(\d+)", range_name.split("!")[-1])
+    return int(match.group(1)) if match else 1
+
+
+class FakeBackend:
+    """Conta requisições e simula a latência da API"""
+    
+    def __init__(self, latency=0.05, seconds_per_mb=0.02, fail_after_writes=None):
+        """
+        Args:
+            latency: Segundos fixos por requisição
+            seconds_per_mb: Segundos adicionais por MB enviado (aproximado pelo número de células)
+            fail_after_writes: Escritas aceitas antes de todas as seguintes falharem (None = nunca falha)
+        """
+        self.latency = latency
+        self.seconds_per_mb = seconds_per_mb
+        self.fail_after_writes = fail_after_writes
+        self.requests = 0
+        self.writes = 0
+        self.cells = 0
+        self._lock = threading.Lock()
+    
+    def request(self, cells=0, write=False):
+        with self._lock:
+            if write:
+                if self.fail_after_writes is not None and self.writes >= self.fail_after_writes:
+                    raise RuntimeError("Falha simulada na escrita do Google Sheets")
+                self.writes += 1
+            self.requests += 1
+            self.cells += cells
+        # ~10 bytes por célula no JSON enviado
+        time.sleep(self.latency + cells * 10 / (1024 * 1024) * self.seconds_per_mb)
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, rows=1000, cols=26, worksheet_id=0):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = worksheet_id
+        self.row_count = rows
+        self.col_count = cols
+        self.rows = {}
+    
+    @property
+    def backend(self):
+        return self.spreadsheet.client.backend
+    
+    def _write(self, start_row, values):
+        for offset, row in enumerate(values):
+            self.rows[start_row + offset] = list(row)
+        self.row_count = max(self.row_count, start_row + len(values) - 1)
+    
+    def clear(self):
+        self.backend.request(write=True)
+        self.rows.clear()
+    
+    def update(self, range_name, values, value_input_option=None):
+        self.backend.request(sum(len(row) for row in values), write=True)
+        self._write(_row_of(range_name), values)
+    
+    def batch_update(self, data, value_input_option=None):
+        self.backend.request(sum(len(row) for item in data for row in item["values"]), write=True)
+        for item in data:
+            self._write(_row_of(item["range"]), item["values"])
+    
+    def batch_clear(self, ranges):
+        self.backend.request(write=True)
+        for range_name in ranges:
+            start = _row_of(range_name)
+            end = int(re.findall(r"\d+", range_name.split("!")[-1])[-1])
+            for row in range(start, end + 1):
+                self.rows.pop(row, None)
+    
+    def add_rows(self, rows):
+        self.backend.request(write=True)
+        self.row_count += rows
+    
+    def add_cols(self, cols):
+        self.backend.request(write=True)
+        self.col_count += cols
+    
+    def get_all_values(self):
+        if not self.rows:
+            return []
+        return [self.rows.get(row, []) for row in range(1, max(self.rows) + 1)]
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, title, spreadsheet_id):
+        self.client = client
+        self.title = title
+        self.id = spreadsheet_id
+        self.url = f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}"
+        self.worksheets = {}
+    
+    @property
+    def sheet1(self):
+        return next(iter(self.worksheets.values()), None) or self.add_worksheet("Página1", 1000, 26)
+    
+    def worksheet(self, title):
+        self.client.backend.request()
+        if title not in self.worksheets:
+            import gspread
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.worksheets[title]
+    
+    def add_worksheet(self, title, rows, cols):
+        self.client.backend.request()
+        worksheet = FakeWorksheet(self, title, rows, cols, worksheet_id=len(self.worksheets))
+        self.worksheets[title] = worksheet
+        return worksheet
+    
+    def values_batch_update(self, body=None):
+        data = body["data"]
+        self.client.backend.request(sum(len(row) for item in data for row in item["values"]), write=True)
+        for item in data:
+            title = item["range"].split("!")[0].strip("'").replace("''", "'")
+            self.worksheets[title]._write(_row_of(item["range"]), item["values"])
+
+
+class FakeClient:
+    """Substitui o gspread.Client retornado por utils.get_sheets_client"""
+    
+    def __init__(self, backend=None):
+        self.backend = backend or FakeBackend()
+        self.spreadsheets = {}
+    
+    def open(self, title):
+        self.backend.request()
+        for spreadsheet in self.spreadsheets.values():
+            if spreadsheet.title == title:
+                return spreadsheet
+        spreadsheet = FakeSpreadsheet(self, title, f"fake-{len(self.spreadsheets)}")
+        self.spreadsheets[spreadsheet.id] = spreadsheet
+        return spreadsheet
+    
+    def open_by_key(self, key):
+        self.backend.request()
+        return self.spreadsheets[key]
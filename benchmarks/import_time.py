@@ -0,0 +1,130 @@
+"""
+Verificação do tempo de inicialização (python -X importtime)
+Mede o tempo de import de cada ponto de entrada e falha se passar do orçamento ou se
+carregar dependências pesadas que só devem ser importadas nas etapas que as usam
+
+Uso:
+    python -m benchmarks.import_time              # código 1 se houver regressão
+    python -m benchmarks.import_time --scale 2    # orçamento 2x maior (máquinas mais lentas)
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento em milissegundos (tempo acumulado do import do módulo)
+IMPORT_BUDGET_MS = {
+    "config": 20,
+    "cli": 30,
+    "scriptMain": 200,
+    "orchestrator": 250,
+    "daemon": 250,
+    "jobs": 150
+}
+
+# Dependências carregadas apenas dentro das funções que as usam
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "selenium",
+    "webdriver_manager",
+    "gspread",
+    "google.oauth2",
+    "google.auth",
+    "requests",
+    "smtplib"
+]
+
+
+def measure_import(module, python=None):
+    """
+    Importa o módulo em um processo novo com -X importtime
+    
+    Args:
+        module: Nome do módulo
+        python: Executável do Python (se None, usa o atual)
+    
+    Returns:
+        tuple: (milissegundos acumulados do import, conjunto de módulos importados)
+    """
+    result = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        imported.add(name.strip())
+        # O módulo pedido é o único no nível mais externo (um espaço após o separador)
+        if name == " " + module:
+            total_us = int(cumulative)
+    return (total_us or 0) / 1000, imported
+
+
+def check_imports(modules=None, repeat=5, scale=1.0):
+    """
+    Mede os pontos de entrada e compara com o orçamento
+    
+    Args:
+        modules: Módulos verificados (se None, todos de IMPORT_BUDGET_MS)
+        repeat: Medições por módulo (é usada a mediana)
+        scale: Multiplicador do orçamento
+    
+    Returns:
+        list: Problemas encontrados (textos)
+    """
+    # Bytecode atualizado: a medição não deve incluir a compilação dos fontes
+    subprocess.run([sys.executable, "-m", "compileall", "-q", "-l", ROOT], check=False, capture_output=True)
+    
+    problems = []
+    for module in modules or IMPORT_BUDGET_MS:
+        samples = []
+        imported = set()
+        for _ in range(repeat):
+            milliseconds, imported = measure_import(module)
+            samples.append(milliseconds)
+        median = statistics.median(samples)
+        budget = IMPORT_BUDGET_MS.get(module, float("inf")) * scale
+        heavy = sorted(
+            name for name in HEAVY_MODULES
+            if any(item == name or item.startswith(name + ".") for item in imported)
+        )
+        status = "✅" if median <= budget and not heavy else "❌"
+        print(f"{status} {module}: {median:.1f} ms (orçamento {budget:.0f} ms)"
+              + (f" — importa {', '.join(heavy)}" if heavy else ""))
+        if median > budget:
+            problems.append(f"{module}: {median:.1f} ms > {budget:.0f} ms")
+        if heavy:
+            problems.append(f"{module}: importa dependências pesadas na inicialização ({', '.join(heavy)})")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de inicialização")
+    parser.add_argument("modules", nargs="*", help="Módulos verificados (padrão: todos os pontos de entrada)")
+    parser.add_argument("--repeat", type=int, default=5, help="Medições por módulo (mediana)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplicador do orçamento")
+    args = parser.parse_args(argv)
+    
+    problems = check_imports(args.modules, args.repeat, args.scale)
+    if problems:
+        print(f"\n❌ {len(problems)} problema(s) na inicialização:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print("\n✅ Inicialização dentro do orçamento")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
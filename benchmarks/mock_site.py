@@ -0,0 +1,163 @@
+"""
+Site local que imita o dwmanagement para benchmarks
+Reproduz o login (Livewire), a página daily-worker-requests e a exportação do CSV
+usados pelo motor HTTP (http_engine.py)
+
+Uso: python -m benchmarks.mock_site arquivo.csv [porta]
+"""
+import os
+import sys
+import json
+import html
+import shutil
+import secrets
+import threading
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta name="csrf-token" content="{token}"></head>
+<body>
+<div wire:snapshot="{snapshot}" wire:id="login">
+  <form wire:submit="authenticate">
+    <input id="data.email" type="email"><input id="data.password" type="password">
+    <button type="submit">Entrar</button>
+  </form>
+</div>
+<script src="/livewire/livewire.js" data-csrf="{token}" data-update-uri="/livewire/update"></script>
+</body></html>"""
+
+REPORTS_PAGE = """<!DOCTYPE html>
+<html><body><main><section><header><div></div><div><div><button>Exportar</button></div></div></header>
+<form><input id="tableFilters.created_at.created_from"><input id="tableFilters.created_at.created_until"></form>
+</section></main></body></html>"""
+
+
+class MockSite:
+    """Servidor HTTP local com login, página de relatórios e exportação do CSV"""
+    
+    def __init__(self, csv_path, host="127.0.0.1", port=0, email="bench@example.com", password="bench"):
+        """
+        Args:
+            csv_path: CSV devolvido pela exportação
+            host: Endereço do servidor
+            port: Porta (0 = escolhida pelo sistema)
+            email: Email aceito no login
+            password: Senha aceita no login
+        """
+        self.csv_path = csv_path
+        self.email = email
+        self.password = password
+        self.token = secrets.token_hex(16)
+        self.sessions = set()
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _make_handler(self):
+        site = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def _session(self):
+                for part in self.headers.get("Cookie", "").split(";"):
+                    name, _, value = part.strip().partition("=")
+                    if name == "session" and value in site.sessions:
+                        return value
+                return None
+            
+            def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+                data = body.encode("utf-8") if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def _redirect(self, location):
+                self._send(302, "", headers={"Location": location})
+            
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == "/login":
+                    snapshot = json.dumps({"data": {"email": "", "password": ""}, "memo": {"name": "auth.login"}})
+                    self._send(200, LOGIN_PAGE.format(token=site.token, snapshot=html.escape(snapshot, quote=True)))
+                elif path == "/daily-worker-requests":
+                    if not self._session():
+                        self._redirect("/login")
+                        return
+                    self._send(200, REPORTS_PAGE)
+                elif path == "/export":
+                    if not self._session():
+                        self._redirect("/login")
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/csv; charset=utf-8")
+                    self.send_header("Content-Length", str(os.path.getsize(site.csv_path)))
+                    self.end_headers()
+                    with open(site.csv_path, "rb") as f:
+                        shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+                else:
+                    self._send(404, "not found")
+            
+            def do_POST(self):
+                if urlparse(self.path).path != "/livewire/update":
+                    self._send(404, "not found")
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if payload.get("_token") != site.token or self.headers.get("X-CSRF-TOKEN") != site.token:
+                    self._send(419, "page expired")
+                    return
+                updates = payload["components"][0]["updates"]
+                if (updates.get("data.email"), updates.get("data.password")) != (site.email, site.password):
+                    self._send(200, json.dumps({"components": [], "errors": {"email": "invalid"}}), "application/json")
+                    return
+                session = secrets.token_hex(16)
+                site.sessions.add(session)
+                self._send(
+                    200,
+                    json.dumps({"components": [], "effects": {"redirect": "/daily-worker-requests"}}),
+                    "application/json",
+                    headers={"Set-Cookie": f"session={session}; Path=/; HttpOnly"}
+                )
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python -m benchmarks.mock_site <arquivo.csv> [porta]")
+        sys.exit(1)
+    site = MockSite(sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
+    print(f"✅ Site de teste em {site.url} (login: {site.email} / {site.password})")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        site.server.server_close()
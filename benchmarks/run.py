@@ -0,0 +1,238 @@
+"""
+Benchmarks do script BPO sem acesso ao site real nem ao Google
+Mede a leitura com filtros, os filtros do utils.py, a serialização, o upload_to_google_sheets
+(backend falso) e o fluxo completo de run_pipeline() contra o site local (motor HTTP),
+e compara as medianas com o baseline salvo em benchmarks/baseline.json
+
+O caminho pelo Selenium (motor padrão) está fora do escopo: depende de um Chrome instalado
+e de uma réplica da interface do site (menus, filtros, notificações), e seu tempo é dominado
+pelo navegador e pelo site real, não pelo código deste repositório. As etapas medidas aqui
+(leitura, filtros, serialização e envio) são as mesmas usadas depois da exportação pelo Selenium.
+
+Uso:
+    python -m benchmarks.run --sizes 1000,100000 --save-baseline
+    python -m benchmarks.run --sizes 1000,100000   # falha (código 1) se houver regressão
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import tempfile
+from contextlib import redirect_stdout
+
+import pandas as pd
+
+import utils
+import scriptMain
+from config import Config
+from instrumentation import start_run
+from benchmarks.synthetic_csv import write_synthetic_csv
+from benchmarks.mock_site import MockSite
+from benchmarks.fake_sheets import FakeBackend, FakeClient
+
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+MIN_REGRESSION_SECONDS = 0.05  # Diferenças menores que isso são consideradas ruído
+
+
+def configure_offline(site_url, sheets_client):
+    """
+    Aponta o script para o site local e para o backend falso do Google Sheets
+    
+    Args:
+        site_url: URL base do MockSite
+        sheets_client: FakeClient retornado no lugar do gspread.Client
+    """
+    Config.EXTRACTION_ENGINE = "http"
+    Config.SITE_URL = site_url
+    Config.REPORTS_URL = site_url + "daily-worker-requests"
+    Config.HTTP_LOGIN_PATH = "login"
+    Config.HTTP_EXPORT_URL = "export?from={from_date}&to={to_date}"
+    Config.PIPELINE_MODE = "staged"
+    Config.FANOUT_PROFILES = []
+    Config.SPREADSHEET_ID = None
+    Config.HISTORY_ENABLED = False
+    Config.SKIP_UNCHANGED_EXPORTS = False
+    Config.SKIP_UNCHANGED_UPLOADS = False
+    Config.RUN_REPORT_FILE = None
+    Config.PROMETHEUS_TEXTFILE = None
+    Config.EMAIL_ALERT_ENABLED = False
+    # A latência é simulada pelo backend falso; a cota real não se aplica
+    Config.SHEETS_WRITE_REQUESTS_PER_MINUTE = 1000000
+    utils._SHEETS_RATE_LIMITER = None
+    utils.get_sheets_client = lambda credentials_path=None: sheets_client
+
+
+def timed(func, verbose=False):
+    """Executa a função e retorna (segundos, resultado), silenciando as mensagens do script"""
+    output = sys.stdout if verbose else io.StringIO()
+    with redirect_stdout(output):
+        started_at = time.perf_counter()
+        result = func()
+        return time.perf_counter() - started_at, result
+
+
+def bench_size(rows, workdir, sheets_client, site_factory, verbose=False):
+    """
+    Mede todas as etapas para um CSV sintético de `rows` linhas
+    
+    Returns:
+        dict: Segundos por etapa
+    """
+    csv_path = os.path.join(workdir, f"synthetic_{rows}.csv")
+    if not os.path.exists(csv_path):
+        write_synthetic_csv(csv_path, rows)
+    
+    timings = {}
+    timings["load_filtered_csv"], filtered = timed(lambda: utils.load_filtered_csv(csv_path), verbose)
+    
+    full = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    timings["filter_dataframe"], _ = timed(lambda: utils.filter_dataframe(full), verbose)
+    del full
+    
+    timings["dataframe_to_values"], _ = timed(lambda: utils.dataframe_to_values(filtered), verbose)
+    timings["upload_to_google_sheets"], url = timed(
+        lambda: utils.upload_to_google_sheets(filtered, skip_unchanged=False), verbose
+    )
+    if url is None:
+        raise RuntimeError("upload_to_google_sheets falhou no backend falso")
+    
+    download_dir = os.path.join(workdir, "downloads")
+    os.makedirs(download_dir, exist_ok=True)
+    with site_factory(csv_path) as site:
+        configure_offline(site.url, sheets_client)
+        report = start_run("benchmark")
+        seconds, uploaded = timed(
+            lambda: scriptMain.run_pipeline(site.email, site.password, download_dir=download_dir), verbose
+        )
+        report.finish(uploaded)
+    if not uploaded:
+        raise RuntimeError("run_pipeline falhou contra o site local")
+    timings["run_pipeline"] = seconds
+    # Etapas principais do fluxo (mesmos nomes do relatório de execução)
+    for entry in report.stages:
+        if entry["parent"] is None:
+            key = f"run_pipeline.{entry['stage']}"
+            timings[key] = timings.get(key, 0) + entry["seconds"]
+    return timings
+
+
+def run_benchmarks(sizes, repeat=3, sheets_latency=0.05, verbose=False):
+    """
+    Executa os benchmarks em um diretório temporário (arquivos de estado não tocam o projeto)
+    
+    Args:
+        sizes: Números de linhas dos CSVs sintéticos
+        repeat: Repetições por tamanho (é usada a mediana)
+        sheets_latency: Latência simulada por requisição ao Google Sheets (segundos)
+        verbose: Mostra as mensagens do script durante as medições
+    
+    Returns:
+        dict: {linhas: {etapa: segundos}}
+    """
+    workdir = tempfile.mkdtemp(prefix="bpo_bench_")
+    previous_dir = os.getcwd()
+    sheets_client = FakeClient(FakeBackend(latency=sheets_latency))
+    results = {}
+    try:
+        os.chdir(workdir)
+        configure_offline("http://127.0.0.1/", sheets_client)
+        for rows in sizes:
+            samples = {}
+            for _ in range(repeat):
+                for name, seconds in bench_size(rows, workdir, sheets_client, lambda path: MockSite(path), verbose).items():
+                    samples.setdefault(name, []).append(seconds)
+            results[str(rows)] = {name: round(statistics.median(values), 4) for name, values in samples.items()}
+            print(f"✅ {rows} linhas medidas ({repeat}x)")
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Compara as medianas com o baseline
+    
+    Args:
+        results: Resultado de run_benchmarks()
+        baseline: Resultados salvos anteriormente (mesmo formato)
+        tolerance: Aumento relativo aceito (0.2 = 20%)
+    
+    Returns:
+        list: Regressões encontradas (tamanho, etapa, baseline, atual)
+    """
+    regressions = []
+    for size, stages in results.items():
+        for name, seconds in stages.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            if seconds > reference * (1 + tolerance) and seconds - reference > MIN_REGRESSION_SECONDS:
+                regressions.append((size, name, reference, seconds))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    for size, stages in results.items():
+        print(f"\n📊 {size} linhas:")
+        for name, seconds in stages.items():
+            reference = (baseline or {}).get(size, {}).get(name)
+            delta = f" (baseline {reference:.3f}s, {(seconds / reference - 1) * 100:+.0f}%)" if reference else ""
+            print(f"  {name}: {seconds:.3f}s{delta}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks offline do script BPO")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Linhas dos CSVs sintéticos, separadas por vírgula (ex.: 1000,100000,5000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por tamanho (mediana)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Arquivo do baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como novo baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Aumento relativo aceito antes de falhar")
+    parser.add_argument("--sheets-latency", type=float, default=0.05,
+                        help="Latência simulada por requisição ao Google Sheets (segundos)")
+    parser.add_argument("--verbose", action="store_true", help="Mostra as mensagens do script")
+    args = parser.parse_args(argv)
+    
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = run_benchmarks(sizes, args.repeat, args.sheets_latency, args.verbose)
+    
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    print_results(results, baseline)
+    
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "machine": platform.platform(),
+                "python": platform.python_version(),
+                "sheets_latency": args.sheets_latency,
+                "results": {**(baseline or {}), **results}
+            }, f, indent=2)
+        print(f"\n✅ Baseline gravado em {args.baseline}")
+        return 0
+    
+    if not baseline:
+        print(f"\n⚠️ Sem baseline em {args.baseline}: use --save-baseline para gravar um")
+        return 0
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressão(ões) acima de {args.tolerance:.0%}:")
+        for size, name, reference, seconds in regressions:
+            print(f"  {size} linhas / {name}: {reference:.3f}s -> {seconds:.3f}s")
+        return 1
+    print("\n✅ Nenhuma regressão em relação ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Gerador de CSVs sintéticos no formato do relatório daily-worker-requests
+Coluna 9 (índice 8) = região e coluna 13 (índice 12) = operação, como no export real
+
+Uso: python -m benchmarks.synthetic_csv 100000 saida.csv
+"""
+import sys
+import numpy as np
+import pandas as pd
+
+
+COLUMNS = [
+    "ID", "Nome", "CPF", "Data da solicitação", "Turno", "Cargo", "Empresa", "Cidade",
+    "Região", "Status", "Hub", "Supervisor", "Operação", "Observação"
+]
+REGIONS = np.array(["SPM", "SPI", "RJ", "MG", "PR"])
+OPERATIONS = np.array(["FMH", "OF", "LMH", "XD", "RTS"])
+SHIFTS = np.array(["Manhã", "Tarde", "Noite"])
+STATUSES = np.array(["Aprovado", "Pendente", "Recusado"])
+
+
+def synthetic_frame(rows, start=0, seed=0):
+    """
+    Gera um bloco de linhas sintéticas
+    
+    Args:
+        rows: Número de linhas
+        start: ID da primeira linha
+        seed: Semente do gerador (mesma semente = mesmo conteúdo)
+    
+    Returns:
+        pd.DataFrame: Linhas com as colunas de COLUMNS
+    """
+    rng = np.random.default_rng(seed + start)
+    ids = np.arange(start, start + rows)
+    id_text = ids.astype(str)
+    dates = pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 60, rows), unit="D")
+    return pd.DataFrame({
+        "ID": id_text,
+        "Nome": np.char.add("Colaborador ", id_text),
+        "CPF": np.char.zfill(rng.integers(0, 10**11, rows).astype(str), 11),
+        "Data da solicitação": dates.strftime("%d/%m/%Y"),
+        "Turno": rng.choice(SHIFTS, rows),
+        "Cargo": rng.choice(np.array(["Auxiliar", "Conferente", "Operador"]), rows),
+        "Empresa": rng.choice(np.array(["Agência A", "Agência B", "Agência C"]), rows),
+        "Cidade": rng.choice(np.array(["São Paulo", "Campinas", "Rio de Janeiro"]), rows),
+        "Região": rng.choice(REGIONS, rows),
+        "Status": rng.choice(STATUSES, rows),
+        "Hub": np.char.add("HUB-", (ids % 40).astype(str)),
+        "Supervisor": np.char.add("Supervisor ", (ids % 25).astype(str)),
+        "Operação": rng.choice(OPERATIONS, rows),
+        "Observação": np.where(rng.random(rows) < 0.8, "", "Reposição")
+    }, columns=COLUMNS)
+
+
+def write_synthetic_csv(path, rows, chunk_rows=500000, seed=0):
+    """
+    Grava um CSV sintético em blocos (memória limitada mesmo para milhões de linhas)
+    
+    Args:
+        path: Arquivo de saída
+        rows: Total de linhas
+        chunk_rows: Linhas geradas por bloco
+        seed: Semente do gerador
+    
+    Returns:
+        str: Caminho do arquivo
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, max(rows, 1), chunk_rows):
+            count = min(chunk_rows, rows - start)
+            synthetic_frame(max(count, 0), start=start, seed=seed).to_csv(f, index=False, header=start == 0)
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python -m benchmarks.synthetic_csv <linhas> <arquivo.csv>")
+        sys.exit(1)
+    output = write_synthetic_csv(sys.argv[2], int(sys.argv[1]))
+    print(f"✅ CSV sintético gravado em {output}")
@@ -0,0 +1,80 @@
+"""
+Ponto de entrada único do script BPO
+Só importa o módulo do comando escolhido, então a inicialização é rápida (cron, CI)
+
+Uso:
+    python cli.py                      # mesmo que "run"
+    python cli.py run                  # fluxo completo (scriptMain.py)
+    python cli.py async                # fluxo com etapas sobrepostas (orchestrator.py)
+    python cli.py daemon               # processo contínuo (daemon.py)
+    python cli.py jobs [jobs.json]     # vários jobs em paralelo (jobs.py)
+    python cli.py history --start 01/10/2026 --end 15/10/2026 [--output arquivo.csv]
+"""
+import sys
+import argparse
+
+
+def cmd_run(args):
+    from scriptMain import main
+    main()
+    return 0
+
+
+def cmd_async(args):
+    from orchestrator import main
+    main()
+    return 0
+
+
+def cmd_daemon(args):
+    from daemon import BpoDaemon
+    BpoDaemon().serve_forever()
+    return 0
+
+
+def cmd_jobs(args):
+    from jobs import load_jobs, run_jobs
+    results = run_jobs(load_jobs(args.file), workers=args.workers)
+    return 0 if all(result["success"] for result in results) else 1
+
+
+def cmd_history(args):
+    from history_store import query_history
+    df = query_history(args.start, args.end)
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"✅ {len(df)} registro(s) gravado(s) em {args.output}")
+    else:
+        print(df.to_string(index=False))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Automação de relatórios BPO")
+    commands = parser.add_subparsers(dest="command")
+    
+    commands.add_parser("run", help="Executa o fluxo completo (padrão)").set_defaults(func=cmd_run)
+    commands.add_parser("async", help="Executa o fluxo com etapas sobrepostas").set_defaults(func=cmd_async)
+    commands.add_parser("daemon", help="Mantém o navegador aquecido e executa nos horários agendados").set_defaults(func=cmd_daemon)
+    
+    jobs = commands.add_parser("jobs", help="Executa vários jobs em paralelo")
+    jobs.add_argument("file", nargs="?", help="Arquivo JSON com os jobs (padrão: Config.JOBS)")
+    jobs.add_argument("--workers", type=int, help="Jobs ao mesmo tempo (padrão: Config.JOB_WORKERS)")
+    jobs.set_defaults(func=cmd_jobs)
+    
+    history = commands.add_parser("history", help="Consulta o histórico local por data da solicitação")
+    history.add_argument("--start", help="Data inicial (dd/mm/aaaa)")
+    history.add_argument("--end", help="Data final (dd/mm/aaaa)")
+    history.add_argument("--output", help="Grava o resultado em CSV em vez de mostrar na tela")
+    history.set_defaults(func=cmd_history)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    func = getattr(args, "func", cmd_run)
+    return func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
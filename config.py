@@ -11,10 +11,56 @@ class Config:
     CREDENTIALS_FILE = "credentials.pkl"
     GOOGLE_CREDENTIALS_FILE = "credentials.json"
     DOWNLOAD_DIR = "downloads"
+    SITE_URL = "https://dwmanagement.spx.com.br/"
+    REPORTS_URL = "https://dwmanagement.spx.com.br/daily-worker-requests"
+    
+    # Motor de extração: "selenium" (navegador) ou "http" (sessão HTTP, com fallback para o navegador)
+    EXTRACTION_ENGINE = "selenium"
+    HTTP_TIMEOUT = 60  # Timeout das requisições HTTP em segundos
+    HTTP_LOGIN_PATH = "login"
+    # URL de exportação do CSV; aceita {from_date} e {to_date} (dd/mm/aaaa, já codificadas)
+    HTTP_EXPORT_URL = None
+    
+    # Sessão persistente: reaproveita o login entre execuções enquanto o site aceitar a sessão
+    SESSION_PERSIST_ENABLED = False
+    SESSION_CACHE_FILE = "session.pkl"  # Cookies e localStorage da última sessão válida
+    CHROME_USER_DATA_DIR = None  # Perfil persistente do Chrome (ex.: "chrome_profile"); None = perfil temporário
     SPREADSHEET_NAME = "GET_BPO"
+    SPREADSHEET_ID = None  # ID da planilha (trecho da URL); evita a busca pelo nome via Drive
+    SHEETS_ID_CACHE_FILE = "sheets_ids.json"  # IDs das planilhas já encontradas pelo nome
+    
+    # Fan-out: um único download alimenta vários destinos, cada um com seus filtros
+    # Ex.: {"name": "SPM", "worksheet": "SPM", "filters": {"região": ["SPM"]}}
+    # "spreadsheet" é opcional (padrão SPREADSHEET_NAME); "filters" substitui os valores dos
+    # filtros de get_dataframe_filters() pelo nome. Lista vazia = apenas o destino padrão
+    FANOUT_PROFILES = []
+    FANOUT_WORKERS = 3  # Destinos enviados em paralelo
     WORKSHEET_NAME = "Base"
     
+    # Sincronização com o Google Sheets
+    # "full": limpa a aba e reenvia tudo | "delta": envia apenas linhas inseridas, alteradas e removidas
+    SHEETS_SYNC_MODE = "full"
+    SHEETS_ROW_KEY_COLUMNS = None  # Colunas que identificam uma linha (None = linha inteira)
+    SHEETS_SNAPSHOT_FILE = "sheets_snapshot.pkl"  # Último conteúdo enviado (usado no modo delta)
+    SHEETS_BATCH_ROWS = 10000  # Linhas por intervalo enviado
+    SHEETS_RANGES_PER_REQUEST = 4  # Intervalos agrupados em cada values.batchUpdate
+    SHEETS_UPLOAD_WORKERS = 4  # Requisições de escrita simultâneas
+    SHEETS_WRITE_REQUESTS_PER_MINUTE = 60  # Cota de escrita da API (por usuário por minuto)
+    SHEETS_MAX_RETRIES = 5  # Novas tentativas em 429/5xx (backoff exponencial com jitter)
+    SHEETS_UPLOAD_CHECKPOINT_FILE = "sheets_upload_checkpoint.json"  # Lotes já confirmados de um envio interrompido
+    
+    # Execuções sem mudanças: se o CSV baixado (ou os dados filtrados) forem idênticos aos da
+    # última execução bem-sucedida, a leitura e/ou o envio são ignorados
+    SKIP_UNCHANGED_EXPORTS = True  # Compara o hash do arquivo CSV antes da leitura
+    SKIP_UNCHANGED_UPLOADS = True  # Compara o hash dos dados filtrados antes do envio
+    FINGERPRINT_FILE = "last_run_fingerprint.json"
+    
     # Configurações do Chrome
+    CHROME_BINARY = os.getenv("CHROME_BINARY")  # Executável do Chrome (None = procura no PATH)
+    CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")  # Caminho fixo do ChromeDriver (pula a resolução)
+    CHROMEDRIVER_OFFLINE = os.getenv("CHROMEDRIVER_OFFLINE") == "1"  # Nunca acessa a rede para resolver o driver
+    CHROMEDRIVER_CACHE_FILE = "chromedriver_cache.json"  # Driver resolvido por versão principal do Chrome
+    SELECTOR_CACHE_FILE = "selector_cache.json"  # Seletor que funcionou por página/campo (None = desativado)
     CHROME_OPTIONS = {
         "headless": True,
         "disable_gpu": True,
@@ -30,11 +76,53 @@ class Config:
     OPERATION_COLUMN_INDEX = 12 # Coluna 13 (índice 12)
     REGION_FILTER_VALUES = ["SPM", "SPI"]
     REGION_COLUMN_INDEX = 8  # Coluna 9 (índice 8)
+    FILTER_DIAGNOSTICS = False  # Mostra valores únicos e linhas por filtro (mais lento em exports grandes)
+    
+    # Leitura do CSV: os filtros são aplicados bloco a bloco, durante a leitura
+    CSV_CHUNK_SIZE = 100000  # Linhas por bloco
+    CSV_ENGINE = "c"  # "c" (leitor do pandas), "pyarrow" ou "auto" (pyarrow se instalado)
+    CSV_USECOLS = None  # Colunas mantidas (None = todas); as colunas dos filtros são sempre lidas
+    CSV_DTYPES = None  # Tipos explícitos por coluna, ex.: {"Quantidade": "Int64"}; as demais são texto
+    
+    # Modo do fluxo: "staged" (baixa, carrega, filtra e envia em etapas) ou
+    # "streaming" (os blocos do CSV são filtrados e enviados enquanto o restante ainda é lido)
+    PIPELINE_MODE = "staged"
+    
+    # Histórico local: cada execução grava as linhas filtradas em SQLite (consultar com history_store.query_history)
+    HISTORY_ENABLED = False
+    HISTORY_DB_FILE = "history.sqlite3"
+    HISTORY_KEY_COLUMNS = None  # Colunas que identificam um registro (None = linha inteira)
+    HISTORY_DATE_COLUMN = None  # Coluna da data da solicitação (None = procura pelas palavras-chave)
+    HISTORY_DATE_KEYWORDS = ["data", "date"]
     
     # Datas
     DAYS_BEFORE = 5
     DAYS_AFTER = 5
     
+    # Intervalos maiores que EXTRACTION_CHUNK_DAYS (ex.: backfills) são divididos em janelas
+    # buscadas em paralelo por EXTRACTION_WORKERS sessões (navegador ou HTTP)
+    EXTRACTION_CHUNK_DAYS = 15
+    EXTRACTION_WORKERS = 3
+    
+    # Vários jobs (python jobs.py): cada um com conta, janela, filtros e destino próprios,
+    # executados em processos separados. Ex.: {"name": "spm", "credentials_file": "spm.pkl",
+    # "filters": {"região": ["SPM"]}, "worksheet": "SPM"} (campos em models.JobConfig)
+    JOBS = []
+    JOB_WORKERS = 2  # Jobs executados ao mesmo tempo
+    JOBS_STATE_DIR = "jobs"  # Sessão, hashes, checkpoints, histórico, caches, diagnósticos e log de cada job
+    
+    # Modo daemon (python daemon.py): navegador aquecido e execuções agendadas ou sob demanda
+    DAEMON_SCHEDULE_TIMES = ["09:00", "15:00", "18:00", "00:00"]  # Horários locais (HH:MM)
+    DAEMON_HOST = "127.0.0.1"  # Endereço do gatilho HTTP (POST /run, GET /status)
+    DAEMON_PORT = 8765
+    DAEMON_POOL_SIZE = 1  # Navegadores mantidos abertos e logados
+    DAEMON_MAX_RUNS_PER_DRIVER = 20  # Recicla o navegador após N execuções
+    DAEMON_MAX_DRIVER_MEMORY_MB = 1500  # Recicla o navegador se a memória passar deste limite
+    
+    # Relatório de cada execução: tempo por etapa, linhas, bytes, memória, retentativas e fallbacks
+    RUN_REPORT_FILE = "run_reports.jsonl"  # Uma linha JSON por execução (None = desativado)
+    PROMETHEUS_TEXTFILE = None  # Ex.: "/var/lib/node_exporter/textfile/bpo.prom" (textfile collector)
+    
     # Configurações de Email para alertas
     EMAIL_ALERT_ENABLED = True  # Ativar/desativar envio de emails
     EMAIL_SMTP_SERVER = "smtp.gmail.com"  # Servidor SMTP
@@ -43,6 +131,42 @@ class Config:
     EMAIL_FROM = None  # Será configurado via secrets ou arquivo
     EMAIL_TO = None  # Email de destino (será configurado)
     EMAIL_PASSWORD = None  # Senha do email (será configurado via secrets)
+    ALERT_DIGEST_MAX_DELAY = 300  # Segundos máximos que um alerta espera para ser agrupado com outros
+    ALERT_SMTP_IDLE_SECONDS = 60  # Fecha a conexão SMTP após esse tempo sem alertas
+    ALERT_FLUSH_TIMEOUT = 60  # Segundos aguardando o envio dos alertas ao final da execução
+    DIAGNOSTICS_ENABLED = True  # Diagnóstico compactado (screenshot reduzido, URL, DOM, console e rede) nos alertas
+    DIAGNOSTICS_DIR = "diagnostics"  # Pasta dos diagnósticos (.zip)
+    DIAGNOSTICS_SCREENSHOT_MAX_WIDTH = 960  # Largura máxima do screenshot (px)
+    DIAGNOSTICS_SCREENSHOT_QUALITY = 60  # Qualidade do JPEG (0-100)
+    DIAGNOSTICS_DOM_MAX_CHARS = 200000  # Tamanho máximo do DOM salvo (sem scripts/estilos)
+    DIAGNOSTICS_LOG_ENTRIES = 100  # Últimas entradas do console e de rede
+    DIAGNOSTICS_RETENTION_DAYS = 7  # Diagnósticos mais antigos são removidos
+    DIAGNOSTICS_MAX_BUNDLES = 50  # Quantidade máxima de diagnósticos guardados
+    
+    @staticmethod
+    def get_dataframe_filters():
+        """
+        Retorna os filtros aplicados ao DataFrame em uma única passada
+        
+        Cada filtro localiza a coluna pelo nome (palavras-chave) ou, se não encontrar, pela posição.
+        
+        Returns:
+            list: Dicionários com 'name', 'keywords', 'column_index' e 'values'
+        """
+        return [
+            {
+                "name": "operação",
+                "keywords": ["oper", "operação"],
+                "column_index": Config.OPERATION_COLUMN_INDEX,
+                "values": Config.FILTER_VALUES
+            },
+            {
+                "name": "região",
+                "keywords": ["regi", "região"],
+                "column_index": Config.REGION_COLUMN_INDEX,
+                "values": Config.REGION_FILTER_VALUES
+            }
+        ]
     
     @staticmethod
     def load_email_config():
@@ -0,0 +1,337 @@
+"""
+Modo daemon do script BPO
+Mantém navegadores aquecidos e logados e executa o fluxo nos horários configurados
+ou sob demanda (POST http://127.0.0.1:8765/run)
+
+Uso: python daemon.py
+"""
+import os
+import json
+import time
+import queue
+import threading
+import traceback
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import Config
+from scriptMain import setup_chrome_driver, ensure_logged_in, run_pipeline
+from utils import print_wait_summary, reset_wait_timings
+from instrumentation import start_run, finish_run
+from alerts import flush_alerts
+
+
+def _process_tree_rss_mb(pid):
+    """
+    Soma a memória residente (RSS) de um processo e de todos os seus descendentes
+    
+    Args:
+        pid: PID do processo raiz (chromedriver)
+    
+    Returns:
+        float: Memória em MB ou None se não for possível medir
+    """
+    try:
+        import psutil
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    
+    # Sem psutil: percorre /proc (Linux)
+    total_kb = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+            task_dir = f"/proc/{current}/task"
+            for tid in os.listdir(task_dir):
+                with open(f"{task_dir}/{tid}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        return None
+    return total_kb / 1024
+
+
+class PooledDriver:
+    """Navegador do pool com contagem de uso"""
+    
+    def __init__(self, driver, download_dir):
+        self.driver = driver
+        self.download_dir = download_dir
+        self.runs = 0
+        self.created_at = time.time()
+    
+    def memory_mb(self):
+        """Memória atual do chromedriver e do Chrome em MB (None se indisponível)"""
+        try:
+            return _process_tree_rss_mb(self.driver.service.process.pid)
+        except Exception:
+            return None
+    
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"⚠️ Erro ao finalizar navegador: {e}")
+
+
+class DriverPool:
+    """
+    Pool de navegadores aquecidos e logados
+    
+    Navegadores são reciclados após Config.DAEMON_MAX_RUNS_PER_DRIVER execuções, quando a
+    memória passa de Config.DAEMON_MAX_DRIVER_MEMORY_MB ou quando a execução falha.
+    A reposição é feita em segundo plano para a próxima execução já encontrar um navegador pronto.
+    """
+    
+    def __init__(self, email, password, size=None, max_runs=None, max_memory_mb=None):
+        self.email = email
+        self.password = password
+        self.size = size or Config.DAEMON_POOL_SIZE
+        self.max_runs = max_runs or Config.DAEMON_MAX_RUNS_PER_DRIVER
+        self.max_memory_mb = max_memory_mb or Config.DAEMON_MAX_DRIVER_MEMORY_MB
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def _create(self):
+        """Abre um navegador e já faz login para deixá-lo aquecido"""
+        driver, download_dir = setup_chrome_driver()
+        pooled = PooledDriver(driver, download_dir)
+        try:
+            ensure_logged_in(driver, self.email, self.password)
+        except Exception as e:
+            # O login será tentado de novo na execução
+            print(f"⚠️ Não foi possível aquecer o navegador: {e}")
+        return pooled
+    
+    def _replenish(self):
+        """Cria um navegador e o coloca no pool (executado em segundo plano)"""
+        try:
+            pooled = self._create()
+        except Exception as e:
+            print(f"⚠️ Erro ao criar navegador para o pool: {e}")
+            return
+        with self._lock:
+            if self._closed:
+                pooled.quit()
+                return
+        self._idle.put(pooled)
+        print("✅ Navegador aquecido adicionado ao pool")
+    
+    def warm_up(self):
+        """Abre os navegadores do pool"""
+        for _ in range(self.size):
+            self._replenish()
+    
+    def acquire(self):
+        """
+        Retira um navegador do pool (cria um se não houver nenhum pronto)
+        
+        Returns:
+            PooledDriver: Navegador para a execução
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            print("Nenhum navegador aquecido disponível, criando um agora...")
+            return self._create()
+    
+    def release(self, pooled, healthy=True):
+        """
+        Devolve o navegador ao pool ou recicla se necessário
+        
+        Args:
+            pooled: Navegador retirado com acquire()
+            healthy: False se a execução falhou (o navegador é descartado)
+        """
+        pooled.runs += 1
+        memory = pooled.memory_mb()
+        reason = None
+        if not healthy:
+            reason = "execução com erro"
+        elif pooled.runs >= self.max_runs:
+            reason = f"{pooled.runs} execuções"
+        elif memory is not None and memory > self.max_memory_mb:
+            reason = f"memória em {memory:.0f} MB"
+        
+        if reason is None and not self._closed:
+            self._idle.put(pooled)
+            return
+        
+        print(f"♻️ Reciclando navegador ({reason})")
+        pooled.quit()
+        if not self._closed:
+            threading.Thread(target=self._replenish, daemon=True).start()
+    
+    def close(self):
+        """Finaliza todos os navegadores do pool"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                break
+
+
+def next_scheduled_time(now=None, schedule_times=None):
+    """
+    Calcula o próximo horário agendado
+    
+    Args:
+        now: Data/hora de referência (se None, usa agora)
+        schedule_times: Lista de horários "HH:MM" (se None, usa Config.DAEMON_SCHEDULE_TIMES)
+    
+    Returns:
+        datetime: Próxima execução ou None se não houver horários configurados
+    """
+    now = now or datetime.now()
+    schedule_times = Config.DAEMON_SCHEDULE_TIMES if schedule_times is None else schedule_times
+    candidates = []
+    for item in schedule_times:
+        hour, minute = (int(part) for part in item.split(":"))
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        candidates.append(candidate)
+    return min(candidates) if candidates else None
+
+
+class BpoDaemon:
+    """Processo de longa duração que executa o fluxo com navegadores aquecidos"""
+    
+    def __init__(self):
+        Config.load_email_config()
+        email, password = Config.get_credentials()
+        print(f"✅ Credenciais carregadas para: {email}")
+        self.email = email
+        self.password = password
+        self.pool = DriverPool(email, password)
+        self._triggers = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self.status = {"runs": 0, "last_run": None, "last_success": None, "last_duration": None, "running": False}
+    
+    def trigger(self, reason="manual"):
+        """
+        Pede uma execução; pedidos feitos enquanto outro aguarda são agrupados
+        
+        Returns:
+            bool: True se o pedido foi enfileirado, False se já havia um pendente
+        """
+        try:
+            self._triggers.put_nowait(reason)
+            return True
+        except queue.Full:
+            return False
+    
+    def run_once(self, reason):
+        """Executa o fluxo uma vez usando um navegador do pool"""
+        print(f"\n{'='*50}")
+        print(f"▶️ Execução iniciada ({reason}) em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        print(f"{'='*50}")
+        reset_wait_timings()
+        start_run(reason)
+        started_at = time.monotonic()
+        self.status["running"] = True
+        pooled = self.pool.acquire()
+        healthy = True
+        success = False
+        try:
+            success = run_pipeline(self.email, self.password, driver=pooled.driver, download_dir=pooled.download_dir)
+        except Exception as e:
+            healthy = False
+            print(f"❌ Erro na execução: {e}")
+            traceback.print_exc()
+        finally:
+            self.pool.release(pooled, healthy=healthy)
+            print_wait_summary()
+            finish_run(success)
+            # Envia os alertas da execução sem bloquear o próximo agendamento
+            flush_alerts(wait=False)
+            duration = time.monotonic() - started_at
+            self.status.update({
+                "runs": self.status["runs"] + 1,
+                "last_run": datetime.now().isoformat(),
+                "last_success": success,
+                "last_duration": round(duration, 1),
+                "running": False
+            })
+            print(f"⏹️ Execução finalizada em {duration:.1f}s")
+    
+    def _scheduler_loop(self):
+        """Dispara execuções nos horários de Config.DAEMON_SCHEDULE_TIMES"""
+        while not self._stop.is_set():
+            next_run = next_scheduled_time()
+            if next_run is None:
+                return
+            print(f"⏰ Próxima execução agendada: {next_run.strftime('%d/%m/%Y %H:%M')}")
+            if self._stop.wait((next_run - datetime.now()).total_seconds()):
+                return
+            self.trigger("agendada")
+    
+    def _make_handler(self):
+        daemon = self
+        
+        class TriggerHandler(BaseHTTPRequestHandler):
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_POST(self):
+                if self.path != "/run":
+                    self._reply(404, {"error": "not found"})
+                    return
+                queued = daemon.trigger("sob demanda")
+                self._reply(202, {"queued": queued})
+            
+            def do_GET(self):
+                if self.path != "/status":
+                    self._reply(404, {"error": "not found"})
+                    return
+                self._reply(200, daemon.status)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return TriggerHandler
+    
+    def serve_forever(self):
+        """Aquece o pool, inicia o agendador e o gatilho HTTP e processa as execuções"""
+        self.pool.warm_up()
+        threading.Thread(target=self._scheduler_loop, daemon=True).start()
+        
+        server = ThreadingHTTPServer((Config.DAEMON_HOST, Config.DAEMON_PORT), self._make_handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"✅ Daemon aguardando em http://{Config.DAEMON_HOST}:{Config.DAEMON_PORT} (POST /run, GET /status)")
+        
+        try:
+            while not self._stop.is_set():
+                try:
+                    reason = self._triggers.get(timeout=1)
+                except queue.Empty:
+                    continue
+                self.run_once(reason)
+        except KeyboardInterrupt:
+            print("\nEncerrando daemon...")
+        finally:
+            self._stop.set()
+            server.shutdown()
+            self.pool.close()
+            print("✅ Daemon finalizado")
+
+
+if __name__ == "__main__":
+    BpoDaemon().serve_forever()
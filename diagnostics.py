@@ -0,0 +1,218 @@
+"""
+Diagnóstico de falhas
+Captura o estado do navegador no momento do erro (screenshot reduzido em JPEG, URL, DOM sem
+scripts/estilos, logs do console e requisições recentes) e grava tudo em um único .zip,
+com política de retenção para os arquivos locais
+"""
+import os
+import glob
+import json
+import time
+import base64
+import zipfile
+from datetime import datetime
+from config import Config
+
+
+# Uma única chamada ao navegador: URL, título, DOM enxuto e requisições recentes
+_SNAPSHOT_JS = """
+const maxChars = arguments[0], limit = arguments[1];
+const clone = document.documentElement.cloneNode(true);
+clone.querySelectorAll('script, style, svg, noscript, link[rel="stylesheet"]').forEach(e => e.remove());
+clone.querySelectorAll('[src^="data:"], [href^="data:"]').forEach(e => {
+    e.removeAttribute('src');
+    e.removeAttribute('href');
+});
+const dom = clone.outerHTML;
+const network = performance.getEntriesByType('resource').slice(-limit).map(e => ({
+    url: e.name,
+    type: e.initiatorType,
+    start_ms: Math.round(e.startTime),
+    duration_ms: Math.round(e.duration),
+    bytes: e.transferSize,
+    status: e.responseStatus
+}));
+return {
+    url: location.href,
+    title: document.title,
+    dom: dom.slice(0, maxChars),
+    dom_chars: dom.length,
+    viewport: [window.innerWidth, window.innerHeight, window.scrollX, window.scrollY],
+    network: network
+};
+"""
+
+
+def _capture_screenshot(driver, viewport):
+    """
+    Screenshot da área visível reduzido e comprimido pelo próprio Chrome (DevTools)
+    
+    Args:
+        driver: Instância do WebDriver
+        viewport: [largura, altura, scrollX, scrollY] da página (ou None)
+    
+    Returns:
+        tuple: (bytes da imagem, formato "jpeg" ou "png")
+    """
+    if viewport:
+        width, height, scroll_x, scroll_y = viewport
+        scale = min(1.0, Config.DIAGNOSTICS_SCREENSHOT_MAX_WIDTH / max(width, 1))
+        try:
+            result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+                "format": "jpeg",
+                "quality": Config.DIAGNOSTICS_SCREENSHOT_QUALITY,
+                "clip": {"x": scroll_x, "y": scroll_y, "width": width, "height": height, "scale": scale}
+            })
+            return base64.b64decode(result["data"]), "jpeg"
+        except Exception:
+            pass
+    # Sem DevTools: screenshot padrão do WebDriver (PNG em tamanho original)
+    return driver.get_screenshot_as_png(), "png"
+
+
+def capture_snapshot(driver):
+    """
+    Captura o estado atual do navegador (parte síncrona do diagnóstico)
+    
+    Só lê o navegador; compressão e gravação ficam para write_bundle(), chamada em segundo plano.
+    
+    Args:
+        driver: Instância do WebDriver
+    
+    Returns:
+        dict: 'captured_at', 'url', 'title', 'dom', 'dom_chars', 'network', 'console',
+            'screenshot', 'screenshot_format' e 'errors' (partes que não puderam ser capturadas)
+    """
+    limit = Config.DIAGNOSTICS_LOG_ENTRIES
+    snapshot = {
+        "captured_at": datetime.now(),
+        "url": None,
+        "title": None,
+        "dom": None,
+        "dom_chars": 0,
+        "network": [],
+        "console": [],
+        "screenshot": None,
+        "screenshot_format": None,
+        "errors": []
+    }
+    
+    page = None
+    try:
+        page = driver.execute_script(_SNAPSHOT_JS, Config.DIAGNOSTICS_DOM_MAX_CHARS, limit)
+        snapshot.update({key: page[key] for key in ("url", "title", "dom", "dom_chars", "network")})
+    except Exception as e:
+        snapshot["errors"].append(f"página: {e}")
+        try:
+            snapshot["url"] = driver.current_url
+        except Exception:
+            pass
+    
+    try:
+        snapshot["screenshot"], snapshot["screenshot_format"] = _capture_screenshot(driver, page and page.get("viewport"))
+    except Exception as e:
+        snapshot["errors"].append(f"screenshot: {e}")
+    
+    try:
+        snapshot["console"] = driver.get_log("browser")[-limit:]
+    except Exception as e:
+        snapshot["errors"].append(f"console: {e}")
+    
+    return snapshot
+
+
+def write_bundle(snapshot, error_message, run_id=None, directory=None):
+    """
+    Grava o diagnóstico em um .zip e aplica a política de retenção
+    
+    Args:
+        snapshot: Resultado de capture_snapshot()
+        error_message: Mensagem de erro
+        run_id: Execução de origem
+        directory: Pasta dos diagnósticos (se None, usa Config.DIAGNOSTICS_DIR)
+    
+    Returns:
+        str: Caminho do arquivo gravado
+    """
+    directory = directory or Config.DIAGNOSTICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    captured_at = snapshot["captured_at"]
+    path = os.path.join(directory, f"diagnostico_{captured_at.strftime('%Y%m%d_%H%M%S_%f')}.zip")
+    
+    info = {
+        "captured_at": captured_at.isoformat(timespec="seconds"),
+        "run_id": run_id,
+        "error": error_message,
+        "url": snapshot["url"],
+        "title": snapshot["title"],
+        "dom_chars": snapshot["dom_chars"],
+        "dom_truncated": bool(snapshot["dom"]) and snapshot["dom_chars"] > len(snapshot["dom"]),
+        "capture_errors": snapshot["errors"]
+    }
+    
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr("info.json", json.dumps(info, ensure_ascii=False, indent=2))
+        if snapshot["dom"]:
+            bundle.writestr("page.html", snapshot["dom"])
+        bundle.writestr("console.json", json.dumps(snapshot["console"], ensure_ascii=False, indent=2))
+        bundle.writestr("network.json", json.dumps(snapshot["network"], ensure_ascii=False, indent=2))
+        if snapshot["screenshot"]:
+            # A imagem já está comprimida
+            bundle.writestr(
+                f"screenshot.{'jpg' if snapshot['screenshot_format'] == 'jpeg' else 'png'}",
+                snapshot["screenshot"], compress_type=zipfile.ZIP_STORED
+            )
+    os.replace(tmp_path, path)
+    
+    enforce_retention(directory)
+    return path
+
+
+def _apply_retention(paths, cutoff, limit):
+    """Remove os arquivos mais antigos que cutoff e os que passam do limite (mais recentes ficam)"""
+    entries = []
+    for path in paths:
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    entries.sort(reverse=True)
+    
+    removed = []
+    for index, (mtime, path) in enumerate(entries):
+        if mtime >= cutoff and index < limit:
+            continue
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            pass
+    return removed
+
+
+def enforce_retention(directory=None):
+    """
+    Remove diagnósticos e screenshots de erro (alertas sem diagnóstico) antigos
+    
+    Só a pasta informada é considerada (cada job tem a sua). Diagnósticos e screenshots são
+    contados separadamente: cada grupo mantém no máximo Config.DIAGNOSTICS_MAX_BUNDLES arquivos
+    e nenhum mais antigo que Config.DIAGNOSTICS_RETENTION_DAYS.
+    
+    Args:
+        directory: Pasta dos diagnósticos (se None, usa Config.DIAGNOSTICS_DIR)
+    
+    Returns:
+        list: Arquivos removidos
+    """
+    directory = directory or Config.DIAGNOSTICS_DIR
+    cutoff = time.time() - Config.DIAGNOSTICS_RETENTION_DAYS * 86400
+    bundles = glob.glob(os.path.join(directory, "diagnostico_*.zip"))
+    screenshots = glob.glob(os.path.join(directory, "screenshot_error_*.png"))
+    screenshots += glob.glob(os.path.join(directory, "screenshot_error_*.jpg"))
+    
+    removed = _apply_retention(bundles, cutoff, Config.DIAGNOSTICS_MAX_BUNDLES)
+    removed += _apply_retention(screenshots, cutoff, Config.DIAGNOSTICS_MAX_BUNDLES)
+    if removed:
+        print(f"🧹 {len(removed)} diagnóstico(s) antigo(s) removido(s)")
+    return removed
@@ -0,0 +1,166 @@
+"""
+Monitoramento de downloads do Chrome para o script BPO
+Detecta o arquivo criado por esta execução assim que o download termina
+"""
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+from utils import record_wait
+
+
+# Eventos do inotify usados (ver <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _open_inotify(directory):
+    """
+    Abre um descritor inotify observando o diretório (somente Linux)
+    
+    Args:
+        directory: Diretório a observar
+    
+    Returns:
+        int: Descritor de arquivo do inotify ou None se não estiver disponível
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class DownloadWatcher:
+    """
+    Observa o diretório de downloads e retorna o arquivo baixado por esta execução
+    
+    Uso: chame start() antes de disparar o download e wait() em seguida. Arquivos que já
+    existiam em start() são ignorados, então um CSV antigo nunca é confundido com o novo.
+    """
+    
+    def __init__(self, download_dir, extension=".csv", stable_interval=0.3, poll_interval=0.2):
+        """
+        Args:
+            download_dir: Diretório de downloads
+            extension: Extensão do arquivo esperado
+            stable_interval: Intervalo em segundos para confirmar que o tamanho parou de mudar
+            poll_interval: Intervalo de verificação quando o inotify não está disponível
+        """
+        self.download_dir = download_dir
+        self.extension = extension.lower()
+        self.stable_interval = stable_interval
+        self.poll_interval = poll_interval
+        self._baseline = {}
+        self._fd = None
+    
+    def start(self):
+        """Registra os arquivos já existentes e começa a observar o diretório"""
+        os.makedirs(self.download_dir, exist_ok=True)
+        self._fd = _open_inotify(self.download_dir)
+        self._baseline = self._snapshot()
+        if self._fd is None:
+            print("⚠️ inotify indisponível, monitorando downloads por polling")
+        return self
+    
+    def close(self):
+        """Para de observar o diretório"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _snapshot(self):
+        """Retorna {nome: mtime_ns} dos arquivos atuais do diretório"""
+        files = {}
+        with os.scandir(self.download_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    files[entry.name] = entry.stat().st_mtime_ns
+        return files
+    
+    def _new_candidates(self):
+        """
+        Retorna os arquivos com a extensão esperada criados ou modificados desde start()
+        
+        Returns:
+            list: Caminhos dos candidatos, do mais recente para o mais antigo
+        """
+        current = self._snapshot()
+        in_progress = {name[:-len(".crdownload")] for name in current if name.endswith(".crdownload")}
+        candidates = [
+            (mtime, name) for name, mtime in current.items()
+            if name.lower().endswith(self.extension)
+            and self._baseline.get(name) != mtime
+            and name not in in_progress
+        ]
+        return [os.path.join(self.download_dir, name) for _, name in sorted(candidates, reverse=True)]
+    
+    def _is_stable(self, path):
+        """Confirma que o arquivo existe, não está vazio e o tamanho parou de mudar"""
+        try:
+            size = os.path.getsize(path)
+            if size == 0:
+                return False
+            time.sleep(self.stable_interval)
+            return os.path.getsize(path) == size and not os.path.exists(path + ".crdownload")
+        except OSError:
+            return False
+    
+    def _wait_for_events(self, timeout):
+        """Bloqueia até chegar um evento do inotify (ou até o timeout) e descarta os eventos lidos"""
+        if self._fd is None:
+            time.sleep(min(self.poll_interval, timeout))
+            return
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if readable:
+            try:
+                while os.read(self._fd, 64 * (_EVENT_HEADER.size + 256)):
+                    pass
+            except BlockingIOError:
+                pass
+    
+    def wait(self, timeout=60):
+        """
+        Aguarda o download desta execução terminar
+        
+        Args:
+            timeout: Tempo máximo de espera em segundos
+        
+        Returns:
+            str: Caminho do arquivo baixado ou None se timeout
+        """
+        started_at = time.monotonic()
+        deadline = started_at + timeout
+        path = None
+        try:
+            while True:
+                for candidate in self._new_candidates():
+                    if self._is_stable(candidate):
+                        path = candidate
+                        return path
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._wait_for_events(min(remaining, 1.0))
+        finally:
+            record_wait("download_watcher", self.download_dir, started_at, success=path is not None)
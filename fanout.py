@@ -0,0 +1,93 @@
+"""
+Envio do mesmo relatório para vários destinos (fan-out)
+Um único download alimenta vários perfis; cada perfil aplica seus filtros e escreve na sua planilha/aba
+"""
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils import filter_dataframe, upload_to_google_sheets
+
+
+def get_profile_filters(profile):
+    """
+    Monta os filtros de um perfil a partir de Config.get_dataframe_filters()
+    
+    Args:
+        profile: Perfil de Config.FANOUT_PROFILES; "filters" substitui os valores de cada filtro pelo nome
+    
+    Returns:
+        list: Filtros do perfil
+    """
+    overrides = profile.get("filters", {})
+    filters = Config.get_dataframe_filters()
+    known = {spec["name"] for spec in filters}
+    unknown = set(overrides) - known
+    if unknown:
+        raise ValueError(
+            f"Perfil '{profile['name']}' usa filtro(s) desconhecido(s): {sorted(unknown)}. "
+            f"Filtros disponíveis: {sorted(known)}"
+        )
+    
+    return [
+        dict(spec, values=list(overrides[spec["name"]])) if spec["name"] in overrides else spec
+        for spec in filters
+    ]
+
+
+def union_profile_filters(profiles=None):
+    """
+    Une os filtros de todos os perfis para aplicar uma única vez na leitura do CSV
+    
+    Uma linha é mantida na leitura se algum perfil puder usá-la; cada perfil refiltra depois.
+    
+    Args:
+        profiles: Perfis (se None, usa Config.FANOUT_PROFILES)
+    
+    Returns:
+        list: Filtros com a união dos valores de cada filtro
+    """
+    profiles = Config.FANOUT_PROFILES if profiles is None else profiles
+    union = [dict(spec, values=[]) for spec in Config.get_dataframe_filters()]
+    for profile in profiles:
+        for merged, spec in zip(union, get_profile_filters(profile)):
+            merged["values"].extend(value for value in spec["values"] if value not in merged["values"])
+    return union
+
+
+def _upload_profile(df, profile):
+    """Filtra o DataFrame para o perfil e envia ao destino dele"""
+    subset = filter_dataframe(df, get_profile_filters(profile), verbose=False)
+    print(f"[{profile['name']}] {len(subset)} linha(s) para {profile.get('spreadsheet') or Config.SPREADSHEET_NAME}"
+          f" / {profile.get('worksheet') or Config.WORKSHEET_NAME}")
+    return upload_to_google_sheets(
+        subset,
+        spreadsheet_name=profile.get("spreadsheet"),
+        worksheet_name=profile.get("worksheet")
+    )
+
+
+def upload_profiles(df, profiles=None, workers=None):
+    """
+    Envia o DataFrame para todos os perfis em paralelo
+    
+    Args:
+        df: DataFrame já filtrado com union_profile_filters()
+        profiles: Perfis (se None, usa Config.FANOUT_PROFILES)
+        workers: Envios simultâneos (se None, usa Config.FANOUT_WORKERS)
+    
+    Returns:
+        dict: {nome do perfil: URL da planilha ou None se o envio falhou}
+    """
+    profiles = Config.FANOUT_PROFILES if profiles is None else profiles
+    workers = max(1, min(workers or Config.FANOUT_WORKERS, len(profiles)))
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {profile["name"]: executor.submit(_upload_profile, df, profile) for profile in profiles}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+                print(f"✅ [{name}] Upload concluído")
+            except Exception as e:
+                results[name] = None
+                print(f"❌ [{name}] Erro ao fazer upload: {e}")
+    return results
@@ -0,0 +1,296 @@
+"""
+Histórico local dos relatórios extraídos (SQLite)
+Cada execução grava as linhas filtradas; registros repetidos entre execuções são unificados,
+então o histórico cresce com os registros únicos e não com execuções x tamanho da janela
+"""
+import sqlite3
+import datetime
+import threading
+from config import Config
+from utils import dataframe_to_values
+
+
+_META_COLUMNS = ["_key", "_request_date", "_first_run", "_last_run"]
+
+
+def _quote(name):
+    """Escapa o nome de uma coluna para uso no SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def find_date_column(columns, date_column=None, keywords=None):
+    """
+    Localiza a coluna com a data da solicitação
+    
+    Args:
+        columns: Colunas do DataFrame
+        date_column: Nome exato da coluna (se None, usa Config.HISTORY_DATE_COLUMN)
+        keywords: Palavras-chave procuradas no nome (se None, usa Config.HISTORY_DATE_KEYWORDS)
+    
+    Returns:
+        str: Nome da coluna ou None se não encontrada
+    """
+    date_column = date_column or Config.HISTORY_DATE_COLUMN
+    if date_column:
+        return date_column if date_column in columns else None
+    keywords = keywords or Config.HISTORY_DATE_KEYWORDS
+    for col in columns:
+        if any(keyword in str(col).lower() for keyword in keywords):
+            return col
+    return None
+
+
+class HistoryStore:
+    """Histórico indexado por data da solicitação e por execução"""
+    
+    def __init__(self, path=None, key_columns=None):
+        """
+        Args:
+            path: Arquivo do banco (se None, usa Config.HISTORY_DB_FILE)
+            key_columns: Colunas que identificam um registro (se None, usa Config.HISTORY_KEY_COLUMNS;
+                vazio = linha inteira)
+        """
+        self.path = path or Config.HISTORY_DB_FILE
+        self.key_columns = key_columns if key_columns is not None else Config.HISTORY_KEY_COLUMNS
+        # O orquestrador grava e fecha o histórico em threads diferentes (acesso serializado por HistoryRecorder)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT NOT NULL,
+                window_start TEXT,
+                window_end TEXT,
+                rows INTEGER DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                _key TEXT PRIMARY KEY,
+                _request_date TEXT,
+                _first_run INTEGER NOT NULL,
+                _last_run INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_request_date ON records (_request_date);
+        """)
+        self.conn.commit()
+    
+    def close(self):
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _ensure_columns(self, columns):
+        """Adiciona ao banco as colunas do relatório que ainda não existem"""
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(records)")}
+        for col in columns:
+            if col not in existing:
+                self.conn.execute(f"ALTER TABLE records ADD COLUMN {_quote(col)} TEXT")
+    
+    def _record_keys(self, df):
+        """Hash de cada linha (ou das colunas-chave) usado para unificar registros repetidos"""
+        import pandas as pd
+        
+        if self.key_columns:
+            # Sem as colunas-chave, cada alteração viraria um registro novo em vez de atualizar o existente
+            missing = [col for col in self.key_columns if col not in df.columns]
+            if missing:
+                raise ValueError(f"Colunas-chave do histórico não encontradas no relatório: {missing}")
+            key_columns = list(self.key_columns)
+        else:
+            key_columns = list(df.columns)
+        hashes = pd.util.hash_pandas_object(df[key_columns].astype(str), index=False)
+        return [format(value, "016x") for value in hashes.to_numpy()]
+    
+    @staticmethod
+    def _request_dates(df):
+        """Datas da solicitação no formato ISO (None quando não há coluna de data)"""
+        import pandas as pd
+        
+        date_column = find_date_column(df.columns)
+        if date_column is None:
+            return [None] * len(df)
+        dates = pd.to_datetime(df[date_column], dayfirst=True, errors="coerce", format="mixed")
+        return dates.dt.strftime("%Y-%m-%d").astype(object).where(dates.notna(), None).tolist()
+    
+    def begin_run(self, window_start=None, window_end=None):
+        """
+        Registra o início de uma execução
+        
+        Args:
+            window_start: Data inicial da janela extraída (datetime.date)
+            window_end: Data final da janela extraída (datetime.date)
+        
+        Returns:
+            int: ID da execução
+        """
+        cursor = self.conn.execute(
+            "INSERT INTO runs (started_at, window_start, window_end) VALUES (?, ?, ?)",
+            (
+                datetime.datetime.now().isoformat(timespec="seconds"),
+                window_start.isoformat() if window_start else None,
+                window_end.isoformat() if window_end else None
+            )
+        )
+        self.conn.commit()
+        return cursor.lastrowid
+    
+    def append(self, run_id, df):
+        """
+        Grava as linhas de um DataFrame (ou bloco) da execução
+        
+        Registros já existentes apenas atualizam o conteúdo e a última execução em que apareceram.
+        
+        Args:
+            run_id: ID retornado por begin_run()
+            df: Linhas filtradas
+        
+        Returns:
+            int: Linhas gravadas
+        """
+        if len(df) == 0:
+            return 0
+        
+        keys = self._record_keys(df)
+        values = dataframe_to_values(df)
+        columns = values[0]
+        self._ensure_columns(columns)
+        
+        dates = self._request_dates(df)
+        all_columns = _META_COLUMNS + columns
+        placeholders = ", ".join("?" for _ in all_columns)
+        updates = ", ".join(
+            f"{_quote(col)} = excluded.{_quote(col)}" for col in ["_request_date", "_last_run"] + columns
+        )
+        sql = (
+            f"INSERT INTO records ({', '.join(_quote(col) for col in all_columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(_key) DO UPDATE SET {updates}"
+        )
+        rows = ([key, date, run_id, run_id] + row for key, date, row in zip(keys, dates, values[1:]))
+        with self.conn:
+            self.conn.executemany(sql, rows)
+            self.conn.execute("UPDATE runs SET rows = rows + ? WHERE run_id = ?", (len(df), run_id))
+        return len(df)
+    
+    def count(self):
+        """Total de registros únicos no histórico"""
+        return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+    
+    def query(self, start=None, end=None, columns=None, include_meta=False):
+        """
+        Consulta o histórico por intervalo de datas da solicitação
+        
+        Args:
+            start: Data inicial (datetime.date ou "dd/mm/aaaa"); None = sem limite
+            end: Data final (datetime.date ou "dd/mm/aaaa"); None = sem limite
+            columns: Colunas retornadas (se None, todas as colunas do relatório)
+            include_meta: Inclui a data normalizada e as execuções em que o registro apareceu
+        
+        Returns:
+            pd.DataFrame: Registros do intervalo, ordenados pela data da solicitação
+        """
+        import pandas as pd
+        
+        if columns is None:
+            columns = [
+                row[1] for row in self.conn.execute("PRAGMA table_info(records)")
+                if row[1] not in _META_COLUMNS
+            ]
+        if not columns:
+            # Histórico ainda vazio (nenhuma coluna do relatório gravada)
+            return pd.DataFrame()
+        if include_meta:
+            columns = _META_COLUMNS[1:] + list(columns)
+        
+        conditions, params = [], []
+        for operator, value in ((">=", start), ("<=", end)):
+            if value is None:
+                continue
+            if isinstance(value, str):
+                value = datetime.datetime.strptime(value, "%d/%m/%Y").date()
+            conditions.append(f"_request_date {operator} ?")
+            params.append(value.isoformat())
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = (
+            f"SELECT {', '.join(_quote(col) for col in columns)} FROM records {where} "
+            "ORDER BY _request_date, _first_run"
+        )
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+
+def query_history(start=None, end=None, columns=None, path=None):
+    """
+    Consulta o histórico local sem acessar o site
+    
+    Args:
+        start: Data inicial (datetime.date ou "dd/mm/aaaa")
+        end: Data final (datetime.date ou "dd/mm/aaaa")
+        columns: Colunas retornadas (se None, todas)
+        path: Arquivo do banco (se None, usa Config.HISTORY_DB_FILE)
+    
+    Returns:
+        pd.DataFrame: Registros do intervalo
+    """
+    with HistoryStore(path) as store:
+        return store.query(start, end, columns)
+
+
+class HistoryRecorder:
+    """
+    Grava o resultado de uma execução no histórico, de uma vez ou bloco a bloco
+    
+    Falhas ao gravar apenas geram um aviso e desativam o histórico na execução;
+    o envio ao Google Sheets não é interrompido.
+    """
+    
+    def __init__(self, window_start=None, window_end=None, enabled=None):
+        """
+        Args:
+            window_start: Data inicial da janela extraída (datetime.date)
+            window_end: Data final da janela extraída (datetime.date)
+            enabled: Grava o histórico (se None, usa Config.HISTORY_ENABLED)
+        """
+        self.window_start = window_start
+        self.window_end = window_end
+        self.enabled = Config.HISTORY_ENABLED if enabled is None else enabled
+        self.store = None
+        self.run_id = None
+        self.rows = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, df):
+        """Grava as linhas (DataFrame completo ou bloco); pode ser chamado de qualquer thread"""
+        with self._lock:
+            self._record(df)
+    
+    def _record(self, df):
+        if not self.enabled:
+            return
+        try:
+            if self.store is None:
+                self.store = HistoryStore()
+                self.run_id = self.store.begin_run(self.window_start, self.window_end)
+            self.rows += self.store.append(self.run_id, df)
+        except Exception as e:
+            print(f"⚠️ Não foi possível gravar o histórico, ignorando nesta execução: {e}")
+            self.enabled = False
+    
+    def close(self):
+        with self._lock:
+            if self.store is None:
+                return
+            try:
+                if self.enabled:
+                    print(f"✅ Histórico: {self.rows} linha(s) gravada(s), {self.store.count()} registro(s) único(s)")
+            finally:
+                self.store.close()
+                self.store = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,223 @@
+"""
+Motor de extração via HTTP para o script BPO
+Reproduz o login e a exportação do relatório sem abrir o navegador
+"""
+import io
+import re
+import shutil
+import json
+import html
+from contextlib import contextmanager
+from urllib.parse import urljoin, quote
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+from instrumentation import annotate
+
+
+class HttpEngineError(Exception):
+    """Erro no fluxo HTTP; o chamador deve usar o navegador como alternativa"""
+
+
+class HttpExportEngine:
+    """Sessão HTTP com pool de conexões para login e exportação do relatório"""
+    
+    def __init__(self, base_url=None, timeout=None, pool_size=4):
+        """
+        Args:
+            base_url: URL base do site (se None, usa Config.SITE_URL)
+            timeout: Timeout das requisições em segundos (se None, usa Config.HTTP_TIMEOUT)
+            pool_size: Número de conexões mantidas abertas no pool
+        """
+        self.base_url = base_url or Config.SITE_URL
+        self.timeout = timeout or Config.HTTP_TIMEOUT
+        
+        # Reaproveita conexões e repete requisições idempotentes em falhas transitórias
+        retry = Retry(
+            total=2,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET"])
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+            "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8"
+        })
+    
+    def close(self):
+        """Fecha a sessão e as conexões do pool"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _url(self, path):
+        return urljoin(self.base_url, path)
+    
+    @staticmethod
+    def _extract_csrf_token(page_html):
+        """Extrai o token CSRF da página (meta tag ou atributo do script do Livewire)"""
+        match = re.search(r'<meta\s+name="csrf-token"\s+content="([^"]+)"', page_html)
+        if not match:
+            match = re.search(r'data-csrf="([^"]+)"', page_html)
+        if not match:
+            raise HttpEngineError("Token CSRF não encontrado na página de login")
+        return match.group(1)
+    
+    @staticmethod
+    def _extract_login_snapshot(page_html):
+        """Retorna o snapshot do componente Livewire que contém o formulário de login"""
+        for raw in re.findall(r'wire:snapshot="([^"]+)"', page_html):
+            snapshot = html.unescape(raw)
+            try:
+                data = json.loads(snapshot)
+            except ValueError:
+                continue
+            name = str(data.get("memo", {}).get("name", "")).lower()
+            if "login" in name or '"email"' in snapshot:
+                return snapshot
+        raise HttpEngineError("Componente de login não encontrado na página")
+    
+    def login(self, email, password):
+        """
+        Faz login reproduzindo a chamada do formulário (Livewire)
+        
+        Args:
+            email: Email de login
+            password: Senha
+        """
+        response = self.session.get(self._url(Config.HTTP_LOGIN_PATH), timeout=self.timeout)
+        if response.status_code != 200:
+            raise HttpEngineError(f"Página de login retornou status {response.status_code}")
+        
+        page_html = response.text
+        csrf_token = self._extract_csrf_token(page_html)
+        snapshot = self._extract_login_snapshot(page_html)
+        
+        update_uri = re.search(r'data-update-uri="([^"]+)"', page_html)
+        update_url = self._url(html.unescape(update_uri.group(1)) if update_uri else "livewire/update")
+        
+        payload = {
+            "_token": csrf_token,
+            "components": [{
+                "snapshot": snapshot,
+                "updates": {"data.email": email, "data.password": password},
+                "calls": [{"path": "", "method": "authenticate", "params": []}]
+            }]
+        }
+        response = self.session.post(
+            update_url,
+            json=payload,
+            headers={"X-CSRF-TOKEN": csrf_token, "X-Livewire": "", "Referer": response.url},
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise HttpEngineError(f"Login retornou status {response.status_code}")
+        
+        # Confirma a sessão acessando a página de relatórios
+        check = self.session.get(Config.REPORTS_URL, timeout=self.timeout)
+        if "login" in check.url.lower():
+            raise HttpEngineError("Login não foi aceito (redirecionado para a página de login)")
+        print("✅ Login realizado via HTTP")
+    
+    @contextmanager
+    def open_export_stream(self, from_date, to_date):
+        """
+        Abre a exportação do relatório como stream, sem carregar o CSV inteiro
+        
+        Args:
+            from_date: Data inicial (dd/mm/aaaa)
+            to_date: Data final (dd/mm/aaaa)
+        
+        Yields:
+            Stream binário com o conteúdo do CSV (já descompactado)
+        """
+        if not Config.HTTP_EXPORT_URL:
+            raise HttpEngineError("Config.HTTP_EXPORT_URL não configurada")
+        
+        url = self._url(Config.HTTP_EXPORT_URL.format(
+            from_date=quote(from_date, safe=""),
+            to_date=quote(to_date, safe="")
+        ))
+        with self.session.get(url, stream=True, timeout=self.timeout) as response:
+            if response.status_code != 200:
+                raise HttpEngineError(f"Exportação retornou status {response.status_code}")
+            content_type = response.headers.get("Content-Type", "")
+            if "text/html" in content_type or "login" in response.url.lower():
+                raise HttpEngineError("Exportação retornou uma página HTML em vez do CSV")
+            
+            response.raw.decode_content = True
+            yield response.raw
+    
+    def export_csv(self, from_date, to_date, chunk_size=64 * 1024):
+        """
+        Baixa o CSV do relatório direto para a memória
+        
+        Args:
+            from_date: Data inicial (dd/mm/aaaa)
+            to_date: Data final (dd/mm/aaaa)
+            chunk_size: Tamanho de cada bloco lido da resposta
+        
+        Returns:
+            io.BytesIO: Conteúdo do CSV, posicionado no início
+        """
+        buffer = io.BytesIO()
+        with self.open_export_stream(from_date, to_date) as stream:
+            shutil.copyfileobj(stream, buffer, chunk_size)
+        
+        print(f"✅ CSV baixado via HTTP ({buffer.tell()} bytes)")
+        annotate(bytes=buffer.tell())
+        buffer.seek(0)
+        return buffer
+
+
+def extract_csv_via_http(email, password, from_date, to_date):
+    """
+    Faz login e exporta o relatório usando o motor HTTP
+    
+    Args:
+        email: Email de login
+        password: Senha
+        from_date: Data inicial (dd/mm/aaaa)
+        to_date: Data final (dd/mm/aaaa)
+    
+    Returns:
+        io.BytesIO: Conteúdo do CSV
+    """
+    try:
+        with HttpExportEngine() as engine:
+            engine.login(email, password)
+            return engine.export_csv(from_date, to_date)
+    except requests.RequestException as e:
+        raise HttpEngineError(f"Falha de rede no motor HTTP: {e}") from e
+
+
+@contextmanager
+def open_http_export_stream(email, password, from_date, to_date):
+    """
+    Faz login e abre a exportação do relatório como stream
+    
+    Args:
+        email: Email de login
+        password: Senha
+        from_date: Data inicial (dd/mm/aaaa)
+        to_date: Data final (dd/mm/aaaa)
+    
+    Yields:
+        Stream binário com o conteúdo do CSV
+    """
+    try:
+        with HttpExportEngine() as engine:
+            engine.login(email, password)
+            with engine.open_export_stream(from_date, to_date) as stream:
+                yield stream
+    except requests.RequestException as e:
+        raise HttpEngineError(f"Falha de rede no motor HTTP: {e}") from e
@@ -0,0 +1,270 @@
+"""
+Instrumentação das execuções do script BPO
+Mede cada etapa do fluxo (tempo, linhas, bytes, memória), conta retentativas e fallbacks
+e grava um relatório por execução (JSON lines) e, opcionalmente, métricas do Prometheus
+"""
+import os
+import json
+import time
+import uuid
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from config import Config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _current_rss_mb():
+    """Memória residente atual do processo em MB (None se não for possível medir)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss_mb():
+    """Pico de memória residente do processo em MB (ru_maxrss está em KB no Linux)"""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class RunReport:
+    """Etapas, esperas e contadores de uma execução"""
+    
+    def __init__(self, name="pipeline"):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        self.finished_at = None
+        self.duration = None
+        self.success = None
+        self.stages = []
+        self.waits = []
+        self.counters = {}
+        self.critical_path = []  # Preenchido pelo orquestrador assíncrono (orchestrator.py)
+        self._lock = threading.Lock()
+    
+    def add_stage(self, entry):
+        with self._lock:
+            self.stages.append(entry)
+    
+    def add_wait(self, entry):
+        with self._lock:
+            self.waits.append(entry)
+    
+    def increment(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+    
+    def finish(self, success):
+        self.success = bool(success)
+        self.finished_at = datetime.now()
+        self.duration = round(time.monotonic() - self._started, 3)
+    
+    def to_dict(self):
+        waits_failed = sum(1 for wait in self.waits if not wait["success"])
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+            "duration_seconds": self.duration,
+            "success": self.success,
+            "peak_rss_mb": _peak_rss_mb(),
+            "stages": list(self.stages),
+            "waits": {
+                "count": len(self.waits),
+                "failed": waits_failed,
+                "seconds": round(sum(wait["seconds"] for wait in self.waits), 3),
+                "slowest": sorted(self.waits, key=lambda wait: wait["seconds"], reverse=True)[:5]
+            },
+            "counters": dict(self.counters),
+            "critical_path": list(self.critical_path)
+        }
+
+
+_CURRENT_RUN = RunReport("sem_execucao")
+_STAGE_STACK = threading.local()
+
+
+def start_run(name="pipeline"):
+    """
+    Inicia o relatório de uma nova execução
+    
+    Args:
+        name: Nome da execução (ex.: "main" ou o motivo no modo daemon)
+    
+    Returns:
+        RunReport: Relatório da execução
+    """
+    global _CURRENT_RUN
+    _CURRENT_RUN = RunReport(name)
+    return _CURRENT_RUN
+
+
+def current_run():
+    """Retorna o relatório da execução atual"""
+    return _CURRENT_RUN
+
+
+def _stack():
+    if not hasattr(_STAGE_STACK, "items"):
+        _STAGE_STACK.items = []
+    return _STAGE_STACK.items
+
+
+@contextmanager
+def stage(name, **fields):
+    """
+    Mede uma etapa do fluxo
+    
+    Uso: with stage("login"): ...  — campos extras (linhas, bytes) podem ser adicionados com annotate().
+    
+    Args:
+        name: Nome da etapa
+        **fields: Campos iniciais registrados com a etapa
+    
+    Yields:
+        dict: Campos da etapa (podem ser alterados dentro do bloco)
+    """
+    report = _CURRENT_RUN
+    info = dict(fields)
+    stack = _stack()
+    entry = {"stage": name, "parent": stack[-1]["stage"] if stack else None}
+    stack.append(entry)
+    started_at = time.monotonic()
+    success = False
+    try:
+        yield info
+        success = True
+    finally:
+        stack.pop()
+        rss = _current_rss_mb()
+        entry.update({
+            "seconds": round(time.monotonic() - started_at, 3),
+            "success": success,
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "peak_rss_mb": _peak_rss_mb()
+        })
+        entry.update(info)
+        report.add_stage(entry)
+
+
+def instrumented(name):
+    """Decorador que mede a função como uma etapa do fluxo"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**fields):
+    """Adiciona campos (ex.: rows_in, rows_out, bytes) à etapa em andamento nesta thread"""
+    stack = _stack()
+    if stack:
+        stack[-1].update(fields)
+
+
+def increment(counter, amount=1):
+    """Incrementa um contador da execução (ex.: retentativas, fallbacks)"""
+    _CURRENT_RUN.increment(counter, amount)
+
+
+def record_wait_event(entry):
+    """Registra uma espera (ver utils.record_wait) na execução e na etapa em andamento"""
+    _CURRENT_RUN.add_wait(entry)
+    if not entry["success"]:
+        _CURRENT_RUN.increment("waits_failed")
+    stack = _stack()
+    if stack:
+        stack[-1]["waits"] = stack[-1].get("waits", 0) + 1
+        stack[-1]["wait_seconds"] = round(stack[-1].get("wait_seconds", 0) + entry["seconds"], 3)
+
+
+def _prometheus_lines(report):
+    """Métricas da execução no formato texto do Prometheus"""
+    data = report.to_dict()
+    labels = f'name="{report.name}"'
+    lines = [
+        "# HELP bpo_run_duration_seconds Duração da última execução",
+        "# TYPE bpo_run_duration_seconds gauge",
+        f"bpo_run_duration_seconds{{{labels}}} {data['duration_seconds'] or 0}",
+        "# TYPE bpo_run_success gauge",
+        f"bpo_run_success{{{labels}}} {int(bool(data['success']))}",
+        "# TYPE bpo_run_last_timestamp_seconds gauge",
+        f"bpo_run_last_timestamp_seconds{{{labels}}} {report.started_at.timestamp():.0f}",
+        "# TYPE bpo_run_peak_rss_megabytes gauge",
+        f"bpo_run_peak_rss_megabytes{{{labels}}} {data['peak_rss_mb'] or 0}",
+        "# TYPE bpo_wait_seconds gauge",
+        f"bpo_wait_seconds{{{labels}}} {data['waits']['seconds']}",
+        "# TYPE bpo_stage_duration_seconds gauge"
+    ]
+    # Etapas repetidas (ex.: janelas em paralelo) são somadas
+    totals = {}
+    for entry in data["stages"]:
+        totals[entry["stage"]] = totals.get(entry["stage"], 0) + entry["seconds"]
+    for stage_name, seconds in sorted(totals.items()):
+        lines.append(f'bpo_stage_duration_seconds{{{labels},stage="{stage_name}"}} {seconds:.3f}')
+    lines.append("# TYPE bpo_run_counter gauge")
+    for counter, value in sorted(data["counters"].items()):
+        lines.append(f'bpo_run_counter{{{labels},counter="{counter}"}} {value}')
+    return lines
+
+
+def write_prometheus_textfile(report, path):
+    """Grava as métricas para o textfile collector do node_exporter (escrita atômica)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(_prometheus_lines(report)) + "\n")
+    os.replace(tmp_path, path)
+
+
+def print_run_summary(report):
+    """Mostra o tempo de cada etapa principal da execução"""
+    top_level = [entry for entry in report.stages if entry["parent"] is None]
+    if not top_level:
+        return
+    print(f"\n⏱️ Etapas da execução {report.run_id} ({report.duration:.1f}s):")
+    for entry in top_level:
+        extras = ", ".join(
+            f"{key}={entry[key]}" for key in ("rows_in", "rows_out", "bytes") if entry.get(key) is not None
+        )
+        status = "✅" if entry["success"] else "❌"
+        print(f"  {status} {entry['stage']}: {entry['seconds']:.2f}s" + (f" ({extras})" if extras else ""))
+
+
+def finish_run(success, report=None):
+    """
+    Finaliza a execução e grava o relatório (Config.RUN_REPORT_FILE) e as métricas
+    (Config.PROMETHEUS_TEXTFILE, se configurado)
+    
+    Args:
+        success: Se a execução terminou com sucesso
+        report: Relatório a finalizar (se None, usa a execução atual)
+    
+    Returns:
+        RunReport: Relatório finalizado
+    """
+    report = report or _CURRENT_RUN
+    report.finish(success)
+    print_run_summary(report)
+    try:
+        if Config.RUN_REPORT_FILE:
+            with open(Config.RUN_REPORT_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report.to_dict(), ensure_ascii=False, default=str) + "\n")
+        if Config.PROMETHEUS_TEXTFILE:
+            write_prometheus_textfile(report, Config.PROMETHEUS_TEXTFILE)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar o relatório da execução: {e}")
+    return report
@@ -0,0 +1,235 @@
+"""
+Execução de vários jobs (contas, janelas, filtros e destinos) em paralelo
+Cada job roda em um processo próprio, com pasta de downloads temporária e arquivos de estado
+separados, então os jobs não disputam CSVs, sessões nem os atributos da Config
+
+Uso: python jobs.py [jobs.json]  (sem arquivo, usa Config.JOBS)
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import tempfile
+import traceback
+import multiprocessing
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import Config
+from models import JobConfig
+
+
+# Arquivos e pastas de estado gravados durante a execução; cada job usa os seus (os caches
+# são gravados sem trava entre processos e a retenção dos diagnósticos apagaria os de outro job)
+_STATE_FILES = [
+    "SESSION_CACHE_FILE",
+    "FINGERPRINT_FILE",
+    "SHEETS_SNAPSHOT_FILE",
+    "SHEETS_UPLOAD_CHECKPOINT_FILE",
+    "HISTORY_DB_FILE",
+    "SELECTOR_CACHE_FILE",
+    "CHROMEDRIVER_CACHE_FILE",
+    "SHEETS_ID_CACHE_FILE",
+    "RUN_REPORT_FILE",
+    "DIAGNOSTICS_DIR"
+]
+# Atributos da Config com os valores de cada filtro de Config.get_dataframe_filters()
+_FILTER_ATTRIBUTES = {
+    "operação": "FILTER_VALUES",
+    "região": "REGION_FILTER_VALUES"
+}
+
+
+def load_jobs(path=None):
+    """
+    Carrega os jobs de um arquivo JSON ou de Config.JOBS
+    
+    Args:
+        path: Arquivo JSON com a lista de jobs (se None, usa Config.JOBS)
+    
+    Returns:
+        list: JobConfig de cada job
+    """
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    else:
+        entries = Config.JOBS
+    jobs = [entry if isinstance(entry, JobConfig) else JobConfig(**entry) for entry in entries]
+    
+    names = [job.name for job in jobs]
+    duplicated = sorted({name for name in names if names.count(name) > 1})
+    if duplicated:
+        raise ValueError(f"Nomes de job repetidos: {duplicated}")
+    return jobs
+
+
+def _safe_name(name):
+    """Nome do job utilizável em caminhos de arquivo"""
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "job"
+
+
+def apply_job_config(job, workdir, workers=1):
+    """
+    Aplica o job à Config do processo atual (chamada dentro do processo do job)
+    
+    Args:
+        job: JobConfig
+        workdir: Diretório temporário do job (downloads)
+        workers: Jobs executados ao mesmo tempo (divide a cota de escrita do Google Sheets)
+    
+    Returns:
+        tuple: (email, password) do job
+    """
+    for attr, value in job.overrides.items():
+        if not hasattr(Config, attr):
+            raise ValueError(f"Job '{job.name}': atributo desconhecido em overrides: {attr}")
+        setattr(Config, attr, value)
+    
+    state_dir = job.state_dir or os.path.join(Config.JOBS_STATE_DIR, _safe_name(job.name))
+    os.makedirs(state_dir, exist_ok=True)
+    for attr in _STATE_FILES:
+        # None = recurso desativado (ex.: RUN_REPORT_FILE, SELECTOR_CACHE_FILE)
+        if getattr(Config, attr):
+            setattr(Config, attr, os.path.join(state_dir, os.path.basename(getattr(Config, attr))))
+    
+    Config.DOWNLOAD_DIR = os.path.join(workdir, "downloads")
+    # Sem perfil persistente, cada navegador usa um perfil temporário próprio
+    if job.chrome_profile_dir:
+        Config.CHROME_USER_DATA_DIR = job.chrome_profile_dir
+    elif Config.CHROME_USER_DATA_DIR:
+        Config.CHROME_USER_DATA_DIR = os.path.join(Config.CHROME_USER_DATA_DIR, _safe_name(job.name))
+    
+    if job.days_before is not None:
+        Config.DAYS_BEFORE = job.days_before
+    if job.days_after is not None:
+        Config.DAYS_AFTER = job.days_after
+    
+    unknown = set(job.filters) - set(_FILTER_ATTRIBUTES)
+    if unknown:
+        raise ValueError(
+            f"Job '{job.name}' usa filtro(s) desconhecido(s): {sorted(unknown)}. "
+            f"Filtros disponíveis: {sorted(_FILTER_ATTRIBUTES)}"
+        )
+    for name, values in job.filters.items():
+        setattr(Config, _FILTER_ATTRIBUTES[name], list(values))
+    
+    if job.spreadsheet:
+        Config.SPREADSHEET_NAME = job.spreadsheet
+        Config.SPREADSHEET_ID = job.spreadsheet_id
+    elif job.spreadsheet_id:
+        Config.SPREADSHEET_ID = job.spreadsheet_id
+    if job.worksheet:
+        Config.WORKSHEET_NAME = job.worksheet
+    
+    # A cota de escrita é da conta de serviço, compartilhada por todos os jobs
+    Config.SHEETS_WRITE_REQUESTS_PER_MINUTE = max(1, Config.SHEETS_WRITE_REQUESTS_PER_MINUTE // workers)
+    if Config.PROMETHEUS_TEXTFILE:
+        root, ext = os.path.splitext(Config.PROMETHEUS_TEXTFILE)
+        Config.PROMETHEUS_TEXTFILE = f"{root}_{_safe_name(job.name)}{ext}"
+    
+    if job.email and job.password:
+        return job.email, job.password
+    if job.credentials_file:
+        Config.CREDENTIALS_FILE = job.credentials_file
+        return Config.get_credentials()
+    raise ValueError(f"Job '{job.name}' sem credenciais (informe email/password ou credentials_file)")
+
+
+def run_job(job, workers=1):
+    """
+    Executa um job no processo atual (função chamada pelo pool de processos)
+    
+    As mensagens do job vão para job.log no diretório de estado dele.
+    
+    Args:
+        job: JobConfig
+        workers: Jobs executados ao mesmo tempo
+    
+    Returns:
+        dict: 'name', 'success', 'seconds', 'error' e 'log'
+    """
+    from scriptMain import run_pipeline
+    from utils import print_wait_summary
+    from instrumentation import start_run, finish_run
+    from alerts import flush_alerts
+    
+    started_at = time.monotonic()
+    workdir = tempfile.mkdtemp(prefix=f"bpo_job_{_safe_name(job.name)}_")
+    state_dir = job.state_dir or os.path.join(Config.JOBS_STATE_DIR, _safe_name(job.name))
+    os.makedirs(state_dir, exist_ok=True)
+    log_path = os.path.join(state_dir, "job.log")
+    success = False
+    error = None
+    
+    with open(log_path, "a", encoding="utf-8") as log, redirect_stdout(log), redirect_stderr(log):
+        print(f"\n{'='*50}\nJob {job.name} - {time.strftime('%d/%m/%Y %H:%M:%S')}\n{'='*50}")
+        start_run(f"job:{job.name}")
+        try:
+            Config.load_email_config()
+            email, password = apply_job_config(job, workdir, workers)
+            success = run_pipeline(email, password)
+        except Exception as e:
+            error = str(e)
+            print(f"❌ Erro no job {job.name}: {e}")
+            traceback.print_exc()
+        finally:
+            print_wait_summary()
+            finish_run(success)
+            flush_alerts()
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    return {
+        "name": job.name,
+        "success": bool(success),
+        "seconds": round(time.monotonic() - started_at, 1),
+        "error": error,
+        "log": log_path
+    }
+
+
+def run_jobs(jobs=None, workers=None):
+    """
+    Executa os jobs em um pool de processos limitado
+    
+    Args:
+        jobs: Lista de JobConfig (se None, usa load_jobs())
+        workers: Jobs ao mesmo tempo (se None, usa Config.JOB_WORKERS)
+    
+    Returns:
+        list: Resultado de cada job (ver run_job), na ordem dos jobs
+    """
+    jobs = load_jobs() if jobs is None else jobs
+    if not jobs:
+        print("⚠️ Nenhum job configurado (Config.JOBS ou arquivo JSON)")
+        return []
+    workers = max(1, min(workers or Config.JOB_WORKERS, len(jobs)))
+    print(f"Executando {len(jobs)} job(s) com {workers} processo(s)...")
+    
+    results = {}
+    # "spawn": cada processo começa com a Config padrão, sem estado herdado do processo principal
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(run_job, job, workers): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"name": job.name, "success": False, "seconds": None, "error": str(e), "log": None}
+            results[job.name] = result
+            status = "✅" if result["success"] else "❌"
+            duration = f" em {result['seconds']:.1f}s" if result["seconds"] is not None else ""
+            detail = f": {result['error']}" if result["error"] else ""
+            print(f"{status} Job {job.name}{duration}{detail} (log: {result['log']})")
+    
+    return [results[job.name] for job in jobs]
+
+
+if __name__ == "__main__":
+    results = run_jobs(load_jobs(sys.argv[1] if len(sys.argv) > 1 else None))
+    failed = [result["name"] for result in results if not result["success"]]
+    if failed:
+        print(f"❌ Jobs com erro: {', '.join(failed)}")
+    sys.exit(1 if failed else 0)
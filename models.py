@@ -1,7 +1,7 @@
 """
 Modelos de dados para o projeto BPO
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
 
@@ -33,3 +33,21 @@ class FilterConfig:
     def __post_init__(self):
         if self.filter_values is None:
             self.filter_values = ["FMH", "OF", "LHM"]
+
+
+@dataclass
+class JobConfig:
+    """Modelo para um job de extração (conta, janela, filtros e destino próprios)"""
+    name: str
+    email: Optional[str] = None
+    password: Optional[str] = None
+    credentials_file: Optional[str] = None  # Alternativa a email/senha (arquivo de save_credentials.py)
+    days_before: Optional[int] = None  # Janela do relatório (None = Config.DAYS_BEFORE)
+    days_after: Optional[int] = None  # None = Config.DAYS_AFTER
+    filters: dict = field(default_factory=dict)  # Valores por filtro, ex.: {"região": ["SPM"]}
+    spreadsheet: Optional[str] = None  # None = Config.SPREADSHEET_NAME
+    spreadsheet_id: Optional[str] = None
+    worksheet: Optional[str] = None  # None = Config.WORKSHEET_NAME
+    state_dir: Optional[str] = None  # Arquivos de estado do job (None = Config.JOBS_STATE_DIR/<name>)
+    chrome_profile_dir: Optional[str] = None  # Perfil persistente do Chrome só deste job
+    overrides: dict = field(default_factory=dict)  # Outros atributos da Config, ex.: {"EXTRACTION_ENGINE": "http"}
@@ -0,0 +1,310 @@
+"""
+Orquestrador assíncrono do script BPO
+Executa as etapas bloqueantes (Selenium, leitura do CSV, gspread) em threads e sobrepõe as
+independentes: o Chrome abre enquanto as credenciais, o cliente do Google Sheets e o motor
+HTTP carregam, o cliente é aquecido durante a exportação e o navegador fecha em paralelo
+com o envio. As etapas são as mesmas de scriptMain.run_pipeline.
+Ao final, mostra a contribuição de cada etapa para o caminho crítico da execução.
+
+Uso: python orchestrator.py (mesmo fluxo de scriptMain.py)
+"""
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils import get_sheets_client, _open_spreadsheet, save_run_fingerprint, load_filtered_csv
+from utils import print_wait_summary
+from scriptMain import (
+    setup_chrome_driver,
+    get_report_window,
+    get_report_dates,
+    extract_with_selenium,
+    extract_with_http,
+    check_unchanged_export,
+    stream_export,
+    record_and_deliver,
+    run_pipeline
+)
+from fanout import union_profile_filters
+from history_store import HistoryRecorder
+from instrumentation import start_run, finish_run, current_run
+from alerts import flush_alerts
+
+
+class StageTimeline:
+    """Início, fim e dependências de cada etapa, para calcular o caminho crítico"""
+    
+    def __init__(self):
+        self._origin = time.monotonic()
+        self.stages = {}
+    
+    def now(self):
+        return time.monotonic() - self._origin
+    
+    def record(self, name, started, finished, after):
+        self.stages[name] = {"start": started, "end": finished, "after": list(after)}
+    
+    def critical_path(self):
+        """
+        Caminho crítico: parte da etapa que terminou por último e volta pela dependência
+        que a liberou (a que terminou por último)
+        
+        Returns:
+            list: Dicionários com 'stage', 'seconds' (duração) e 'contribution' (tempo que a
+                etapa acrescentou ao fim da execução); a soma das contribuições é o tempo total
+        """
+        if not self.stages:
+            return []
+        name = max(self.stages, key=lambda stage_name: self.stages[stage_name]["end"])
+        path = []
+        while name:
+            entry = self.stages[name]
+            gate = max(
+                (dep for dep in entry["after"] if dep in self.stages),
+                key=lambda dep: self.stages[dep]["end"],
+                default=None
+            )
+            ready = self.stages[gate]["end"] if gate else 0.0
+            path.append({
+                "stage": name,
+                "seconds": round(entry["end"] - entry["start"], 3),
+                "contribution": round(entry["end"] - ready, 3)
+            })
+            name = gate
+        return list(reversed(path))
+    
+    def print_summary(self):
+        path = self.critical_path()
+        if not path:
+            return
+        total = sum(entry["contribution"] for entry in path)
+        busy = sum(entry["end"] - entry["start"] for entry in self.stages.values())
+        print(f"\n🧭 Caminho crítico ({total:.1f}s de execução, {busy:.1f}s somando todas as etapas):")
+        for entry in path:
+            print(f"  {entry['stage']}: +{entry['contribution']:.2f}s (duração {entry['seconds']:.2f}s)")
+        overlapped = [name for name in self.stages if name not in {entry["stage"] for entry in path}]
+        if overlapped:
+            print(f"  Sobrepostas ao caminho crítico: {', '.join(overlapped)}")
+
+
+def load_credentials():
+    """Carrega a configuração de email e as credenciais do site"""
+    Config.load_email_config()
+    email, password = Config.get_credentials()
+    print(f"✅ Credenciais carregadas para: {email}")
+    return email, password
+
+
+def warm_sheets_client():
+    """
+    Autentica no Google Sheets e abre as planilhas de destino antes do envio
+    
+    Falhas apenas geram um aviso; o envio tenta de novo (e trata o erro) normalmente.
+    
+    Returns:
+        bool: True se o cliente e as planilhas ficaram em cache
+    """
+    names = {Config.SPREADSHEET_NAME}
+    names.update(profile.get("spreadsheet") or Config.SPREADSHEET_NAME for profile in Config.FANOUT_PROFILES)
+    try:
+        client = get_sheets_client()
+        for name in names:
+            _open_spreadsheet(client, name)
+        print("✅ Cliente do Google Sheets pronto")
+        return True
+    except Exception as e:
+        print(f"⚠️ Não foi possível preparar o Google Sheets antecipadamente: {e}")
+        return False
+
+
+def quit_driver(driver):
+    """Finaliza o navegador (erros apenas geram um aviso)"""
+    try:
+        driver.quit()
+        print("✅ Driver finalizado")
+    except Exception as e:
+        print(f"⚠️ Erro ao finalizar navegador: {e}")
+
+
+class PipelineOrchestrator:
+    """Executa o fluxo como um grafo de etapas em threads, sobrepondo as independentes"""
+    
+    def __init__(self, max_workers=4):
+        """
+        Args:
+            max_workers: Threads disponíveis para as etapas bloqueantes
+        """
+        self.timeline = StageTimeline()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="etapa")
+        self._names = {}
+    
+    def start(self, name, func, after=()):
+        """
+        Agenda uma etapa bloqueante
+        
+        Args:
+            name: Nome da etapa (usado no caminho crítico)
+            func: Função sem argumentos executada em uma thread
+            after: Etapas (tasks) que precisam terminar antes; erros delas são propagados
+        
+        Returns:
+            asyncio.Task: Resultado da função
+        """
+        after = list(after)
+        
+        async def run():
+            for dep in after:
+                await dep
+            loop = asyncio.get_running_loop()
+            started = self.timeline.now()
+            try:
+                return await loop.run_in_executor(self.executor, func)
+            finally:
+                self.timeline.record(name, started, self.timeline.now(), [self._names[dep] for dep in after])
+        
+        task = asyncio.ensure_future(run())
+        self._names[task] = name
+        return task
+    
+    async def run(self, email=None, password=None):
+        """
+        Executa o fluxo completo
+        
+        Args:
+            email: Email de login (se None, carrega as credenciais salvas em paralelo com o navegador)
+            password: Senha
+        
+        Returns:
+            bool: True se os dados foram enviados para o Google Sheets
+        """
+        credentials = (
+            self.start("credentials", load_credentials) if email is None
+            else self.start("credentials", lambda: (email, password))
+        )
+        warmup = self.start("sheets_warmup", warm_sheets_client)
+        
+        start, end = get_report_window()
+        streaming = Config.PIPELINE_MODE == "streaming" and not Config.FANOUT_PROFILES
+        # Backfill em janelas paralelas e streaming via HTTP já sobrepõem as etapas internamente
+        if (end - start).days + 1 > Config.EXTRACTION_CHUNK_DAYS or (streaming and Config.EXTRACTION_ENGINE == "http"):
+            pipeline = self.start("pipeline", lambda: run_pipeline(*credentials.result()), after=[credentials, warmup])
+            return await pipeline
+        
+        data_inicial, data_final = get_report_dates()
+        filters = union_profile_filters() if Config.FANOUT_PROFILES else None
+        history = HistoryRecorder(start, end)
+        browser = None
+        try:
+            extract = None
+            if Config.EXTRACTION_ENGINE == "http":
+                extract = self.start(
+                    "http_extract",
+                    lambda: extract_with_http(*credentials.result(), data_inicial, data_final, filters),
+                    after=[credentials]
+                )
+            
+            # Abre o Chrome (e resolve o driver) enquanto as credenciais e o Sheets carregam; com o
+            # motor HTTP, também em paralelo com a extração, para o fallback não esperar o navegador
+            browser = self.start("browser_setup", setup_chrome_driver)
+            
+            if extract is not None:
+                df = await extract
+                if df is not None:
+                    # O navegador não foi necessário: fecha assim que terminar de abrir
+                    opened, browser = browser, None
+                    self.start("driver_quit", lambda: quit_driver(opened.result()[0]), after=[opened])
+                    download_dir = os.path.join(os.getcwd(), Config.DOWNLOAD_DIR)
+                    return await self._deliver(df, history, download_dir, after=[extract, warmup])
+            
+            export = self.start(
+                "export",
+                lambda: extract_with_selenium(
+                    browser.result()[0], browser.result()[1], *credentials.result(), data_inicial, data_final
+                ),
+                after=[credentials, browser]
+            )
+            csv_file = await export
+            download_dir = browser.result()[1]
+            
+            # O navegador não é mais necessário: fecha em paralelo com a leitura e o envio
+            driver = browser.result()[0]
+            browser = None
+            self.start("driver_quit", lambda: quit_driver(driver), after=[export])
+            
+            if csv_file is None:
+                print("Timeout: Download não foi concluído no tempo esperado")
+                return False
+            
+            export_digest = check_unchanged_export(csv_file, filters, download_dir)
+            if export_digest is None:
+                return True
+            
+            if streaming:
+                upload = self.start(
+                    "upload", lambda: stream_export(csv_file, download_dir, history), after=[export, warmup]
+                )
+                uploaded = await upload
+            else:
+                parse = self.start("parse_filter", lambda: load_filtered_csv(csv_file, filters), after=[export])
+                uploaded = await self._deliver(await parse, history, download_dir, after=[parse, warmup])
+            
+            if uploaded:
+                save_run_fingerprint("export", export_digest)
+            return uploaded
+        finally:
+            # Aguarda etapas ainda em andamento (ex.: fechamento do navegador) antes de encerrar;
+            # também recolhe erros de etapas que ninguém aguardou
+            await asyncio.gather(*self._names, return_exceptions=True)
+            # Navegador aberto, mas a exportação falhou antes de fechá-lo
+            if browser is not None and not browser.cancelled() and browser.exception() is None:
+                quit_driver(browser.result()[0])
+            history.close()
+    
+    async def _deliver(self, df, history, download_dir, after):
+        """Grava o histórico e envia o relatório assim que o Sheets estiver pronto"""
+        return await self.start("upload", lambda: record_and_deliver(df, download_dir, history), after=after)
+
+
+def run_pipeline_async(email=None, password=None, max_workers=4):
+    """
+    Executa o fluxo pelo orquestrador assíncrono e mostra o caminho crítico
+    
+    Args:
+        email: Email de login (se None, usa as credenciais salvas)
+        password: Senha
+        max_workers: Threads disponíveis para as etapas bloqueantes
+    
+    Returns:
+        bool: True se os dados foram enviados para o Google Sheets
+    """
+    orchestrator = PipelineOrchestrator(max_workers)
+    try:
+        return asyncio.run(orchestrator.run(email, password))
+    finally:
+        orchestrator.executor.shutdown(wait=True)
+        orchestrator.timeline.print_summary()
+        current_run().critical_path = orchestrator.timeline.critical_path()
+
+
+def main():
+    """Função principal usando o orquestrador assíncrono"""
+    start_run("main")
+    success = False
+    try:
+        success = run_pipeline_async()
+    except FileNotFoundError as e:
+        print(f"❌ Erro: {e}")
+        print("\n💡 Dica: Execute 'python save_credentials.py' para salvar suas credenciais")
+    except Exception as e:
+        import traceback
+        print(f"❌ Erro inesperado: {e}")
+        traceback.print_exc()
+    finally:
+        print_wait_summary()
+        finish_run(success)
+        flush_alerts()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,13 @@ Script principal para automação BPO
 Baixa dados do site, filtra e envia para Google Sheets
 """
 import os
-import time
-import pandas as pd
+import re
+import json
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 from datetime import timedelta
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 
 # Imports locais
 from config import Config
@@ -18,31 +17,154 @@ from utils import (
     wait_for_clickable,
     wait_for_clickable_js,
     wait_for_clickable_multiple,
+    wait_for_send_keys_multiple,
     wait_for_send_keys,
     wait_for_send_keys_js,
-    wait_for_download_complete,
-    get_latest_csv_file,
-    filter_dataframe_by_operation,
-    filter_dataframe_by_region,
+    wait_for_page_ready,
+    wait_for_network_idle,
+    wait_for_element_enabled,
+    print_wait_summary,
+    save_browser_session,
+    restore_browser_session,
+    is_session_valid,
+    is_logged_in_page,
+    load_filtered_csv,
+    file_fingerprint,
+    get_run_fingerprint,
+    save_run_fingerprint,
+    forget_run_fingerprint,
     upload_to_google_sheets,
     clean_downloads_folder,
     send_error_email
 )
+from download_watcher import DownloadWatcher
+from streaming_pipeline import stream_csv_to_sheets
+from fanout import union_profile_filters, upload_profiles
+from history_store import HistoryRecorder
+from instrumentation import instrumented, annotate, increment, start_run, finish_run
+from alerts import flush_alerts
 
 
-def setup_chrome_driver():
+def get_chrome_major_version():
+    """
+    Detecta a versão principal do Chrome instalado (ex.: 120)
+    
+    Returns:
+        int: Versão principal ou None se não for possível detectar
+    """
+    if Config.CHROME_BINARY:
+        candidates = [Config.CHROME_BINARY]
+    else:
+        candidates = [
+            "google-chrome", "google-chrome-stable", "chromium", "chromium-browser",
+            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+        ]
+    
+    for binary in candidates:
+        try:
+            result = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"(\d+)\.\d+\.\d+", result.stdout)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _load_chromedriver_cache():
+    """Carrega o cache {versão principal do Chrome: caminho do ChromeDriver}"""
+    if not os.path.exists(Config.CHROMEDRIVER_CACHE_FILE):
+        return {}
+    try:
+        with open(Config.CHROMEDRIVER_CACHE_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_chromedriver_cache(cache):
+    """Salva o cache de resolução do ChromeDriver"""
+    try:
+        with open(Config.CHROMEDRIVER_CACHE_FILE, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"⚠️ Não foi possível salvar o cache do ChromeDriver: {e}")
+
+
+def resolve_chromedriver_path(refresh=False):
+    """
+    Retorna o caminho do ChromeDriver, consultando o webdriver-manager só quando necessário
+    
+    Ordem: Config.CHROMEDRIVER_PATH, cache por versão principal do Chrome e, por último,
+    ChromeDriverManager().install() (que pode acessar a rede). No modo offline
+    (Config.CHROMEDRIVER_OFFLINE) a rede nunca é usada.
+    
+    Args:
+        refresh: Ignora o cache e resolve novamente (ex.: driver incompatível)
+    
+    Returns:
+        str: Caminho do executável do ChromeDriver
+    """
+    from webdriver_manager.chrome import ChromeDriverManager
+    
+    if Config.CHROMEDRIVER_PATH:
+        if not os.path.exists(Config.CHROMEDRIVER_PATH):
+            raise FileNotFoundError(f"ChromeDriver não encontrado: {Config.CHROMEDRIVER_PATH}")
+        return Config.CHROMEDRIVER_PATH
+    
+    major = get_chrome_major_version()
+    cache_key = str(major) if major is not None else "unknown"
+    cache = _load_chromedriver_cache()
+    
+    cached_path = cache.get(cache_key)
+    if not refresh and cached_path and os.path.exists(cached_path):
+        print(f"✅ ChromeDriver em cache para o Chrome {cache_key}: {cached_path}")
+        return cached_path
+    
+    if Config.CHROMEDRIVER_OFFLINE:
+        # Sem rede: usa qualquer driver em cache que ainda exista
+        fallback = [path for path in cache.values() if os.path.exists(path)]
+        if fallback and not refresh:
+            print(f"⚠️ Modo offline: sem driver em cache para o Chrome {cache_key}, usando {fallback[-1]}")
+            return fallback[-1]
+        raise FileNotFoundError(
+            f"Modo offline e nenhum ChromeDriver em cache para o Chrome {cache_key}.\n"
+            "Configure Config.CHROMEDRIVER_PATH (ou a variável CHROMEDRIVER_PATH)."
+        )
+    
+    print(f"Resolvendo ChromeDriver para o Chrome {cache_key}...")
+    driver_path = ChromeDriverManager().install()
+    cache[cache_key] = driver_path
+    _save_chromedriver_cache(cache)
+    return driver_path
+
+
+@instrumented("browser_setup")
+def setup_chrome_driver(download_dir=None):
     """
     Configura e retorna uma instância do Chrome WebDriver
     
+    Args:
+        download_dir: Diretório de downloads (se None, usa Config.DOWNLOAD_DIR)
+    
     Returns:
         webdriver.Chrome: Instância configurada do Chrome
     """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from selenium.webdriver.chrome.options import Options
+    from selenium.common.exceptions import SessionNotCreatedException
+    
     # Configura o diretório de download
-    download_dir = os.path.join(os.getcwd(), Config.DOWNLOAD_DIR)
+    if download_dir is None:
+        download_dir = os.path.join(os.getcwd(), Config.DOWNLOAD_DIR)
     os.makedirs(download_dir, exist_ok=True)
     
     # Configura as opções do Chrome para melhor compatibilidade headless
     chrome_options = Options()
+    if Config.CHROME_USER_DATA_DIR:
+        # Perfil persistente: mantém cookies e localStorage entre execuções
+        chrome_options.add_argument(f"--user-data-dir={os.path.abspath(Config.CHROME_USER_DATA_DIR)}")
     chrome_options.add_argument("--headless=new")  # Novo modo headless
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--disable-dev-shm-usage")
@@ -55,6 +177,9 @@ def setup_chrome_driver():
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
+    # Logs de performance (DevTools) usados para detectar quando a rede fica ociosa;
+    # logs do console entram no diagnóstico de falhas
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL", "browser": "ALL"})
     
     # Configura preferências de download
     prefs = {
@@ -66,285 +191,753 @@ def setup_chrome_driver():
     chrome_options.add_experimental_option("prefs", prefs)
     
     # Cria e retorna o driver
-    driver = webdriver.Chrome(
-        service=ChromeService(ChromeDriverManager().install()),
-        options=chrome_options
-    )
+    driver_path = resolve_chromedriver_path()
+    try:
+        driver = webdriver.Chrome(
+            service=ChromeService(driver_path),
+            options=chrome_options
+        )
+    except SessionNotCreatedException as e:
+        if Config.CHROMEDRIVER_PATH:
+            raise
+        # Driver em cache incompatível com o Chrome atual: resolve de novo uma única vez
+        print(f"⚠️ ChromeDriver em cache incompatível, resolvendo novamente: {str(e)[:100]}")
+        increment("chromedriver_refreshes")
+        driver = webdriver.Chrome(
+            service=ChromeService(resolve_chromedriver_path(refresh=True)),
+            options=chrome_options
+        )
     
     return driver, download_dir
 
 
-def main():
-    """Função principal do script"""
+def get_report_window():
+    """
+    Calcula o intervalo do relatório a partir da data atual
+    
+    Returns:
+        tuple: (inicio, fim) como datetime.date
+    """
+    today = datetime.date.today()
+    return today - timedelta(days=Config.DAYS_BEFORE), today + timedelta(days=Config.DAYS_AFTER)
+
+
+def get_report_dates():
+    """
+    Calcula o intervalo de datas do relatório a partir da data atual
+    
+    Returns:
+        tuple: (data_inicial, data_final) no formato dd/mm/aaaa
+    """
+    start, end = get_report_window()
+    return start.strftime("%d/%m/%Y"), end.strftime("%d/%m/%Y")
+
+
+def split_date_range(start, end, chunk_days):
+    """
+    Divide um intervalo de datas em janelas consecutivas, sem sobreposição
+    
+    Args:
+        start: Data inicial (datetime.date)
+        end: Data final (datetime.date), inclusiva
+        chunk_days: Quantidade máxima de dias por janela
+    
+    Returns:
+        list: Tuplas (inicio, fim) cobrindo o intervalo inteiro
+    """
+    windows = []
+    current = start
+    while current <= end:
+        window_end = min(current + timedelta(days=chunk_days - 1), end)
+        windows.append((current, window_end))
+        current = window_end + timedelta(days=1)
+    return windows
+
+
+def login(driver, email, password):
+    """
+    Acessa o site e faz login, aguardando a página principal e o menu carregarem
+    
+    Args:
+        driver: Instância do WebDriver
+        email: Email de login
+        password: Senha
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    
+    # Acessa o site
+    driver.get(Config.SITE_URL)
+    print("✅ Site acessado")
+    
+    # Faz login usando JavaScript (mais confiável)
+    print("Fazendo login via JavaScript...")
     try:
-        # Carrega configurações de email
-        Config.load_email_config()
-        
-        # Carrega credenciais
-        email, password = Config.get_credentials()
-        print(f"✅ Credenciais carregadas para: {email}")
-        
-        # Configura o Chrome
-        driver, download_dir = setup_chrome_driver()
-        print("✅ Chrome WebDriver configurado")
-        
-        # Acessa o site
-        driver.get("https://dwmanagement.spx.com.br/")
-        print("✅ Site acessado")
-        
-        # Faz login usando JavaScript (mais confiável)
-        print("Fazendo login via JavaScript...")
-        try:
-            wait_for_send_keys_js(driver, "data.email", email, timeout=20, by_type='id')
-            wait_for_send_keys_js(driver, "data.password", password, timeout=20, by_type='id')
-            wait_for_clickable_js(driver, "//*[@id='form']/div[2]/div/button", timeout=20, by_type='xpath')
-            print("✅ Login realizado via JavaScript")
-        except Exception as e:
-            print(f"⚠️ Login via JS falhou, tentando método tradicional: {e}")
-            # Fallback para método tradicional
-            wait_for_send_keys(driver, "//*[@id='data.email']", email, timeout=20)
-            wait_for_send_keys(driver, "//*[@id='data.password']", password, timeout=20)
-            wait_for_clickable(driver, "//*[@id='form']/div[2]/div/button", timeout=20)
-            print("✅ Login realizado via método tradicional")
-        
-        # Aguarda a página carregar após o login
-        print("Aguardando página carregar após login...")
-        time.sleep(5)  # Espera inicial maior
-        
-        # Aguarda a URL mudar ou algum elemento da página principal aparecer
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.common.by import By
-        
+        wait_for_send_keys_js(driver, "data.email", email, timeout=20, by_type='id')
+        wait_for_send_keys_js(driver, "data.password", password, timeout=20, by_type='id')
+        wait_for_clickable_js(driver, "//*[@id='form']/div[2]/div/button", timeout=20, by_type='xpath')
+        print("✅ Login realizado via JavaScript")
+    except Exception as e:
+        print(f"⚠️ Login via JS falhou, tentando método tradicional: {e}")
+        # Fallback para método tradicional
+        wait_for_send_keys(driver, "//*[@id='data.email']", email, timeout=20)
+        wait_for_send_keys(driver, "//*[@id='data.password']", password, timeout=20)
+        wait_for_clickable(driver, "//*[@id='form']/div[2]/div/button", timeout=20)
+        print("✅ Login realizado via método tradicional")
+    
+    # Aguarda a página carregar após o login
+    print("Aguardando página carregar após login...")
+    
+    try:
+        # Aguarda até que não esteja mais na página de login
+        WebDriverWait(driver, 30).until(
+            lambda d: "login" not in d.current_url.lower() or d.find_elements(By.XPATH, "//aside//nav")
+        )
+        print("✅ Página principal carregada")
+    except Exception as e:
+        error_msg = f"⚠️ Aviso ao aguardar página principal: {e}"
+        print(error_msg)
+        # Envia screenshot por email
         try:
-            # Aguarda até que não esteja mais na página de login
-            WebDriverWait(driver, 30).until(
-                lambda d: "login" not in d.current_url.lower() or d.find_elements(By.XPATH, "//aside//nav")
-            )
-            print("✅ Página principal carregada")
-        except Exception as e:
-            error_msg = f"⚠️ Aviso ao aguardar página principal: {e}"
-            print(error_msg)
-            # Envia screenshot por email
-            try:
-                send_error_email(driver, str(e))
-            except Exception as email_error:
-                print(f"⚠️ Erro ao enviar email: {email_error}")
-        
-        # Aguarda o menu aparecer
+            send_error_email(driver, str(e))
+        except Exception as email_error:
+            print(f"⚠️ Erro ao enviar email: {email_error}")
+    
+    # Aguarda o menu aparecer
+    try:
+        WebDriverWait(driver, 30).until(
+            EC.presence_of_element_located((By.XPATH, "//aside//nav"))
+        )
+        print("✅ Menu carregado")
+        # Aguarda as requisições do menu terminarem em vez de uma pausa fixa
+        wait_for_network_idle(driver, timeout=10)
+    except Exception as e:
+        error_msg = f"⚠️ Aviso: Menu pode não ter carregado completamente: {e}"
+        print(error_msg)
+        # Envia screenshot por email
         try:
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, "//aside//nav"))
-            )
-            print("✅ Menu carregado")
-            time.sleep(3)  # Espera adicional para menu renderizar
-        except Exception as e:
-            error_msg = f"⚠️ Aviso: Menu pode não ter carregado completamente: {e}"
-            print(error_msg)
-            # Envia screenshot por email
-            try:
-                send_error_email(driver, str(e))
-            except Exception as email_error:
-                print(f"⚠️ Erro ao enviar email: {email_error}")
-            # Tenta aguardar mais
-            time.sleep(5)
-        
-        # Tenta acessar diretamente a URL de relatórios se o menu não funcionar
-        print("Tentando navegar para relatórios...")
-        
-        # Primeiro tenta pelo menu (com múltiplos tipos de seletores)
-        selectors_relatorios = [
-            ("/html/body/div[1]/aside/nav/ul/li[1]/ul/li[2]/a", "xpath"),
-            ("//aside//nav//ul//li[1]//ul//li[2]//a", "xpath"),
-            ("//a[contains(@href, 'daily') or contains(text(), 'Daily')]", "xpath"),
-            ("//nav//a[contains(text(), 'Daily')]", "xpath"),
-            ("//a[contains(@href, 'daily-worker')]", "xpath"),
-            ("a[href*='daily-worker']", "css"),
-            ("nav a:contains('Daily')", "css")
-        ]
-        
-        navegacao_sucesso = False
+            send_error_email(driver, str(e))
+        except Exception as email_error:
+            print(f"⚠️ Erro ao enviar email: {email_error}")
+        # Tenta aguardar a página terminar de carregar
+        wait_for_page_ready(driver, timeout=10)
+        wait_for_network_idle(driver, timeout=10)
+
+
+@instrumented("login")
+def ensure_logged_in(driver, email, password):
+    """
+    Reaproveita a sessão salva (cookies ou perfil persistente) e só faz login se o site pedir
+    
+    Args:
+        driver: Instância do WebDriver
+        email: Email de login
+        password: Senha
+    """
+    # Driver reaproveitado (ex.: modo daemon) que já está logado no site
+    if is_logged_in_page(driver):
+        print("✅ Navegador já está logado")
+        return
+    
+    session_enabled = Config.SESSION_PERSIST_ENABLED or Config.CHROME_USER_DATA_DIR
+    if session_enabled:
+        if Config.SESSION_PERSIST_ENABLED:
+            restore_browser_session(driver)
+        if is_session_valid(driver):
+            print("✅ Sessão anterior reaproveitada, login dispensado")
+            return
+        print("Sessão expirada ou inexistente, fazendo login...")
+    
+    login(driver, email, password)
+    
+    if Config.SESSION_PERSIST_ENABLED:
+        save_browser_session(driver)
+
+
+@instrumented("navigate")
+def navigate_to_reports(driver):
+    """
+    Navega até a página de relatórios (pelo menu ou, se falhar, pela URL direta)
+    
+    Args:
+        driver: Instância do WebDriver
+    
+    Returns:
+        bool: True se a navegação foi concluída
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    
+    # Tenta acessar diretamente a URL de relatórios se o menu não funcionar
+    print("Tentando navegar para relatórios...")
+    
+    # Primeiro tenta pelo menu (com múltiplos tipos de seletores)
+    selectors_relatorios = [
+        ("/html/body/div[1]/aside/nav/ul/li[1]/ul/li[2]/a", "xpath"),
+        ("//aside//nav//ul//li[1]//ul//li[2]//a", "xpath"),
+        ("//a[contains(@href, 'daily') or contains(text(), 'Daily')]", "xpath"),
+        ("//nav//a[contains(text(), 'Daily')]", "xpath"),
+        ("//a[contains(@href, 'daily-worker')]", "xpath"),
+        ("a[href*='daily-worker']", "css"),
+        ("nav a:contains('Daily')", "css")
+    ]
+    
+    navegacao_sucesso = False
+    try:
+        wait_for_clickable_multiple(driver, selectors_relatorios, timeout=20, cache_key="reports.menu")
+        print("✅ Navegação para relatórios via menu")
+        navegacao_sucesso = True
+    except Exception as e:
+        print(f"⚠️ Erro ao navegar pelo menu: {e}")
+        # Tenta acessar diretamente a URL
         try:
-            wait_for_clickable_multiple(driver, selectors_relatorios, timeout=20)
-            print("✅ Navegação para relatórios via menu")
-            navegacao_sucesso = True
-        except Exception as e:
-            print(f"⚠️ Erro ao navegar pelo menu: {e}")
-            # Tenta acessar diretamente a URL
+            print("Tentando acessar URL diretamente...")
+            driver.get(Config.REPORTS_URL)
+            
+            print("Aguardando página de relatórios carregar...")
+            # Aguarda o documento e as requisições do JavaScript terminarem
+            wait_for_page_ready(driver, timeout=30)
+            wait_for_network_idle(driver, timeout=10)
+            
+            # Tenta encontrar qualquer campo de formulário para confirmar que carregou
             try:
-                print("Tentando acessar URL diretamente...")
-                driver.get("https://dwmanagement.spx.com.br/daily-worker-requests")
-                
-                # Aguarda a página carregar completamente
-                from selenium.webdriver.support.ui import WebDriverWait
-                from selenium.webdriver.support import expected_conditions as EC
-                from selenium.webdriver.common.by import By
-                
-                print("Aguardando página de relatórios carregar...")
-                # Aguarda até que algum elemento da página apareça
-                WebDriverWait(driver, 30).until(
-                    lambda d: d.execute_script("return document.readyState") == "complete"
-                )
-                time.sleep(3)  # Espera adicional para JavaScript carregar
-                
-                # Tenta encontrar qualquer campo de formulário para confirmar que carregou
-                try:
-                    WebDriverWait(driver, 20).until(
-                        EC.any_of(
-                            EC.presence_of_element_located((By.ID, "data.fromDate")),
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "#data\\.fromDate")),
-                            EC.presence_of_element_located((By.NAME, "data.fromDate"))
-                        )
+                WebDriverWait(driver, 20).until(
+                    EC.any_of(
+                        EC.presence_of_element_located((By.ID, "data.fromDate")),
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "#data\\.fromDate")),
+                        EC.presence_of_element_located((By.NAME, "data.fromDate"))
                     )
-                    print("✅ Página de relatórios carregada")
-                except:
-                    print("⚠️ Campos podem não ter carregado completamente")
-                
-                navegacao_sucesso = True
-            except Exception as e2:
-                print(f"⚠️ Erro ao acessar URL diretamente: {e2}")
-        
-        if not navegacao_sucesso:
-            print("⚠️ Continuando mesmo com erro de navegação...")
-            time.sleep(5)
-        
-        # Configura as datas
-        data_inicial = (datetime.datetime.now() - timedelta(days=Config.DAYS_BEFORE)).strftime("%d/%m/%Y")
-        data_final = (datetime.datetime.now() + timedelta(days=Config.DAYS_AFTER)).strftime("%d/%m/%Y")
+                )
+                print("✅ Página de relatórios carregada")
+            except:
+                print("⚠️ Campos podem não ter carregado completamente")
+            
+            navegacao_sucesso = True
+        except Exception as e2:
+            print(f"⚠️ Erro ao acessar URL diretamente: {e2}")
+    
+    if not navegacao_sucesso:
+        print("⚠️ Continuando mesmo com erro de navegação...")
+        wait_for_page_ready(driver, timeout=10)
+    
+    return navegacao_sucesso
+
+
+def _fill_date_field(driver, selectors, value, label, cache_key):
+    """
+    Preenche um campo de data com o primeiro seletor encontrado (todos testados de uma vez)
+    
+    Args:
+        driver: Instância do WebDriver
+        selectors: Lista de tuplas (selector, by_type)
+        value: Data no formato dd/mm/aaaa
+        label: Nome do campo para as mensagens ("inicial" ou "final")
+        cache_key: Identificador do campo no cache de seletores
+    """
+    try:
+        selector, by_type = wait_for_send_keys_multiple(driver, selectors, value, timeout=15, cache_key=cache_key)
+    except Exception as e:
+        raise Exception(f"Não foi possível preencher campo de data {label}: {e}")
+    print(f"✅ Data {label} preenchida usando {by_type}: {selector}")
+
+
+@instrumented("fill_dates")
+def fill_report_dates(driver, data_inicial, data_final):
+    """
+    Preenche os campos de data inicial e final do relatório
+    
+    Args:
+        driver: Instância do WebDriver
+        data_inicial: Data inicial (dd/mm/aaaa)
+        data_final: Data final (dd/mm/aaaa)
+    """
+    print(f"Data Inicial: {data_inicial}")
+    print(f"Data Final: {data_final}")
+    
+    # Preenche as datas (seletores testados de uma vez, o que funcionou fica em cache)
+    print("Preenchendo campo de data inicial...")
+    selectors_from_date = [
+        ("data.fromDate", "id"),
+        ("#data\\.fromDate", "css"),
+        ("//*[@id='data.fromDate']", "xpath"),
+        ("data.fromDate", "name")
+    ]
+    _fill_date_field(driver, selectors_from_date, data_inicial, "inicial", "reports.from_date")
+    
+    # Aguarda o formulário processar a primeira data antes de preencher a segunda
+    wait_for_network_idle(driver, idle_time=0.3, timeout=5)
+    
+    print("Preenchendo campo de data final...")
+    selectors_to_date = [
+        ("data.toDate", "id"),
+        ("#data\\.toDate", "css"),
+        ("//*[@id='data.toDate']", "xpath"),
+        ("data.toDate", "name")
+    ]
+    _fill_date_field(driver, selectors_to_date, data_final, "final", "reports.to_date")
+
+
+@instrumented("export_download")
+def export_report_csv(driver, download_dir):
+    """
+    Gera o relatório, dispara o download do CSV e aguarda sua conclusão
+    
+    Args:
+        driver: Instância do WebDriver
+        download_dir: Diretório de downloads
+    
+    Returns:
+        str: Caminho do CSV baixado ou None se o download não terminou no tempo esperado
+    """
+    notifications_button = "/html/body/div[1]/div[1]/div/nav/div/div[1]/div[1]/button"
+    download_link = "/html/body/div[1]/div[1]/div/nav/div/div[1]/div[2]/div/div[2]/div/div/div[2]/div/div[1]/div/div/div/div[2]/a[1]/span"
+    
+    # Gera o relatório
+    wait_for_clickable(driver, "/html/body/div[1]/div[1]/main/div/section/header/div[2]/div/button")
+    wait_for_clickable(driver, "/html/body/div[1]/div[1]/main/div/form[1]/div/div/div[2]/div/div/div[2]/div/button[1]/span[1]")
+    
+    # Aguarda a geração do relatório terminar (rede ociosa e botão de notificações habilitado)
+    wait_for_network_idle(driver, timeout=30)
+    wait_for_element_enabled(driver, notifications_button, timeout=30)
+    
+    # Faz download do CSV (o link aparece na notificação quando a exportação fica pronta)
+    wait_for_clickable(driver, notifications_button)
+    
+    # Observa a pasta antes do clique para identificar o arquivo criado por esta execução
+    with DownloadWatcher(download_dir) as watcher:
+        wait_for_clickable(driver, download_link, timeout=60)
+        print("✅ Download iniciado")
         
-        print(f"Data Inicial: {data_inicial}")
-        print(f"Data Final: {data_final}")
+        # Aguarda o download completar
+        print("Aguardando download do CSV...")
+        csv_file = watcher.wait(timeout=60)
+    
+    if csv_file is None:
+        return None
+    print("Download concluído!")
+    print(f"Arquivo encontrado: {csv_file}")
+    annotate(bytes=os.path.getsize(csv_file))
+    return csv_file
+
+
+def extract_with_selenium(driver, download_dir, email, password, data_inicial, data_final):
+    """
+    Extrai o relatório pelo navegador: login, navegação, datas e download do CSV
+    
+    Args:
+        driver: Instância do WebDriver
+        download_dir: Diretório de downloads
+        email: Email de login
+        password: Senha
+        data_inicial: Data inicial (dd/mm/aaaa)
+        data_final: Data final (dd/mm/aaaa)
+    
+    Returns:
+        str: Caminho do CSV baixado ou None se o download não terminou no tempo esperado
+    """
+    ensure_logged_in(driver, email, password)
+    navigate_to_reports(driver)
+    
+    # Se o site redirecionou para o login (sessão expirou no meio do fluxo), autentica de novo
+    if "login" in driver.current_url.lower():
+        print("⚠️ Sessão expirada durante a navegação, refazendo login...")
+        login(driver, email, password)
+        if Config.SESSION_PERSIST_ENABLED:
+            save_browser_session(driver)
+        navigate_to_reports(driver)
+    
+    fill_report_dates(driver, data_inicial, data_final)
+    return export_report_csv(driver, download_dir)
+
+
+@instrumented("http_extract")
+def extract_with_http(email, password, data_inicial, data_final, filters=None):
+    """
+    Extrai o relatório pelo motor HTTP, sem abrir o navegador
+    
+    Args:
+        email: Email de login
+        password: Senha
+        data_inicial: Data inicial (dd/mm/aaaa)
+        data_final: Data final (dd/mm/aaaa)
+        filters: Filtros aplicados na leitura (se None, usa Config.get_dataframe_filters())
+    
+    Returns:
+        pd.DataFrame: Dados do relatório já filtrados ou None se o fluxo HTTP falhar
+    """
+    from http_engine import HttpEngineError, extract_csv_via_http
+    
+    try:
+        print("Extraindo relatório via HTTP...")
+        buffer = extract_csv_via_http(email, password, data_inicial, data_final)
+        print("✅ CSV recebido via HTTP")
+        return load_filtered_csv(buffer, filters)
+    except HttpEngineError as e:
+        print(f"⚠️ Motor HTTP falhou, usando o navegador: {e}")
+    except Exception as e:
+        print(f"⚠️ Erro inesperado no motor HTTP, usando o navegador: {e}")
+    increment("http_fallbacks")
+    return None
+
+
+@instrumented("parallel_extract")
+def extract_range_parallel(email, password, start, end, download_dir, chunk_days=None, workers=None, filters=None):
+    """
+    Extrai um intervalo grande dividindo-o em janelas buscadas em paralelo
+    
+    Cada thread mantém sua própria sessão (HTTP ou navegador, com pasta de downloads
+    própria) e a reaproveita entre as janelas que processa.
+    
+    Args:
+        email: Email de login
+        password: Senha
+        start: Data inicial (datetime.date)
+        end: Data final (datetime.date)
+        download_dir: Diretório base de downloads (cada thread usa uma subpasta)
+        chunk_days: Dias por janela (se None, usa Config.EXTRACTION_CHUNK_DAYS)
+        workers: Sessões em paralelo (se None, usa Config.EXTRACTION_WORKERS)
+        filters: Filtros aplicados na leitura (se None, usa Config.get_dataframe_filters())
+    
+    Returns:
+        pd.DataFrame: Dados filtrados de todas as janelas, sem linhas duplicadas
+    """
+    import pandas as pd
+    
+    chunk_days = chunk_days or Config.EXTRACTION_CHUNK_DAYS
+    workers = workers or Config.EXTRACTION_WORKERS
+    windows = split_date_range(start, end, chunk_days)
+    workers = max(1, min(workers, len(windows)))
+    print(f"Dividindo {start:%d/%m/%Y} - {end:%d/%m/%Y} em {len(windows)} janela(s) com {workers} sessão(ões)")
+    
+    local = threading.local()
+    drivers = []
+    drivers_lock = threading.Lock()
+    
+    def fetch(window):
+        data_inicial, data_final = (d.strftime("%d/%m/%Y") for d in window)
+        if Config.EXTRACTION_ENGINE == "http":
+            df = extract_with_http(email, password, data_inicial, data_final, filters)
+            if df is not None:
+                return df
         
-        # Preenche as datas usando JavaScript (mais confiável)
-        print("Preenchendo campo de data inicial via JavaScript...")
-        selectors_from_date = [
-            ("data.fromDate", "id"),
-            ("#data\\.fromDate", "css"),
-            ("//*[@id='data.fromDate']", "xpath"),
-            ("data.fromDate", "name")
-        ]
+        if getattr(local, "driver", None) is None:
+            worker_dir = os.path.join(download_dir, f"worker_{threading.get_ident()}")
+            local.driver, local.download_dir = setup_chrome_driver(download_dir=worker_dir)
+            with drivers_lock:
+                drivers.append(local.driver)
         
-        data_preenchida = False
-        for selector, by_type in selectors_from_date:
+        csv_file = extract_with_selenium(local.driver, local.download_dir, email, password, data_inicial, data_final)
+        if csv_file is None:
+            raise TimeoutError(f"Download da janela {data_inicial} - {data_final} não foi concluído")
+        return load_filtered_csv(csv_file, filters)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            frames = list(executor.map(fetch, windows))
+    finally:
+        for driver in drivers:
             try:
-                wait_for_send_keys_js(driver, selector, data_inicial, timeout=15, by_type=by_type)
-                print(f"✅ Data inicial preenchida via JS usando {by_type}: {selector}")
-                data_preenchida = True
-                break
+                driver.quit()
             except Exception as e:
-                print(f"⚠️ Falhou JS com {by_type} {selector}: {str(e)[:80]}")
-                # Tenta método tradicional como fallback
-                try:
-                    wait_for_send_keys(driver, selector, data_inicial, timeout=10, by_type=by_type)
-                    print(f"✅ Data inicial preenchida via método tradicional: {selector}")
-                    data_preenchida = True
-                    break
-                except:
-                    continue
-        
-        if not data_preenchida:
-            raise Exception("Não foi possível preencher campo de data inicial")
+                print(f"⚠️ Erro ao finalizar navegador: {e}")
+    
+    df = pd.concat(frames, ignore_index=True).drop_duplicates(ignore_index=True)
+    print(f"✅ {len(windows)} janela(s) combinadas: {len(df)} linhas únicas")
+    return df
+
+
+def upload_and_clean(upload, download_dir):
+    """
+    Executa o envio para o Google Sheets, trata os erros e limpa a pasta de downloads
+    
+    Args:
+        upload: Função sem argumentos que faz o envio e retorna a URL da planilha
+        download_dir: Diretório de downloads
+    
+    Returns:
+        str: URL da planilha ou None se o upload falhou
+    """
+    try:
+        print(f"\n{'='*50}")
+        print(f"Fazendo upload para o Google Sheets...")
+        print(f"Planilha: {Config.SPREADSHEET_NAME}")
+        print(f"Aba: {Config.WORKSHEET_NAME}")
+        print(f"{'='*50}")
         
-        time.sleep(1)  # Pequena pausa entre campos
+        sheet_url = upload()
+        print(f"\n✅ Upload concluído com sucesso!")
+        print(f"URL da planilha: {sheet_url}")
         
-        print("Preenchendo campo de data final via JavaScript...")
-        selectors_to_date = [
-            ("data.toDate", "id"),
-            ("#data\\.toDate", "css"),
-            ("//*[@id='data.toDate']", "xpath"),
-            ("data.toDate", "name")
-        ]
+        # Limpa a pasta de downloads após upload bem-sucedido
+        print(f"\n{'='*50}")
+        print("Limpando pasta de downloads...")
+        clean_downloads_folder(download_dir)
+        print(f"{'='*50}")
+        return sheet_url
+    except FileNotFoundError as e:
+        print(f"❌ Erro: {e}")
+    except ValueError as e:
+        print(f"❌ Erro: {e}")
+    except Exception as e:
+        import traceback
+        print(f"❌ Erro ao fazer upload para o Google Sheets: {e}")
+        print(f"\nDetalhes do erro:")
+        traceback.print_exc()
+        print("\nVerifique se:")
+        print(f"1. O arquivo '{Config.GOOGLE_CREDENTIALS_FILE}' está no diretório do projeto")
+        print("2. O nome da planilha está correto")
+        print("3. A conta de serviço tem permissão para acessar a planilha")
+    return None
+
+
+def process_and_upload(df, download_dir):
+    """
+    Envia o DataFrame (já filtrado na leitura) para o Google Sheets e limpa a pasta de downloads
+    
+    Args:
+        df: DataFrame com os dados do relatório já filtrados
+        download_dir: Diretório de downloads
+    
+    Returns:
+        str: URL da planilha ou None se o upload falhou
+    """
+    print(f"\nDados carregados com sucesso!")
+    print(f"Colunas: {list(df.columns)}")
+    print(f"\nTotal de linhas após todos os filtros: {len(df)}")
+    print(f"DataFrame shape: {df.shape} (linhas x colunas)")
+    print(f"\nPrimeiras linhas:")
+    print(df.head())
+    
+    return upload_and_clean(lambda: upload_to_google_sheets(df), download_dir)
+
+
+def export_signature(filters=None):
+    """
+    Configurações que mudam o resultado de um mesmo CSV (entram no hash do arquivo)
+    
+    Args:
+        filters: Filtros aplicados na leitura (se None, usa Config.get_dataframe_filters())
+    
+    Returns:
+        str: JSON com as configurações
+    """
+    return json.dumps({
+        "filters": filters or Config.get_dataframe_filters(),
+        "usecols": Config.CSV_USECOLS,
+        "dtypes": Config.CSV_DTYPES,
+        "fanout": Config.FANOUT_PROFILES,
+        "destination": [Config.SPREADSHEET_NAME, Config.WORKSHEET_NAME],
+        "pipeline_mode": Config.PIPELINE_MODE,
+        "sync_mode": Config.SHEETS_SYNC_MODE
+    }, sort_keys=True, default=str)
+
+
+@instrumented("upload")
+def deliver_report(df, download_dir):
+    """
+    Envia o relatório ao destino padrão ou, com Config.FANOUT_PROFILES, a todos os perfis
+    
+    Args:
+        df: DataFrame com os dados do relatório já filtrados
+        download_dir: Diretório de downloads
+    
+    Returns:
+        bool: True se todos os envios foram concluídos
+    """
+    if not Config.FANOUT_PROFILES:
+        return process_and_upload(df, download_dir) is not None
+    
+    print(f"\n{'='*50}")
+    print(f"Enviando {len(df)} linha(s) para {len(Config.FANOUT_PROFILES)} destino(s)...")
+    print(f"{'='*50}")
+    results = upload_profiles(df)
+    failed = [name for name, url in results.items() if url is None]
+    if failed:
+        print(f"❌ Perfis com erro no envio: {', '.join(failed)}")
+        return False
+    
+    print("Limpando pasta de downloads...")
+    clean_downloads_folder(download_dir)
+    return True
+
+
+def stream_with_http(email, password, data_inicial, data_final, download_dir, on_chunk=None):
+    """
+    Modo streaming pelo motor HTTP: o CSV é lido da resposta e enviado bloco a bloco
+    
+    Args:
+        email: Email de login
+        password: Senha
+        data_inicial: Data inicial (dd/mm/aaaa)
+        data_final: Data final (dd/mm/aaaa)
+        download_dir: Diretório de downloads
+        on_chunk: Função chamada com cada bloco filtrado (ex.: gravação do histórico)
+    
+    Returns:
+        bool: Resultado do envio ou None se o fluxo HTTP falhar antes do envio (usar o navegador)
+    """
+    from http_engine import HttpEngineError, open_http_export_stream
+    
+    try:
+        print("Extraindo relatório via HTTP (streaming)...")
+        with open_http_export_stream(email, password, data_inicial, data_final) as stream:
+            print("✅ Exportação aberta via HTTP")
+            upload = lambda: stream_csv_to_sheets(stream, on_chunk=on_chunk)
+            return upload_and_clean(upload, download_dir) is not None
+    except HttpEngineError as e:
+        print(f"⚠️ Motor HTTP falhou, usando o navegador: {e}")
+    except Exception as e:
+        print(f"⚠️ Erro inesperado no motor HTTP, usando o navegador: {e}")
+    increment("http_fallbacks")
+    return None
+
+
+def check_unchanged_export(csv_file, filters, download_dir):
+    """
+    Compara o CSV exportado com o da última execução bem-sucedida
+    
+    Se for idêntico (com Config.SKIP_UNCHANGED_EXPORTS), limpa a pasta de downloads e a
+    leitura e o upload podem ser ignorados.
+    
+    Args:
+        csv_file: Caminho do CSV exportado
+        filters: Filtros aplicados na leitura
+        download_dir: Diretório de downloads
+    
+    Returns:
+        str: Hash do CSV (gravado com save_run_fingerprint após o envio) ou None se o CSV não mudou
+    """
+    export_digest = file_fingerprint(csv_file, extra=export_signature(filters))
+    if Config.SKIP_UNCHANGED_EXPORTS and export_digest == get_run_fingerprint("export"):
+        print("✅ CSV idêntico ao da última execução bem-sucedida, leitura e upload ignorados")
+        clean_downloads_folder(download_dir)
+        return None
+    forget_run_fingerprint("export")
+    return export_digest
+
+
+def stream_export(csv_file, download_dir, history=None):
+    """
+    Lê, filtra e envia o CSV exportado bloco a bloco (modo streaming)
+    
+    Args:
+        csv_file: Caminho do CSV exportado
+        download_dir: Diretório de downloads
+        history: Função chamada com cada bloco filtrado (ex.: HistoryRecorder)
+    
+    Returns:
+        bool: True se os dados foram enviados para o Google Sheets
+    """
+    upload = lambda: stream_csv_to_sheets(csv_file, on_chunk=history)
+    return upload_and_clean(upload, download_dir) is not None
+
+
+def record_and_deliver(df, download_dir, history=None):
+    """
+    Grava o histórico e envia o relatório (ver deliver_report)
+    
+    Args:
+        df: DataFrame com os dados do relatório já filtrados
+        download_dir: Diretório de downloads
+        history: Função chamada com o DataFrame antes do envio (ex.: HistoryRecorder)
+    
+    Returns:
+        bool: True se todos os envios foram concluídos
+    """
+    if history is not None:
+        history(df)
+    return deliver_report(df, download_dir)
+
+
+def run_pipeline(email, password, driver=None, download_dir=None):
+    """
+    Executa o fluxo completo: extração (HTTP ou navegador), filtros e upload
+    
+    Args:
+        email: Email de login
+        password: Senha
+        driver: WebDriver já aberto para reaproveitar (não é finalizado aqui).
+            Se None, um navegador é criado apenas se necessário e finalizado ao final
+        download_dir: Diretório de downloads do driver informado
+    
+    Returns:
+        bool: True se os dados foram enviados para o Google Sheets
+    """
+    own_driver = False
+    if download_dir is None:
+        download_dir = os.path.join(os.getcwd(), Config.DOWNLOAD_DIR)
+    data_inicial, data_final = get_report_dates()
+    
+    # Com fan-out, a leitura mantém as linhas de qualquer perfil e cada perfil refiltra no envio
+    filters = union_profile_filters() if Config.FANOUT_PROFILES else None
+    
+    start, end = get_report_window()
+    streaming = Config.PIPELINE_MODE == "streaming" and not Config.FANOUT_PROFILES
+    history = HistoryRecorder(start, end)
+    try:
+        # Intervalos maiores que uma janela são divididos e buscados em paralelo
+        if (end - start).days + 1 > Config.EXTRACTION_CHUNK_DAYS:
+            df = extract_range_parallel(email, password, start, end, download_dir, filters=filters)
+            return record_and_deliver(df, download_dir, history)
         
-        data_preenchida = False
-        for selector, by_type in selectors_to_date:
-            try:
-                wait_for_send_keys_js(driver, selector, data_final, timeout=15, by_type=by_type)
-                print(f"✅ Data final preenchida via JS usando {by_type}: {selector}")
-                data_preenchida = True
-                break
-            except Exception as e:
-                print(f"⚠️ Falhou JS com {by_type} {selector}: {str(e)[:80]}")
-                # Tenta método tradicional como fallback
-                try:
-                    wait_for_send_keys(driver, selector, data_final, timeout=10, by_type=by_type)
-                    print(f"✅ Data final preenchida via método tradicional: {selector}")
-                    data_preenchida = True
-                    break
-                except:
-                    continue
+        # Motor HTTP (opcional): em caso de falha, segue pelo navegador
+        if Config.EXTRACTION_ENGINE == "http":
+            if streaming:
+                uploaded = stream_with_http(email, password, data_inicial, data_final, download_dir, on_chunk=history)
+                if uploaded is not None:
+                    return uploaded
+            else:
+                df = extract_with_http(email, password, data_inicial, data_final, filters)
+                if df is not None:
+                    return record_and_deliver(df, download_dir, history)
         
-        if not data_preenchida:
-            raise Exception("Não foi possível preencher campo de data final")
+        if driver is None:
+            # Configura o Chrome
+            driver, download_dir = setup_chrome_driver()
+            own_driver = True
+            print("✅ Chrome WebDriver configurado")
         
-        # Gera o relatório
-        wait_for_clickable(driver, "/html/body/div[1]/div[1]/main/div/section/header/div[2]/div/button")
-        wait_for_clickable(driver, "/html/body/div[1]/div[1]/main/div/form[1]/div/div/div[2]/div/div/div[2]/div/button[1]/span[1]")
-        time.sleep(10)
+        csv_file = extract_with_selenium(driver, download_dir, email, password, data_inicial, data_final)
+        if csv_file is None:
+            print("Timeout: Download não foi concluído no tempo esperado")
+            return False
         
-        # Faz download do CSV
-        wait_for_clickable(driver, "/html/body/div[1]/div[1]/div/nav/div/div[1]/div[1]/button")
-        wait_for_clickable(driver, "/html/body/div[1]/div[1]/div/nav/div/div[1]/div[2]/div/div[2]/div/div/div[2]/div/div[1]/div/div/div/div[2]/a[1]/span")
-        print("✅ Download iniciado")
+        # CSV idêntico ao da última execução bem-sucedida: não há nada novo para enviar
+        export_digest = check_unchanged_export(csv_file, filters, download_dir)
+        if export_digest is None:
+            return True
         
-        # Aguarda o download completar
-        print("Aguardando download do CSV...")
-        if wait_for_download_complete(download_dir):
-            print("Download concluído!")
-            
-            # Encontra o arquivo CSV mais recente
-            csv_file = get_latest_csv_file(download_dir)
-            print(f"Arquivo encontrado: {csv_file}")
-            
-            # Lê o CSV com pandas
-            df = pd.read_csv(csv_file)
-            print(f"\nDados carregados com sucesso!")
-            print(f"Total de linhas antes do filtro: {len(df)}")
-            print(f"Colunas: {list(df.columns)}")
-            
-            # Filtra o DataFrame por Operação
-            df = filter_dataframe_by_operation(df)
-            
-            # Filtra o DataFrame por Região (SPM e SPI)
-            df = filter_dataframe_by_region(df)
-            
-            print(f"\nTotal de linhas após todos os filtros: {len(df)}")
-            print(f"\nPrimeiras linhas:")
-            print(df.head())
-            
-            # Faz upload para o Google Sheets
-            try:
-                print(f"\n{'='*50}")
-                print(f"Fazendo upload para o Google Sheets...")
-                print(f"Planilha: {Config.SPREADSHEET_NAME}")
-                print(f"Aba: {Config.WORKSHEET_NAME}")
-                print(f"DataFrame shape: {df.shape} (linhas x colunas)")
-                print(f"{'='*50}")
-                
-                sheet_url = upload_to_google_sheets(df)
-                print(f"\n✅ Upload concluído com sucesso!")
-                print(f"URL da planilha: {sheet_url}")
-                
-                # Limpa a pasta de downloads após upload bem-sucedido
-                print(f"\n{'='*50}")
-                print("Limpando pasta de downloads...")
-                clean_downloads_folder(download_dir)
-                print(f"{'='*50}")
-            except FileNotFoundError as e:
-                print(f"❌ Erro: {e}")
-            except ValueError as e:
-                print(f"❌ Erro: {e}")
-            except Exception as e:
-                import traceback
-                print(f"❌ Erro ao fazer upload para o Google Sheets: {e}")
-                print(f"\nDetalhes do erro:")
-                traceback.print_exc()
-                print("\nVerifique se:")
-                print(f"1. O arquivo '{Config.GOOGLE_CREDENTIALS_FILE}' está no diretório do projeto")
-                print("2. O nome da planilha está correto")
-                print("3. A conta de serviço tem permissão para acessar a planilha")
+        if streaming:
+            uploaded = stream_export(csv_file, download_dir, history)
         else:
-            print("Timeout: Download não foi concluído no tempo esperado")
-    
+            # Lê o CSV aplicando os filtros durante a leitura
+            uploaded = record_and_deliver(load_filtered_csv(csv_file, filters), download_dir, history)
+        if uploaded:
+            save_run_fingerprint("export", export_digest)
+        return uploaded
+    finally:
+        history.close()
+        if own_driver:
+            driver.quit()
+            print("✅ Driver finalizado")
+
+
+def main():
+    """Função principal do script"""
+    start_run("main")
+    success = False
+    try:
+        # Carrega configurações de email
+        Config.load_email_config()
+        
+        # Carrega credenciais
+        email, password = Config.get_credentials()
+        print(f"✅ Credenciais carregadas para: {email}")
+        
+        success = run_pipeline(email, password)
+        
     except FileNotFoundError as e:
         print(f"❌ Erro: {e}")
         print("\n💡 Dica: Execute 'python save_credentials.py' para salvar suas credenciais")
@@ -353,9 +946,9 @@ def main():
         print(f"❌ Erro inesperado: {e}")
         traceback.print_exc()
     finally:
-        if 'driver' in locals():
-            driver.quit()
-            print("✅ Driver finalizado")
+        print_wait_summary()
+        finish_run(success)
+        flush_alerts()
 
 
 if __name__ == "__main__":
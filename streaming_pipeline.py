@@ -0,0 +1,184 @@
+"""
+Pipeline em streaming para o script BPO
+Os blocos do CSV passam pela leitura, pelos filtros e pelo envio ao Google Sheets enquanto
+os blocos seguintes ainda estão sendo lidos (memória limitada ao tamanho dos blocos)
+"""
+import queue
+import threading
+from config import Config
+from instrumentation import instrumented, annotate
+from utils import (
+    iter_filtered_csv_chunks, open_worksheet, call_sheets_api, destination_state_file, forget_sheet_snapshot,
+    forget_run_fingerprint, sheet_fingerprint_key, _column_letter, dataframe_to_values
+)
+
+
+_END_OF_STREAM = object()
+
+
+class StreamingSheetWriter:
+    """
+    Escreve a aba em sequência: cabeçalho na linha 1 e lotes logo abaixo
+    
+    A aba não é limpa antes do envio, então as primeiras linhas já aparecem no Sheets
+    enquanto o restante do CSV é processado. Sobras do conteúdo anterior (linhas abaixo
+    do último lote e colunas à direita) são limpas em finish().
+    """
+    
+    def __init__(self, worksheet, batch_size=10000):
+        """
+        Args:
+            worksheet: Aba do gspread
+            batch_size: Linhas acumuladas antes de cada envio
+        """
+        self.worksheet = worksheet
+        self.batch_size = batch_size
+        self.header = None
+        self.next_row = 1
+        self.rows_written = 0
+        self._pending = []
+    
+    def _ensure_rows(self, last_row):
+        """Aumenta a grade da aba se o próximo lote passar da última linha"""
+        if last_row > self.worksheet.row_count:
+            missing = last_row - self.worksheet.row_count
+            call_sheets_api(lambda: self.worksheet.add_rows(missing))
+    
+    def _write(self, rows):
+        last_row = self.next_row + len(rows) - 1
+        self._ensure_rows(last_row)
+        start = f'A{self.next_row}'
+        call_sheets_api(lambda: self.worksheet.update(start, rows, value_input_option='USER_ENTERED'))
+        if self.next_row > 1:
+            print(f"Lote enviado: linhas {self.next_row} a {last_row}")
+        self.next_row = last_row + 1
+    
+    def write_header(self, header):
+        """Envia o cabeçalho (linha 1)"""
+        self.header = header
+        if len(header) > self.worksheet.col_count:
+            missing = len(header) - self.worksheet.col_count
+            call_sheets_api(lambda: self.worksheet.add_cols(missing))
+        self._write([header])
+    
+    def append(self, rows):
+        """Acumula linhas e envia sempre que o lote atingir batch_size"""
+        self._pending.extend(rows)
+        while len(self._pending) >= self.batch_size:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            self._write(batch)
+            self.rows_written += len(batch)
+    
+    def finish(self):
+        """Envia o lote restante e limpa o que sobrou do conteúdo anterior da aba"""
+        if self._pending:
+            self._write(self._pending)
+            self.rows_written += len(self._pending)
+            self._pending = []
+        
+        last_col = _column_letter(self.worksheet.col_count)
+        ranges = []
+        if self.next_row <= self.worksheet.row_count:
+            ranges.append(f"A{self.next_row}:{last_col}{self.worksheet.row_count}")
+        if self.worksheet.col_count > len(self.header):
+            ranges.append(f"{_column_letter(len(self.header) + 1)}1:{last_col}{self.next_row - 1}")
+        if ranges:
+            call_sheets_api(lambda: self.worksheet.batch_clear(ranges))
+
+
+def _produce_chunks(source, output, stop, filters, chunksize):
+    """
+    Lê e filtra o CSV em blocos e os coloca na fila já convertidos para envio
+    
+    Executado em uma thread separada; erros são repassados ao consumidor pela fila.
+    """
+    def put(item):
+        # Aguarda espaço na fila, desistindo se o consumidor tiver parado
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    try:
+        for chunk_rows, chunk in iter_filtered_csv_chunks(source, filters=filters, chunksize=chunksize):
+            if not put((chunk_rows, chunk, dataframe_to_values(chunk))):
+                return
+        put(_END_OF_STREAM)
+    except BaseException as e:
+        put(e)
+
+
+@instrumented("streaming_upload")
+def stream_csv_to_sheets(source, spreadsheet_name=None, worksheet_name=None, credentials_path=None,
+                         filters=None, chunksize=None, batch_size=10000, queue_size=2, on_chunk=None):
+    """
+    Lê, filtra e envia o CSV ao Google Sheets bloco a bloco
+    
+    A leitura roda em uma thread produtora e o envio na thread atual; a fila limitada
+    (queue_size blocos) mantém a memória proporcional ao tamanho dos blocos.
+    
+    Args:
+        source: Caminho do arquivo, buffer ou stream (ex.: resposta HTTP)
+        spreadsheet_name: Nome da planilha do Google Sheets (se None, usa Config.SPREADSHEET_NAME)
+        worksheet_name: Nome da aba (se None, usa Config.WORKSHEET_NAME)
+        credentials_path: Caminho para o arquivo JSON de credenciais
+        filters: Lista de filtros (se None, usa Config.get_dataframe_filters())
+        chunksize: Linhas lidas por bloco (se None, usa Config.CSV_CHUNK_SIZE)
+        batch_size: Linhas por envio ao Google Sheets
+        queue_size: Blocos prontos mantidos em memória aguardando envio
+        on_chunk: Função chamada com cada bloco filtrado (DataFrame) antes do envio
+    
+    Returns:
+        str: URL da planilha
+    """
+    if spreadsheet_name is None:
+        spreadsheet_name = Config.SPREADSHEET_NAME
+    
+    chunks = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_produce_chunks,
+        args=(source, chunks, stop, filters, chunksize),
+        daemon=True
+    )
+    producer.start()
+    
+    rows_read = 0
+    try:
+        # Autentica e abre a aba enquanto o primeiro bloco é lido
+        spreadsheet, worksheet = open_worksheet(spreadsheet_name, worksheet_name, credentials_path)
+        forget_run_fingerprint(sheet_fingerprint_key(spreadsheet_name, worksheet_name))
+        # O conteúdo da aba muda fora da sincronização delta (inclusive se o envio falhar no meio)
+        forget_sheet_snapshot(destination_state_file(Config.SHEETS_SNAPSHOT_FILE, spreadsheet_name, worksheet_name))
+        writer = StreamingSheetWriter(worksheet, batch_size=batch_size)
+        
+        while True:
+            item = chunks.get()
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            chunk_rows, chunk, values = item
+            rows_read += chunk_rows
+            if on_chunk is not None:
+                on_chunk(chunk)
+            if writer.header is None:
+                writer.write_header(values[0])
+                print("Cabeçalho enviado, enviando os blocos conforme são lidos...")
+            writer.append(values[1:])
+        
+        writer.finish()
+    finally:
+        stop.set()
+        producer.join(timeout=5)
+    
+    annotate(rows_in=rows_read, rows_out=writer.rows_written)
+    print(f"✅ CSV enviado em streaming: {rows_read} linhas lidas -> {writer.rows_written} enviadas")
+    print(f"Planilha: {spreadsheet_name}")
+    print(f"Aba: {worksheet.title}")
+    print(f"URL: {spreadsheet.url}")
+    
+    return spreadsheet.url
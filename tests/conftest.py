@@ -0,0 +1,32 @@
+"""
+Fixtures compartilhadas pelos testes
+"""
+import pytest
+import utils
+from config import Config
+from benchmarks.fake_sheets import FakeBackend, FakeClient
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Cliente falso, arquivos de estado em uma pasta temporária e modo delta"""
+    monkeypatch.chdir(tmp_path)
+    client = FakeClient(FakeBackend(latency=0, seconds_per_mb=0))
+    monkeypatch.setattr(utils, "get_sheets_client", lambda credentials_path=None: client)
+    monkeypatch.setattr(utils, "_SHEETS_RATE_LIMITER", None)
+    monkeypatch.setattr(utils, "_SPREADSHEETS", {})
+    settings = {
+        "SPREADSHEET_NAME": "BPO",
+        "SPREADSHEET_ID": None,
+        "WORKSHEET_NAME": "Dados",
+        "SHEETS_SYNC_MODE": "delta",
+        "SHEETS_ROW_KEY_COLUMNS": ["id"],
+        "SKIP_UNCHANGED_UPLOADS": False,
+        "SHEETS_MAX_RETRIES": 0,
+        "SHEETS_WRITE_REQUESTS_PER_MINUTE": 1000000,
+        "SHEETS_BATCH_ROWS": 2,
+        "RUN_REPORT_FILE": None
+    }
+    for attr, value in settings.items():
+        monkeypatch.setattr(Config, attr, value)
+    return client
@@ -0,0 +1,83 @@
+"""
+Envio em lotes paralelos: checkpoint de envios interrompidos e repetição em 429 (Google Sheets falso)
+"""
+import json
+import pytest
+import gspread
+import requests
+import utils
+
+
+def _values(version, rows=20):
+    return [["id", "valor"]] + [[str(i), f"{version}-{i}"] for i in range(rows)]
+
+
+def _upload(worksheet, values):
+    return utils.upload_values_concurrently(worksheet, values, rows_per_range=2, ranges_per_request=2, workers=1)
+
+
+def _api_error(status):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps({"error": {"code": status, "message": "quota", "status": "RESOURCE_EXHAUSTED"}}).encode()
+    return gspread.exceptions.APIError(response)
+
+
+@pytest.fixture
+def worksheet(client):
+    return utils.open_worksheet()[1]
+
+
+def test_interrupted_upload_resumes_missing_batches(client, worksheet):
+    values = _values("v1")  # 21 linhas = 11 intervalos = 6 requisições
+    # clear + 2 requisições confirmadas
+    client.backend.fail_after_writes = client.backend.writes + 3
+    with pytest.raises(RuntimeError):
+        _upload(worksheet, values)
+    
+    client.backend.fail_after_writes = None
+    writes = client.backend.writes
+    assert _upload(worksheet, values) == 4
+    # Sem clear: só as requisições que faltaram
+    assert client.backend.writes - writes == 4
+    assert worksheet.get_all_values() == values
+
+
+def test_checkpoint_from_other_data_is_ignored(client, worksheet):
+    client.backend.fail_after_writes = client.backend.writes + 3
+    with pytest.raises(RuntimeError):
+        _upload(worksheet, _values("v1"))
+    
+    client.backend.fail_after_writes = None
+    values = _values("v2")
+    assert _upload(worksheet, values) == 6
+    assert worksheet.get_all_values() == values
+
+
+def test_rate_limited_call_is_retried(client, monkeypatch):
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+    limiter = utils.TokenBucket(6000)
+    calls = []
+    
+    def request():
+        calls.append(len(calls))
+        if len(calls) < 3:
+            raise _api_error(429)
+        return "ok"
+    
+    assert utils.call_sheets_api(request, limiter=limiter, max_retries=3) == "ok"
+    assert len(calls) == 3
+    # Após o 429 o balde foi esvaziado (as demais threads também esperam)
+    assert limiter._tokens < 1
+
+
+def test_non_retryable_error_is_raised(client):
+    calls = []
+    
+    def request():
+        calls.append(1)
+        raise _api_error(400)
+    
+    with pytest.raises(gspread.exceptions.APIError):
+        utils.call_sheets_api(request, max_retries=3)
+    assert len(calls) == 1
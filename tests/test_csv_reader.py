@@ -0,0 +1,40 @@
+"""
+Leitura filtrada do CSV: o leitor do pandas e o pyarrow devolvem as mesmas colunas e linhas
+"""
+import io
+import pytest
+import utils
+from config import Config
+
+
+CSV = (
+    "id,Operação,val,val,\n"
+    "1,FMH,a,b,x\n"
+    "2,XYZ,c,d,y\n"
+    "3,of,e,f,z\n"
+).encode("utf-8")
+
+FILTERS = [{"name": "operação", "keywords": ["oper"], "column_index": 1, "values": ["FMH", "OF"]}]
+
+
+@pytest.fixture(params=["c", "pyarrow"])
+def engine(request, monkeypatch):
+    if request.param == "pyarrow":
+        pytest.importorskip("pyarrow.csv")
+    monkeypatch.setattr(Config, "CSV_ENGINE", request.param)
+    monkeypatch.setattr(Config, "CSV_USECOLS", [])
+    monkeypatch.setattr(Config, "CSV_DTYPES", {})
+    return request.param
+
+
+def test_duplicated_and_unnamed_columns(engine):
+    df = utils.load_filtered_csv(io.BytesIO(CSV), FILTERS)
+    assert list(df.columns) == ["id", "Operação", "val", "val.1", "Unnamed: 4"]
+    assert df["id"].tolist() == ["1", "3"]
+    assert df["val.1"].tolist() == ["b", "f"]
+
+
+def test_usecols_with_duplicated_column(engine):
+    df = utils.load_filtered_csv(io.BytesIO(CSV), FILTERS, usecols=["id", "val.1"])
+    assert list(df.columns) == ["id", "Operação", "val.1"]
+    assert df["val.1"].tolist() == ["b", "f"]
@@ -0,0 +1,63 @@
+"""
+Diagnósticos de falha: retenção dos arquivos locais e anexos do email de alertas
+"""
+import os
+import time
+import alerts
+import diagnostics
+from config import Config
+
+
+def _touch(path, age_seconds=0):
+    with open(path, "wb") as f:
+        f.write(b"x")
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_retention_counts_bundles_and_screenshots_separately(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "DIAGNOSTICS_MAX_BUNDLES", 2)
+    monkeypatch.setattr(Config, "DIAGNOSTICS_RETENTION_DAYS", 7)
+    os.makedirs("diagnostics")
+    for i in range(3):
+        _touch(f"diagnostics/diagnostico_{i}.zip", age_seconds=60 * (3 - i))
+    # Screenshots mais recentes que os diagnósticos não podem tirar o lugar deles
+    _touch("diagnostics/screenshot_error_new.png")
+    _touch("diagnostics/screenshot_error_new.jpg")
+    _touch("diagnostics/screenshot_error_old.png", age_seconds=8 * 86400)
+    # Fora da pasta (ex.: outro job no mesmo diretório de trabalho): não é tocado
+    _touch("screenshot_error_other.png", age_seconds=8 * 86400)
+    
+    removed = diagnostics.enforce_retention("diagnostics")
+    
+    assert sorted(removed) == ["diagnostics/diagnostico_0.zip", "diagnostics/screenshot_error_old.png"]
+    assert sorted(os.listdir("diagnostics")) == [
+        "diagnostico_1.zip", "diagnostico_2.zip", "screenshot_error_new.jpg", "screenshot_error_new.png"
+    ]
+    assert os.path.exists("screenshot_error_other.png")
+
+
+def test_fallback_screenshots_are_saved_in_the_diagnostics_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "DIAGNOSTICS_DIR", os.path.join("jobs", "a", "diagnostics"))
+    paths = alerts.save_screenshots([alerts.Alert("erro", screenshot=b"\x89PNG\r\n\x1a\n")])
+    assert [os.path.dirname(path) for path in paths] == [Config.DIAGNOSTICS_DIR]
+    assert os.listdir(Config.DIAGNOSTICS_DIR) == [os.path.basename(paths[0])]
+
+
+def test_digest_attaches_screenshot_only_without_bundle(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "EMAIL_FROM", "a@example.com")
+    monkeypatch.setattr(Config, "EMAIL_TO", "b@example.com")
+    bundle_path = str(tmp_path / "diagnostico_1.zip")
+    _touch(bundle_path)
+    
+    with_bundle = alerts.Alert("erro 1", screenshot=b"\xff\xd8jpeg")
+    with_bundle.screenshot_format = "jpeg"
+    with_bundle.bundle_path = bundle_path
+    without_bundle = alerts.Alert("erro 2", screenshot=b"\x89PNG\r\n\x1a\n")
+    
+    message = alerts.build_digest([with_bundle, without_bundle])
+    attachments = [part.get_filename() for part in message.walk() if part.get_filename()]
+    
+    assert attachments == ["diagnostico_1.zip", alerts._screenshot_filename(without_bundle, 2)]
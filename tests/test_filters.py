@@ -0,0 +1,48 @@
+"""
+Filtros do DataFrame: a máscara única equivale à sequência de isin da versão anterior
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import utils
+
+
+def _old_filter(df, column, values):
+    """Filtro por coluna como era feito antes (astype(str), strip, upper, isin)"""
+    df = df.copy()
+    df[column] = df[column].astype(str).str.strip()
+    return df[df[column].str.upper().isin([v.upper() for v in values])]
+
+
+FRAME = pd.DataFrame({
+    "ID": [str(i) for i in range(8)],
+    "Região": [" spm", "SPI", "RJ", None, "spm ", "MG", "SPM", np.nan],
+    "Operação": ["FMH", " of", "lmh", "FMH", "XD", None, "fmh ", "OF"]
+})
+
+
+@pytest.mark.parametrize("dtype", [object, "string", "category"])
+@pytest.mark.parametrize("values", [["FMH", "OF"], ["fmh", " Lmh "], []])
+def test_mask_matches_isin(dtype, values):
+    series = FRAME["Operação"].astype(dtype)
+    expected = _old_filter(FRAME.assign(**{"Operação": series}), "Operação", values).index
+    mask = utils.build_column_mask(series, values)
+    assert list(FRAME.index[mask]) == list(expected)
+
+
+def test_filter_dataframe_matches_filter_chain():
+    filters = [
+        {"name": "operação", "keywords": ["oper"], "values": ["FMH", "OF", "LMH"]},
+        {"name": "região", "keywords": ["regi"], "values": ["SPM", "SPI"]}
+    ]
+    expected = _old_filter(_old_filter(FRAME, "Operação", filters[0]["values"]), "Região", filters[1]["values"])
+    
+    result = utils.filter_dataframe(FRAME, filters, verbose=False)
+    pd.testing.assert_frame_equal(result, expected)
+    # O DataFrame de entrada não é alterado
+    assert FRAME["Região"].iloc[0] == " spm"
+
+
+def test_empty_filter_list_keeps_no_rows():
+    filters = [{"name": "operação", "keywords": ["oper"], "values": []}]
+    assert len(utils.filter_dataframe(FRAME, filters, verbose=False)) == 0
@@ -0,0 +1,60 @@
+"""
+Execuções sem mudanças: o hash do último envio evita reenviar dados idênticos
+"""
+import pandas as pd
+import pytest
+import scriptMain
+import utils
+from config import Config
+
+
+def _frame(version):
+    return pd.DataFrame({"id": ["1", "2", "3"], "valor": [f"{version}-{i}" for i in range(3)]})
+
+
+def test_unchanged_upload_is_skipped(client, monkeypatch):
+    monkeypatch.setattr(Config, "SKIP_UNCHANGED_UPLOADS", True)
+    url = utils.upload_to_google_sheets(_frame("v1"))
+    requests = client.backend.requests
+    
+    assert utils.upload_to_google_sheets(_frame("v1")) == url
+    assert client.backend.requests == requests
+    
+    utils.upload_to_google_sheets(_frame("v2"))
+    assert client.backend.writes > 0 and client.backend.requests > requests
+    worksheet = next(iter(client.spreadsheets.values())).worksheets["Dados"]
+    assert worksheet.get_all_values()[1] == ["1", "v2-0"]
+
+
+def test_failed_upload_is_not_skipped_next_time(client, monkeypatch):
+    monkeypatch.setattr(Config, "SKIP_UNCHANGED_UPLOADS", True)
+    utils.upload_to_google_sheets(_frame("v1"))
+    client.backend.fail_after_writes = client.backend.writes + 1
+    with pytest.raises(RuntimeError):
+        utils.upload_to_google_sheets(_frame("v2"))
+    
+    client.backend.fail_after_writes = None
+    writes = client.backend.writes
+    utils.upload_to_google_sheets(_frame("v2"))
+    assert client.backend.writes > writes
+
+
+def test_unchanged_export_is_skipped(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SKIP_UNCHANGED_EXPORTS", True)
+    download_dir = tmp_path / "downloads"
+    download_dir.mkdir()
+    csv_file = download_dir / "export.csv"
+    csv_file.write_text("id,valor\n1,a\n", encoding="utf-8")
+    
+    digest = scriptMain.check_unchanged_export(str(csv_file), None, str(download_dir))
+    assert digest is not None
+    utils.save_run_fingerprint("export", digest)
+    
+    assert scriptMain.check_unchanged_export(str(csv_file), None, str(download_dir)) is None
+    # A pasta de downloads é limpa quando a leitura é ignorada
+    assert not csv_file.exists()
+    
+    csv_file.write_text("id,valor\n1,b\n", encoding="utf-8")
+    assert scriptMain.check_unchanged_export(str(csv_file), None, str(download_dir)) not in (None, digest)
+    # O hash antigo é esquecido até o novo envio terminar
+    assert utils.get_run_fingerprint("export") is None
@@ -0,0 +1,26 @@
+"""
+Histórico SQLite: registros unificados pelas colunas-chave
+"""
+import pandas as pd
+import pytest
+from history_store import HistoryStore
+
+
+def _frame(status):
+    return pd.DataFrame({"ID": ["1", "2"], "Data da solicitação": ["01/10/2026", "02/10/2026"], "Status": status})
+
+
+def test_key_columns_update_existing_records(tmp_path):
+    with HistoryStore(str(tmp_path / "history.sqlite3"), key_columns=["ID"]) as store:
+        run_id = store.begin_run()
+        store.append(run_id, _frame(["Pendente", "Pendente"]))
+        store.append(run_id, _frame(["Aprovado", "Pendente"]))
+        assert store.count() == 2
+
+
+def test_missing_key_columns_are_reported(tmp_path):
+    with HistoryStore(str(tmp_path / "history.sqlite3"), key_columns=["Id", "Status"]) as store:
+        run_id = store.begin_run()
+        with pytest.raises(ValueError, match=r"\['Id'\]"):
+            store.append(run_id, _frame(["Pendente", "Pendente"]))
+        assert store.count() == 0
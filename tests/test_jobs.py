@@ -0,0 +1,32 @@
+"""
+Isolamento do estado de cada job (jobs.apply_job_config)
+"""
+import os
+import pytest
+import jobs
+from config import Config
+from models import JobConfig
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for attr in jobs._STATE_FILES + ["DOWNLOAD_DIR", "CHROME_USER_DATA_DIR", "PROMETHEUS_TEXTFILE",
+                                     "SHEETS_WRITE_REQUESTS_PER_MINUTE"]:
+        monkeypatch.setattr(Config, attr, getattr(Config, attr))
+    return Config
+
+
+def test_state_files_are_per_job(config, tmp_path):
+    config.SELECTOR_CACHE_FILE = None
+    job = JobConfig(name="conta a/sul", email="a@example.com", password="x")
+    assert jobs.apply_job_config(job, str(tmp_path / "work"), workers=2) == ("a@example.com", "x")
+    
+    state_dir = os.path.join(Config.JOBS_STATE_DIR, "conta_a_sul")
+    for attr in jobs._STATE_FILES:
+        value = getattr(Config, attr)
+        if attr == "SELECTOR_CACHE_FILE":
+            assert value is None
+        else:
+            assert os.path.dirname(value) == state_dir, attr
+    assert Config.DOWNLOAD_DIR == os.path.join(str(tmp_path / "work"), "downloads")
@@ -0,0 +1,84 @@
+"""
+Orquestrador assíncrono contra o site local e o Google Sheets falso (benchmarks/)
+"""
+import os
+import time
+import shutil
+import sqlite3
+import pytest
+import utils
+import orchestrator
+from config import Config
+from benchmarks.run import configure_offline
+from benchmarks.mock_site import MockSite
+from benchmarks.fake_sheets import FakeBackend, FakeClient
+from benchmarks.synthetic_csv import write_synthetic_csv
+
+
+class FakeDriver:
+    def __init__(self):
+        self.closed = False
+    
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """Site local, Sheets falso e Config restaurada ao final"""
+    monkeypatch.chdir(tmp_path)
+    saved = {name: value for name, value in vars(Config).items() if name.isupper()}
+    csv_path = str(tmp_path / "report.csv")
+    write_synthetic_csv(csv_path, 500)
+    client = FakeClient(FakeBackend(latency=0, seconds_per_mb=0))
+    monkeypatch.setattr(utils, "get_sheets_client", utils.get_sheets_client)
+    monkeypatch.setattr(utils, "_SPREADSHEETS", {})
+    monkeypatch.setattr(orchestrator, "get_sheets_client", lambda credentials_path=None: client)
+    
+    drivers = []
+    
+    def setup_chrome_driver(download_dir=None):
+        time.sleep(0.1)
+        drivers.append(FakeDriver())
+        download_dir = str(tmp_path / "downloads")
+        os.makedirs(download_dir, exist_ok=True)
+        return drivers[-1], download_dir
+    
+    def extract_with_selenium(driver, download_dir, email, password, data_inicial, data_final):
+        return shutil.copy(csv_path, os.path.join(download_dir, "export.csv"))
+    
+    monkeypatch.setattr(orchestrator, "setup_chrome_driver", setup_chrome_driver)
+    monkeypatch.setattr(orchestrator, "extract_with_selenium", extract_with_selenium)
+    with MockSite(csv_path) as mock:
+        configure_offline(mock.url, client)
+        Config.HISTORY_ENABLED = True
+        mock.drivers = drivers
+        yield mock
+    for name, value in saved.items():
+        setattr(Config, name, value)
+
+
+def _history_rows():
+    with sqlite3.connect(Config.HISTORY_DB_FILE) as conn:
+        return conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+
+def test_http_run_records_history_from_worker_threads(site):
+    orchestrator_ = orchestrator.PipelineOrchestrator()
+    assert orchestrator.asyncio.run(orchestrator_.run(site.email, site.password))
+    orchestrator_.executor.shutdown(wait=True)
+    assert _history_rows() > 0
+    # O navegador aberto por precaução é fechado quando o motor HTTP funciona
+    assert all(driver.closed for driver in site.drivers)
+
+
+def test_http_fallback_overlaps_browser_setup(site):
+    Config.HTTP_EXPORT_URL = "missing?from={from_date}&to={to_date}"
+    orchestrator_ = orchestrator.PipelineOrchestrator()
+    assert orchestrator.asyncio.run(orchestrator_.run(site.email, site.password))
+    orchestrator_.executor.shutdown(wait=True)
+    stages = orchestrator_.timeline.stages
+    assert stages["browser_setup"]["start"] < stages["http_extract"]["end"]
+    assert "export" in stages and "upload" in stages
+    assert _history_rows() > 0
+    assert all(driver.closed for driver in site.drivers)
@@ -0,0 +1,78 @@
+"""
+Seletores candidatos testados em uma única chamada e o seletor lembrado em selector_cache.json
+"""
+import os
+import json
+import pytest
+import utils
+from config import Config
+
+
+class FakeDriver:
+    """Simula _PROBE_SELECTORS_JS: devolve o primeiro candidato presente na página"""
+    
+    def __init__(self, present):
+        self.present = present
+        self.probes = []
+    
+    def execute_script(self, script, candidates, interactable):
+        assert script == utils._PROBE_SELECTORS_JS
+        self.probes.append([tuple(candidate) for candidate in candidates])
+        for index, candidate in enumerate(candidates):
+            if tuple(candidate) in self.present:
+                return [index, f"elemento {candidate[0]}"]
+        return None
+
+
+SELECTORS = ["//button[@id='old']", ("new", "id"), ("button.export", "css")]
+
+
+@pytest.fixture
+def cache_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "selector_cache.json")
+    monkeypatch.setattr(Config, "SELECTOR_CACHE_FILE", path)
+    monkeypatch.setattr(utils, "_SELECTOR_CACHE", None)
+    return path
+
+
+def _cache(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_remembered_selector_is_tried_first(cache_file):
+    driver = FakeDriver({("new", "id"), ("button.export", "css")})
+    assert utils.resolve_selector(driver, SELECTORS, "reports.export", timeout=1)[1] == ("new", "id")
+    assert _cache(cache_file) == {"reports.export": ["new", "id"]}
+    
+    driver = FakeDriver({("new", "id"), ("button.export", "css")})
+    utils.resolve_selector(driver, SELECTORS, "reports.export", timeout=1)
+    assert driver.probes[0][0] == ("new", "id")
+
+
+def test_stale_cached_selector_falls_back_and_rewrites_cache(cache_file):
+    with open(cache_file, "w", encoding="utf-8") as f:
+        json.dump({"reports.export": ["new", "id"]}, f)
+    
+    # O site mudou: o seletor lembrado não existe mais
+    driver = FakeDriver({("button.export", "css")})
+    element, winner = utils.resolve_selector(driver, SELECTORS, "reports.export", timeout=1)
+    
+    assert winner == ("button.export", "css") and element == "elemento button.export"
+    assert len(driver.probes) == 1 and driver.probes[0][0] == ("new", "id")
+    assert _cache(cache_file) == {"reports.export": ["button.export", "css"]}
+
+
+def test_cached_selector_no_longer_in_candidates_is_ignored(cache_file):
+    with open(cache_file, "w", encoding="utf-8") as f:
+        json.dump({"reports.export": ["removed", "id"]}, f)
+    
+    driver = FakeDriver({("removed", "id"), ("new", "id")})
+    assert utils.resolve_selector(driver, SELECTORS, "reports.export", timeout=1)[1] == ("new", "id")
+    assert ("removed", "id") not in driver.probes[0]
+
+
+def test_no_candidate_found_raises(cache_file):
+    with pytest.raises(Exception, match="Todos os seletores falharam"):
+        utils.resolve_selector(FakeDriver(set()), SELECTORS, "reports.export", timeout=0.5)
+    assert not os.path.exists(cache_file)
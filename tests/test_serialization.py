@@ -0,0 +1,63 @@
+"""
+Conversão do DataFrame para o payload do Google Sheets: mesmo resultado da conversão linha a linha anterior
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import utils
+
+
+def _old_values(df):
+    """Conversão como era feita antes (fillna('') e str() célula a célula)"""
+    df_clean = df.fillna('')
+    values = [df_clean.columns.tolist()]
+    for row in df_clean.values.tolist():
+        values.append([str(val) if val is not None else '' for val in row])
+    return values
+
+
+FRAME = pd.DataFrame({
+    "texto": ["a", None, "c", np.nan],
+    "string": pd.array(["x", pd.NA, "z", "w"], dtype="string"),
+    "inteiro": [1, 2, 3, 4],
+    "decimal": [1.5, np.nan, 3.0, -0.25],
+    "booleano": [True, False, True, False],
+    "misto": ["1", 2, 3.5, None],
+    "data": pd.to_datetime(["2026-10-01", "2026-10-02", "2026-10-03", "2026-10-04"]),
+    "data_hora": pd.to_datetime(["2026-10-01 08:30", None, "2026-10-03", "2026-10-04 23:59:59.5"], format="ISO8601")
+})
+
+
+@pytest.mark.parametrize("column", list(FRAME.columns))
+def test_column_matches_old_serializer(column):
+    df = FRAME[[column]]
+    assert utils.dataframe_to_values(df) == _old_values(df)
+
+
+def test_frame_matches_old_serializer():
+    df = FRAME.drop(columns="data_hora")
+    assert utils.dataframe_to_values(df) == _old_values(df)
+
+
+def test_missing_dates_are_empty():
+    # Com outras colunas, a conversão anterior enviava "NaT"; sozinha, enviava ''
+    df = FRAME[["texto", "data_hora"]]
+    assert [row[1] for row in utils.dataframe_to_values(df)[1:]] == [
+        "2026-10-01 08:30:00", "", "2026-10-03 00:00:00", "2026-10-04 23:59:59.500000"
+    ]
+
+
+def test_nullable_integer_column():
+    # A conversão anterior falhava aqui (fillna('') não é aceito em colunas Int64)
+    df = pd.DataFrame({"inteiro_nulo": pd.array([1, None, 3], dtype="Int64")})
+    assert utils.dataframe_to_values(df) == [["inteiro_nulo"], ["1"], [""], ["3"]]
+
+
+def test_empty_frame_has_only_header():
+    assert utils.dataframe_to_values(FRAME.iloc[:0]) == [list(FRAME.columns)]
+
+
+def test_pyarrow_table_matches_dataframe():
+    pa = pytest.importorskip("pyarrow")
+    df = FRAME[["texto", "string", "inteiro"]]
+    assert utils.dataframe_to_values(pa.Table.from_pandas(df, preserve_index=False)) == _old_values(df)
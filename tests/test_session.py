@@ -0,0 +1,45 @@
+"""
+Sessão salva (cookies e localStorage) compartilhada pelas threads da extração em paralelo
+"""
+import pickle
+import threading
+import utils
+
+
+class FakeDriver:
+    def __init__(self, worker):
+        self.worker = worker
+    
+    def get_cookies(self):
+        return [{"name": f"c{i}", "value": f"{self.worker}-{i}" * 50} for i in range(200)]
+    
+    def execute_script(self, script, *args):
+        return {"token": str(self.worker)}
+
+
+def test_parallel_saves_leave_a_complete_session(tmp_path):
+    session_path = str(tmp_path / "session.pkl")
+    errors = []
+    
+    def save(worker):
+        for _ in range(20):
+            utils.save_browser_session(FakeDriver(worker), session_path)
+            try:
+                with open(session_path, "rb") as f:
+                    pickle.load(f)
+            except Exception as e:
+                errors.append(e)
+    
+    threads = [threading.Thread(target=save, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    with open(session_path, "rb") as f:
+        session = pickle.load(f)
+    # Cookies e localStorage vêm da mesma thread
+    worker = session["local_storage"]["token"]
+    assert all(cookie["value"].startswith(f"{worker}-") for cookie in session["cookies"])
+    assert not (tmp_path / "session.pkl.tmp").exists()
@@ -0,0 +1,54 @@
+"""
+Sincronização delta com o Google Sheets (backend falso de benchmarks/fake_sheets.py)
+"""
+import os
+import pandas as pd
+import pytest
+import utils
+from config import Config
+
+
+def _frame(ids, version):
+    return pd.DataFrame({"id": [str(i) for i in ids], "valor": [f"{version}-{i}" for i in ids]})
+
+
+def _sheet_values(client):
+    worksheet = next(iter(client.spreadsheets.values())).worksheets["Dados"]
+    return [row for row in worksheet.get_all_values() if any(row)]
+
+
+def _assert_sheet_matches(client, df):
+    """A aba tem o cabeçalho e exatamente as linhas do DataFrame (o delta não preserva a ordem)"""
+    header, *rows = _sheet_values(client)
+    expected = utils.dataframe_to_values(df)
+    assert header == expected[0]
+    assert sorted(rows) == sorted(expected[1:])
+
+
+def _snapshot_path():
+    return utils.destination_state_file(Config.SHEETS_SNAPSHOT_FILE, Config.SPREADSHEET_NAME, Config.WORKSHEET_NAME)
+
+
+def test_interrupted_delta_does_not_leave_stale_snapshot(client):
+    utils.upload_to_google_sheets(_frame(range(1, 11), "v1"))
+    assert os.path.exists(_snapshot_path())
+    
+    # Remove linhas do início (desloca as demais) e falha depois da primeira escrita
+    client.backend.fail_after_writes = client.backend.writes + 1
+    with pytest.raises(RuntimeError):
+        utils.upload_to_google_sheets(_frame(range(4, 16), "v2"))
+    assert client.backend.writes > 0
+    assert not os.path.exists(_snapshot_path())
+    
+    client.backend.fail_after_writes = None
+    expected = _frame([2, 5, 7, 20, 21], "v3")
+    utils.upload_to_google_sheets(expected)
+    _assert_sheet_matches(client, expected)
+    assert os.path.exists(_snapshot_path())
+
+
+def test_delta_after_successful_upload_matches_data(client):
+    utils.upload_to_google_sheets(_frame(range(1, 11), "v1"))
+    expected = _frame([1, 3, 4, 9, 12, 13], "v2")
+    utils.upload_to_google_sheets(expected)
+    _assert_sheet_matches(client, expected)
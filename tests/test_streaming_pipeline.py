@@ -0,0 +1,38 @@
+"""
+Pipeline em streaming contra o Google Sheets falso (benchmarks/fake_sheets.py)
+"""
+import os
+import pandas as pd
+import pytest
+import utils
+from config import Config
+from streaming_pipeline import stream_csv_to_sheets
+
+
+def _write_csv(path, ids, version):
+    pd.DataFrame({"id": [str(i) for i in ids], "valor": [f"{version}-{i}" for i in ids]}).to_csv(path, index=False)
+    return str(path)
+
+
+def _snapshot_path():
+    return utils.destination_state_file(Config.SHEETS_SNAPSHOT_FILE, Config.SPREADSHEET_NAME, Config.WORKSHEET_NAME)
+
+
+def test_interrupted_stream_does_not_leave_stale_snapshot(client, tmp_path):
+    utils.upload_to_google_sheets(pd.read_csv(_write_csv(tmp_path / "v1.csv", range(1, 11), "v1"), dtype=str))
+    assert os.path.exists(_snapshot_path())
+    
+    client.backend.fail_after_writes = client.backend.writes + 2
+    with pytest.raises(RuntimeError):
+        stream_csv_to_sheets(_write_csv(tmp_path / "v2.csv", range(4, 30), "v2"), filters=[], batch_size=5)
+    assert not os.path.exists(_snapshot_path())
+
+
+def test_stream_replaces_previous_content(client, tmp_path):
+    utils.upload_to_google_sheets(pd.read_csv(_write_csv(tmp_path / "v1.csv", range(1, 11), "v1"), dtype=str))
+    stream_csv_to_sheets(_write_csv(tmp_path / "v2.csv", range(1, 4), "v2"), filters=[], batch_size=2)
+    
+    worksheet = next(iter(client.spreadsheets.values())).worksheets["Dados"]
+    rows = [row for row in worksheet.get_all_values() if any(row)]
+    assert rows == [["id", "valor"], ["1", "v2-1"], ["2", "v2-2"], ["3", "v2-3"]]
+    assert not os.path.exists(_snapshot_path())
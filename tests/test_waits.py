@@ -0,0 +1,61 @@
+"""
+Espera pela rede ociosa a partir de eventos falsos dos logs de performance do Chrome
+"""
+import json
+import time
+import utils
+
+
+class FakeDriver:
+    """Devolve um lote de eventos de rede a cada leitura dos logs de performance"""
+    
+    def __init__(self, *batches):
+        self.batches = list(batches)
+    
+    def get_log(self, log_type):
+        assert log_type == "performance"
+        events = self.batches.pop(0) if self.batches else []
+        return [
+            {"message": json.dumps({"message": {"method": method, "params": dict(params, requestId=request_id)}})}
+            for method, request_id, params in events
+        ]
+
+
+def _sent(request_id, resource_type="XHR"):
+    return ("Network.requestWillBeSent", request_id, {"type": resource_type})
+
+
+def _finished(request_id):
+    return ("Network.loadingFinished", request_id, {})
+
+
+def _wait(driver, **kwargs):
+    started = time.monotonic()
+    result = utils.wait_for_network_idle(driver, idle_time=0.2, timeout=2, **kwargs)
+    return result, time.monotonic() - started
+
+
+def test_idle_after_requests_finish():
+    driver = FakeDriver([_sent("1"), _sent("2")], [_finished("1")], [_finished("2")])
+    result, elapsed = _wait(driver)
+    assert result and elapsed < 1
+
+
+def test_open_event_stream_does_not_block():
+    message = ("Network.eventSourceMessageReceived", "es", {})
+    driver = FakeDriver(
+        [_sent("es", "EventSource"), _sent("ws", "WebSocket"), _sent("1")],
+        [_finished("1"), message], [message], [message], [message], [message], [message]
+    )
+    result, elapsed = _wait(driver)
+    assert result and elapsed < 1
+
+
+def test_long_poll_stops_counting_after_max_age():
+    result, elapsed = _wait(FakeDriver([_sent("poll")]), max_request_age=0.5)
+    assert result and 0.5 <= elapsed < 1.5
+
+
+def test_pending_request_times_out():
+    result, elapsed = _wait(FakeDriver([_sent("1")]))
+    assert not result and elapsed >= 2
@@ -1,23 +1,260 @@
 """
 Funções utilitárias para o script BPO
 """
+import io
+import gc
 import os
-import glob
+import re
 import time
-import pandas as pd
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import gspread
-from google.oauth2.service_account import Credentials
+import json
+import pickle
+import random
+import hashlib
+import threading
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config import Config
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
+from instrumentation import stage, instrumented, annotate, increment, record_wait_event
 from datetime import datetime
+from urllib.parse import urlparse
 
 
+# Tempo real de cada espera desta execução (ver timed_wait e get_wait_timings)
+WAIT_TIMINGS = []
+
+
+def record_wait(name, target, started_at, success=True):
+    """
+    Registra quanto tempo uma espera levou
+    
+    Args:
+        name: Nome da espera (normalmente o nome da função)
+        target: Seletor ou alvo da espera
+        started_at: Valor de time.monotonic() no início da espera
+        success: Se a condição esperada foi atingida
+    
+    Returns:
+        float: Segundos decorridos
+    """
+    elapsed = time.monotonic() - started_at
+    entry = {
+        "name": name,
+        "target": str(target)[:80],
+        "seconds": round(elapsed, 3),
+        "success": success
+    }
+    WAIT_TIMINGS.append(entry)
+    record_wait_event(entry)
+    return elapsed
+
+
+def timed_wait(func):
+    """
+    Decorador que registra em WAIT_TIMINGS o tempo real gasto por uma função de espera
+    
+    O segundo argumento posicional (seletor, diretório etc.) é usado como alvo.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        target = args[1] if len(args) > 1 else kwargs.get("selector", "")
+        started_at = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            record_wait(func.__name__, target, started_at, success=False)
+            raise
+        record_wait(func.__name__, target, started_at, success=result is not False)
+        return result
+    return wrapper
+
+
+def get_wait_timings():
+    """
+    Retorna os tempos de espera registrados nesta execução
+    
+    Returns:
+        list: Dicionários com 'name', 'target', 'seconds' e 'success'
+    """
+    return list(WAIT_TIMINGS)
+
+
+def reset_wait_timings():
+    """Limpa os tempos de espera registrados (usado entre execuções de um processo longo)"""
+    WAIT_TIMINGS.clear()
+
+
+def print_wait_summary():
+    """Mostra o tempo total gasto em esperas e as esperas mais longas"""
+    if not WAIT_TIMINGS:
+        return
+    total = sum(item["seconds"] for item in WAIT_TIMINGS)
+    print(f"⏱️ {len(WAIT_TIMINGS)} espera(s), total de {total:.1f}s")
+    for item in sorted(WAIT_TIMINGS, key=lambda item: item["seconds"], reverse=True)[:5]:
+        status = "✅" if item["success"] else "⚠️"
+        print(f"  {status} {item['name']} ({item['target']}): {item['seconds']:.2f}s")
+
+
+@timed_wait
+def wait_for_page_ready(driver, timeout=30):
+    """
+    Aguarda o documento terminar de carregar (document.readyState == 'complete')
+    
+    Args:
+        driver: Instância do WebDriver
+        timeout: Tempo máximo de espera em segundos
+    
+    Returns:
+        bool: True se a página carregou, False se timeout
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        return True
+    except Exception:
+        return False
+
+
+# Conexões que ficam abertas enquanto a página existe (nunca geram loadingFinished)
+_LONG_LIVED_RESOURCE_TYPES = {"EventSource", "WebSocket", "Ping"}
+
+
+def _read_network_events(driver):
+    """
+    Lê os eventos de rede pendentes nos logs de performance do Chrome (DevTools)
+    
+    Returns:
+        list: Tuplas (method, requestId, tipo do recurso) ou None se os logs não estiverem habilitados
+    """
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return None
+    
+    events = []
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method", "")
+        if method.startswith("Network."):
+            params = message.get("params", {})
+            events.append((method, params.get("requestId"), params.get("type")))
+    return events
+
+
+@timed_wait
+def wait_for_network_idle(driver, idle_time=0.5, timeout=30, max_request_age=10):
+    """
+    Aguarda a rede ficar ociosa (nenhuma requisição pendente por idle_time segundos)
+    
+    Usa os logs de performance do Chrome (goog:loggingPrefs) para acompanhar as requisições.
+    Conexões de longa duração (EventSource, WebSocket, Ping) e requisições abertas há mais de
+    max_request_age segundos (ex.: long polling) não contam como pendentes.
+    Se os logs não estiverem disponíveis, considera ociosa quando a quantidade de recursos
+    carregados pela página para de mudar.
+    
+    Args:
+        driver: Instância do WebDriver
+        idle_time: Segundos sem requisições pendentes para considerar a rede ociosa
+        timeout: Tempo máximo de espera em segundos
+        max_request_age: Segundos após os quais uma requisição sem resposta deixa de ser aguardada
+    
+    Returns:
+        bool: True se a rede ficou ociosa, False se timeout
+    """
+    deadline = time.monotonic() + timeout
+    pending = {}
+    long_lived = set()
+    idle_since = time.monotonic()
+    last_resource_count = None
+    
+    while time.monotonic() < deadline:
+        events = _read_network_events(driver)
+        if events is None:
+            # Sem logs de performance: usa a contagem de recursos como sinal
+            try:
+                resource_count = driver.execute_script(
+                    "return document.readyState === 'complete' ? performance.getEntriesByType('resource').length : -1"
+                )
+            except Exception:
+                resource_count = -1
+            if resource_count < 0 or resource_count != last_resource_count:
+                idle_since = time.monotonic()
+                last_resource_count = resource_count
+        else:
+            now = time.monotonic()
+            activity = False
+            # Só o início e o fim de requisições contam (mensagens de streams e frames de WebSocket não)
+            for method, request_id, resource_type in events:
+                if method == "Network.requestWillBeSent":
+                    if resource_type in _LONG_LIVED_RESOURCE_TYPES:
+                        long_lived.add(request_id)
+                    else:
+                        pending.setdefault(request_id, now)
+                        activity = True
+                elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                    pending.pop(request_id, None)
+                    activity = activity or request_id not in long_lived
+            # Long polling: requisições sem resposta há muito tempo deixam de ser aguardadas
+            for request_id, started_at in list(pending.items()):
+                if now - started_at >= max_request_age:
+                    del pending[request_id]
+            if pending or activity:
+                idle_since = now
+        
+        if time.monotonic() - idle_since >= idle_time:
+            return True
+        time.sleep(0.1)
+    
+    print(f"⚠️ Rede não ficou ociosa em {timeout}s ({len(pending)} requisição(ões) pendente(s))")
+    return False
+
+
+@timed_wait
+def wait_for_element_enabled(driver, selector, timeout=30, by_type='xpath'):
+    """
+    Aguarda um elemento estar presente, visível e habilitado (sem clicar)
+    
+    Args:
+        driver: Instância do WebDriver
+        selector: Seletor do elemento
+        timeout: Tempo máximo de espera em segundos
+        by_type: Tipo de seletor ('xpath', 'css', 'id', 'name', 'class_name')
+    
+    Returns:
+        bool: True se o elemento ficou habilitado, False se timeout
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    
+    by_map = {
+        'xpath': By.XPATH,
+        'css': By.CSS_SELECTOR,
+        'id': By.ID,
+        'name': By.NAME,
+        'class_name': By.CLASS_NAME
+    }
+    by = by_map.get(by_type.lower(), By.XPATH)
+    
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: any(
+                element.is_displayed() and element.is_enabled()
+                and element.get_attribute("aria-disabled") != "true"
+                for element in d.find_elements(by, selector)
+            )
+        )
+        return True
+    except Exception:
+        return False
+
+
+@timed_wait
 def wait_for_clickable_js(driver, selector, timeout=30, by_type='id'):
     """
     Aguarda um elemento estar clicável e clica nele usando JavaScript
@@ -28,7 +265,8 @@ def wait_for_clickable_js(driver, selector, timeout=30, by_type='id'):
         timeout: Tempo máximo de espera em segundos
         by_type: Tipo de seletor ('id', 'css', 'xpath', 'name')
     """
-    import time
+    from selenium.webdriver.support.ui import WebDriverWait
+    
     wait = WebDriverWait(driver, timeout)
     
     try:
@@ -55,8 +293,6 @@ def wait_for_clickable_js(driver, selector, timeout=30, by_type='id'):
             lambda d: d.execute_script(f"return {js_find if by_type != 'xpath' else js_find.strip()};") is not None
         )
         
-        time.sleep(0.5)
-        
         # Clica usando JavaScript
         if by_type == 'xpath':
             click_js = f"""
@@ -84,6 +320,7 @@ def wait_for_clickable_js(driver, selector, timeout=30, by_type='id'):
         raise
 
 
+@timed_wait
 def wait_for_send_keys_js(driver, selector, keys, timeout=30, by_type='id'):
     """
     Aguarda um elemento estar presente e envia texto usando JavaScript
@@ -95,7 +332,8 @@ def wait_for_send_keys_js(driver, selector, keys, timeout=30, by_type='id'):
         timeout: Tempo máximo de espera em segundos
         by_type: Tipo de seletor ('id', 'css', 'xpath', 'name')
     """
-    import time
+    from selenium.webdriver.support.ui import WebDriverWait
+    
     wait = WebDriverWait(driver, timeout)
     
     try:
@@ -121,8 +359,6 @@ def wait_for_send_keys_js(driver, selector, keys, timeout=30, by_type='id'):
             lambda d: d.execute_script(f"return {js_find if by_type != 'xpath' else js_find.strip()};") is not None
         )
         
-        time.sleep(0.5)
-        
         # Envia texto usando JavaScript
         if by_type == 'xpath':
             send_keys_js = f"""
@@ -180,6 +416,7 @@ def wait_for_send_keys_js(driver, selector, keys, timeout=30, by_type='id'):
         raise
 
 
+@timed_wait
 def wait_for_clickable(driver, selector, timeout=30, by_type='xpath'):
     """
     Aguarda um elemento estar clicável e clica nele
@@ -190,7 +427,10 @@ def wait_for_clickable(driver, selector, timeout=30, by_type='xpath'):
         timeout: Tempo máximo de espera em segundos
         by_type: Tipo de seletor ('xpath', 'css', 'id', 'name', 'class_name')
     """
-    import time
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    
     wait = WebDriverWait(driver, timeout)
     
     # Mapeia o tipo de seletor
@@ -209,8 +449,6 @@ def wait_for_clickable(driver, selector, timeout=30, by_type='xpath'):
         element = wait.until(EC.presence_of_element_located((by, selector)))
         # Depois aguarda estar clicável
         element = wait.until(EC.element_to_be_clickable((by, selector)))
-        # Pequena espera antes de clicar
-        time.sleep(0.5)
         element.click()
     except Exception as e:
         print(f"❌ Erro ao clicar no elemento {selector} ({by_type}): {e}")
@@ -218,41 +456,209 @@ def wait_for_clickable(driver, selector, timeout=30, by_type='xpath'):
         try:
             element = driver.find_element(by, selector)
             driver.execute_script("arguments[0].scrollIntoView(true);", element)
-            time.sleep(1)
+            # Aguarda o elemento ficar clicável após o scroll
+            WebDriverWait(driver, 5).until(EC.element_to_be_clickable(element))
             element.click()
         except Exception as e2:
             raise Exception(f"Não foi possível clicar no elemento {selector} ({by_type}). Erro original: {e}, Erro no scroll: {e2}")
 
 
-def wait_for_clickable_multiple(driver, selectors, timeout=30):
+# Seletor que funcionou por página/campo, persistido em Config.SELECTOR_CACHE_FILE
+_SELECTOR_CACHE = None
+_SELECTOR_CACHE_LOCK = threading.Lock()
+
+# Avalia todos os candidatos em uma única chamada e retorna o primeiro (na ordem de prioridade)
+# que existe e, se pedido, está visível e habilitado. Seletores inválidos são ignorados.
+_PROBE_SELECTORS_JS = """
+var candidates = arguments[0], interactable = arguments[1];
+function find(selector, byType) {
+    switch (byType) {
+        case 'id': return document.getElementById(selector);
+        case 'name': return document.getElementsByName(selector)[0] || null;
+        case 'class_name': return document.getElementsByClassName(selector)[0] || null;
+        case 'css': return document.querySelector(selector);
+        default: return document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+}
+for (var i = 0; i < candidates.length; i++) {
+    var element = null;
+    try { element = find(candidates[i][0], candidates[i][1]); } catch (e) { continue; }
+    if (!element) continue;
+    if (interactable) {
+        var rect = element.getBoundingClientRect();
+        var style = window.getComputedStyle(element);
+        if (element.disabled || (rect.width === 0 && rect.height === 0) ||
+            style.visibility === 'hidden' || style.display === 'none') continue;
+    }
+    return [i, element];
+}
+return null;
+"""
+
+
+def _normalize_selectors(selectors):
+    """Converte a lista de seletores (strings ou tuplas) em tuplas (selector, by_type)"""
+    return [
+        (selector_info[0], selector_info[1].lower()) if isinstance(selector_info, (tuple, list))
+        else (selector_info, 'xpath')
+        for selector_info in selectors
+    ]
+
+
+def _load_selector_cache():
+    """Carrega (uma vez por processo) o cache de seletores; chamar com _SELECTOR_CACHE_LOCK"""
+    global _SELECTOR_CACHE
+    if _SELECTOR_CACHE is None:
+        _SELECTOR_CACHE = {}
+        if Config.SELECTOR_CACHE_FILE and os.path.exists(Config.SELECTOR_CACHE_FILE):
+            try:
+                with open(Config.SELECTOR_CACHE_FILE, "r", encoding="utf-8") as f:
+                    _SELECTOR_CACHE = json.load(f)
+            except (OSError, ValueError):
+                _SELECTOR_CACHE = {}
+    return _SELECTOR_CACHE
+
+
+def get_remembered_selector(cache_key):
+    """
+    Retorna o seletor que funcionou na última vez para a página/campo
+    
+    Args:
+        cache_key: Identificador da página e do campo (ex.: "reports.from_date")
+    
+    Returns:
+        tuple: (selector, by_type) ou None
+    """
+    if not cache_key or not Config.SELECTOR_CACHE_FILE:
+        return None
+    with _SELECTOR_CACHE_LOCK:
+        entry = _load_selector_cache().get(cache_key)
+    return tuple(entry) if entry else None
+
+
+def remember_selector(cache_key, selector, by_type):
+    """Grava o seletor vencedor da página/campo (escrita atômica, apenas quando muda)"""
+    if not cache_key or not Config.SELECTOR_CACHE_FILE:
+        return
+    with _SELECTOR_CACHE_LOCK:
+        cache = _load_selector_cache()
+        if cache.get(cache_key) == [selector, by_type]:
+            return
+        cache[cache_key] = [selector, by_type]
+        try:
+            tmp_path = Config.SELECTOR_CACHE_FILE + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, Config.SELECTOR_CACHE_FILE)
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar o cache de seletores: {e}")
+
+
+@timed_wait
+def resolve_selector(driver, selectors, cache_key=None, timeout=30, interactable=True):
+    """
+    Localiza o elemento testando todos os seletores de uma vez no navegador
+    
+    Cada verificação avalia todos os candidatos em um único execute_script, então um seletor
+    quebrado não consome um timeout inteiro. O seletor lembrado para cache_key tem prioridade
+    e o vencedor é gravado para as próximas execuções.
+    
+    Args:
+        driver: Instância do WebDriver
+        selectors: Lista de seletores (strings XPath ou tuplas (selector, by_type)), em ordem de preferência
+        cache_key: Identificador da página e do campo (ex.: "reports.menu"); None = sem cache
+        timeout: Tempo máximo de espera em segundos (para todos os seletores juntos)
+        interactable: Exige elemento visível e habilitado
+    
+    Returns:
+        tuple: (elemento, (selector, by_type))
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+    
+    candidates = _normalize_selectors(selectors)
+    remembered = get_remembered_selector(cache_key)
+    if remembered not in candidates:
+        remembered = None
+    ordered = candidates if remembered is None else [remembered] + [c for c in candidates if c != remembered]
+    probe = [list(candidate) for candidate in ordered]
+    
+    try:
+        index, element = WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+            lambda d: d.execute_script(_PROBE_SELECTORS_JS, probe, interactable)
+        )
+    except TimeoutException:
+        raise Exception(f"Todos os seletores falharam: nenhum dos {len(ordered)} candidatos encontrado em {timeout}s")
+    
+    winner = ordered[index]
+    position = candidates.index(winner)
+    if position > 0:
+        increment("selector_fallbacks")
+        annotate(fallback_selector=winner[0][:80])
+    if remembered is not None and winner != remembered:
+        increment("selector_relearned")
+        print(f"⚠️ Seletor lembrado para {cache_key} não funcionou mais, usando {winner[0][:50]} ({winner[1]})")
+    remember_selector(cache_key, *winner)
+    return element, winner
+
+
+def wait_for_clickable_multiple(driver, selectors, timeout=30, cache_key=None):
     """
-    Tenta clicar em um dos múltiplos seletores fornecidos
+    Clica no primeiro elemento encontrado entre os seletores fornecidos
     
     Args:
         driver: Instância do WebDriver
         selectors: Lista de seletores (strings ou tuplas (selector, by_type))
-        timeout: Tempo máximo de espera em segundos para cada tentativa
+        timeout: Tempo máximo de espera em segundos (para todos os seletores juntos)
+        cache_key: Identificador da página e do campo para lembrar o seletor que funcionou
+    
+    Returns:
+        bool: True se o clique foi feito
     """
-    for i, selector_info in enumerate(selectors):
-        # Se for tupla, extrai selector e tipo
-        if isinstance(selector_info, tuple):
-            selector, by_type = selector_info
-        else:
-            selector = selector_info
-            by_type = 'xpath'  # Padrão
-        
-        try:
-            print(f"Tentativa {i+1}/{len(selectors)}: {selector[:50]}... ({by_type})")
-            wait_for_clickable(driver, selector, timeout=timeout, by_type=by_type)
-            print(f"✅ Sucesso com seletor {i+1}")
-            return True
-        except Exception as e:
-            print(f"⚠️ Seletor {i+1} falhou: {str(e)[:100]}")
-            if i == len(selectors) - 1:
-                raise Exception(f"Todos os seletores falharam. Último erro: {e}")
-    return False
+    element, (selector, by_type) = resolve_selector(driver, selectors, cache_key, timeout)
+    try:
+        element.click()
+    except Exception:
+        # Elemento coberto (ex.: overlay) ou fora da área visível: clica via JavaScript
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();", element)
+    print(f"✅ Clicado: {selector[:50]} ({by_type})")
+    return True
+
+
+def wait_for_send_keys_multiple(driver, selectors, keys, timeout=30, cache_key=None):
+    """
+    Preenche o primeiro campo encontrado entre os seletores fornecidos
+    
+    O valor é definido via JavaScript (com eventos input/change); se o campo não aceitar,
+    usa send_keys no mesmo elemento.
+    
+    Args:
+        driver: Instância do WebDriver
+        selectors: Lista de seletores (strings ou tuplas (selector, by_type))
+        keys: Texto a ser enviado
+        timeout: Tempo máximo de espera em segundos (para todos os seletores juntos)
+        cache_key: Identificador da página e do campo para lembrar o seletor que funcionou
+    
+    Returns:
+        tuple: (selector, by_type) usado
+    """
+    element, winner = resolve_selector(driver, selectors, cache_key, timeout)
+    filled = driver.execute_script("""
+        var element = arguments[0];
+        element.scrollIntoView({block: 'center'});
+        element.focus();
+        element.value = arguments[1];
+        element.dispatchEvent(new Event('input', { bubbles: true }));
+        element.dispatchEvent(new Event('change', { bubbles: true }));
+        return element.value === arguments[1];
+    """, element, keys)
+    if not filled:
+        element.clear()
+        element.send_keys(keys)
+    return winner
 
 
+@timed_wait
 def wait_for_send_keys(driver, selector, keys, timeout=30, by_type='xpath'):
     """
     Aguarda um elemento estar clicável e envia texto
@@ -264,7 +670,10 @@ def wait_for_send_keys(driver, selector, keys, timeout=30, by_type='xpath'):
         timeout: Tempo máximo de espera em segundos
         by_type: Tipo de seletor ('xpath', 'css', 'id', 'name', 'class_name')
     """
-    import time
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    
     wait = WebDriverWait(driver, timeout)
     
     # Mapeia o tipo de seletor
@@ -283,8 +692,6 @@ def wait_for_send_keys(driver, selector, keys, timeout=30, by_type='xpath'):
         element = wait.until(EC.presence_of_element_located((by, selector)))
         # Depois aguarda estar visível e interagível
         element = wait.until(EC.visibility_of_element_located((by, selector)))
-        # Pequena espera antes de interagir
-        time.sleep(0.5)
         # Limpa o campo antes de enviar (se necessário)
         element.clear()
         # Envia as teclas
@@ -295,142 +702,165 @@ def wait_for_send_keys(driver, selector, keys, timeout=30, by_type='xpath'):
         try:
             element = driver.find_element(by, selector)
             driver.execute_script("arguments[0].scrollIntoView(true);", element)
-            time.sleep(1)
+            # Aguarda o elemento ficar visível após o scroll
+            WebDriverWait(driver, 5).until(EC.visibility_of(element))
             element.clear()
             element.send_keys(keys)
         except Exception as e2:
             raise Exception(f"Não foi possível enviar texto para {selector} ({by_type}). Erro original: {e}, Erro no scroll: {e2}")
 
 
-def wait_for_download_complete(download_dir, timeout=60):
+_SESSION_LOCK = threading.Lock()
+
+
+def save_browser_session(driver, session_path=None):
     """
-    Aguarda o download completar verificando se não há arquivos .crdownload
+    Salva cookies e localStorage do site para reaproveitar o login na próxima execução
+    
+    Pode ser chamada por várias threads (extração em paralelo): a gravação é serializada e
+    atômica, então o arquivo sempre contém uma sessão completa.
     
     Args:
-        download_dir: Diretório de downloads
+        driver: Instância do WebDriver (na página do site, já logado)
+        session_path: Caminho do arquivo de sessão (se None, usa Config.SESSION_CACHE_FILE)
+    """
+    if session_path is None:
+        session_path = Config.SESSION_CACHE_FILE
+    
+    try:
+        session = {
+            "cookies": driver.get_cookies(),
+            "local_storage": driver.execute_script(
+                "var data = {};"
+                "for (var i = 0; i < localStorage.length; i++) {"
+                "  var key = localStorage.key(i); data[key] = localStorage.getItem(key);"
+                "}"
+                "return data;"
+            ),
+            "saved_at": datetime.now().isoformat()
+        }
+        with _SESSION_LOCK:
+            tmp_path = f"{session_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(session, f)
+            os.replace(tmp_path, session_path)
+        print(f"✅ Sessão salva em {session_path}")
+    except Exception as e:
+        print(f"⚠️ Não foi possível salvar a sessão: {e}")
+
+
+def restore_browser_session(driver, session_path=None):
+    """
+    Restaura cookies e localStorage salvos por save_browser_session
+    
+    Args:
+        driver: Instância do WebDriver
+        session_path: Caminho do arquivo de sessão (se None, usa Config.SESSION_CACHE_FILE)
+    
+    Returns:
+        bool: True se havia sessão salva e ela foi aplicada
+    """
+    if session_path is None:
+        session_path = Config.SESSION_CACHE_FILE
+    if not os.path.exists(session_path):
+        return False
+    
+    try:
+        with open(session_path, "rb") as f:
+            session = pickle.load(f)
+        
+        # Os cookies só podem ser definidos estando no domínio do site
+        driver.get(Config.SITE_URL)
+        driver.delete_all_cookies()
+        for cookie in session.get("cookies", []):
+            cookie = dict(cookie)
+            if "expiry" in cookie:
+                cookie["expiry"] = int(cookie["expiry"])
+            try:
+                driver.add_cookie(cookie)
+            except Exception as cookie_error:
+                print(f"⚠️ Cookie ignorado ({cookie.get('name')}): {cookie_error}")
+        
+        local_storage = session.get("local_storage") or {}
+        if local_storage:
+            driver.execute_script(
+                "var data = arguments[0];"
+                "for (var key in data) { localStorage.setItem(key, data[key]); }",
+                local_storage
+            )
+        return True
+    except Exception as e:
+        print(f"⚠️ Sessão salva inválida, será feito login: {e}")
+        return False
+
+
+def is_session_valid(driver, timeout=10):
+    """
+    Abre a página de relatórios e verifica se o site aceitou a sessão atual
+    
+    Args:
+        driver: Instância do WebDriver
         timeout: Tempo máximo de espera em segundos
     
     Returns:
-        bool: True se o download foi concluído, False se timeout
+        bool: True se a página abriu logada, False se o site redirecionou para o login
     """
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        # Verifica se há arquivos .crdownload (download em andamento)
-        crdownload_files = glob.glob(os.path.join(download_dir, "*.crdownload"))
-        if not crdownload_files:
-            # Verifica se há arquivos CSV
-            csv_files = glob.glob(os.path.join(download_dir, "*.csv"))
-            if csv_files:
-                return True
-        time.sleep(0.5)
-    return False
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    
+    driver.get(Config.REPORTS_URL)
+    wait_for_page_ready(driver, timeout=timeout)
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+            lambda d: "login" in d.current_url.lower()
+            or d.find_elements(By.ID, "data.email")
+            or d.find_elements(By.XPATH, "//aside//nav")
+        )
+    except Exception:
+        return False
+    return "login" not in driver.current_url.lower() and not driver.find_elements(By.ID, "data.email")
 
 
-def get_latest_csv_file(download_dir):
+def is_logged_in_page(driver):
     """
-    Retorna o arquivo CSV mais recente no diretório de downloads
+    Verifica, sem navegar, se a página atual do driver é uma página logada do site
     
     Args:
-        download_dir: Diretório de downloads
+        driver: Instância do WebDriver
     
     Returns:
-        str: Caminho do arquivo CSV mais recente
+        bool: True se o driver está no site, fora do login e com o menu visível
     """
-    csv_files = glob.glob(os.path.join(download_dir, "*.csv"))
-    if not csv_files:
-        raise FileNotFoundError("Nenhum arquivo CSV encontrado no diretório de downloads")
-    # Retorna o arquivo mais recente baseado na data de modificação
-    latest_file = max(csv_files, key=os.path.getmtime)
-    return latest_file
+    from selenium.webdriver.common.by import By
+    
+    try:
+        current_url = driver.current_url
+        if urlparse(current_url).netloc != urlparse(Config.SITE_URL).netloc:
+            return False
+        return "login" not in current_url.lower() and bool(driver.find_elements(By.XPATH, "//aside//nav"))
+    except Exception:
+        return False
 
 
 def send_error_email(driver, error_message, screenshot_path=None):
     """
-    Envia email com screenshot quando ocorre erro crítico
+    Registra um alerta de erro com screenshot para envio por email
+    
+    O screenshot é capturado na hora; o email é montado e enviado em segundo plano por
+    alerts.py, agrupando os alertas da execução em uma única mensagem (ver flush_alerts).
     
     Args:
         driver: Instância do WebDriver
         error_message: Mensagem de erro
         screenshot_path: Caminho do screenshot (se None, tira um novo)
     """
-    # Carrega configurações de email
-    Config.load_email_config()
-    
-    if not Config.EMAIL_ALERT_ENABLED:
-        print("⚠️ Alertas de email desabilitados")
-        return
-    
-    try:
-        # Tira screenshot se não foi fornecido
-        if screenshot_path is None and driver:
-            screenshot_path = f"screenshot_error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            try:
-                # Tenta tirar screenshot (funciona mesmo em headless)
-                driver.save_screenshot(screenshot_path)
-                print(f"📸 Screenshot salvo: {screenshot_path}")
-            except Exception as screenshot_error:
-                print(f"⚠️ Erro ao tirar screenshot: {screenshot_error}")
-                screenshot_path = None
-        
-        # Verifica se há configuração de email
-        email_to = Config.EMAIL_TO
-        email_from = Config.EMAIL_FROM
-        email_password = Config.EMAIL_PASSWORD
-        
-        if not email_to or not email_from or not email_password:
-            print("⚠️ Email não configurado. Execute 'python save_email_config.py' ou configure secrets no GitHub")
-            if screenshot_path and os.path.exists(screenshot_path):
-                print(f"📸 Screenshot salvo em: {screenshot_path}")
-            return
-        
-        # Cria a mensagem
-        msg = MIMEMultipart()
-        msg['From'] = email_from
-        msg['To'] = email_to
-        msg['Subject'] = f"🚨 Erro no Script BPO - {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-        
-        # Corpo do email
-        body = f"""
-        <html>
-        <body>
-            <h2>Erro Detectado no Script BPO</h2>
-            <p><strong>Data/Hora:</strong> {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
-            <p><strong>Erro:</strong></p>
-            <pre>{error_message}</pre>
-            <p>Screenshot anexado abaixo.</p>
-        </body>
-        </html>
-        """
-        msg.attach(MIMEText(body, 'html'))
-        
-        # Anexa o screenshot
-        if screenshot_path and os.path.exists(screenshot_path):
-            with open(screenshot_path, 'rb') as f:
-                img = MIMEImage(f.read())
-                img.add_header('Content-Disposition', 'attachment', filename=os.path.basename(screenshot_path))
-                msg.attach(img)
-        
-        # Envia o email
-        server = smtplib.SMTP(Config.EMAIL_SMTP_SERVER, Config.EMAIL_SMTP_PORT)
-        server.starttls()
-        server.login(email_from, email_password)
-        text = msg.as_string()
-        server.sendmail(email_from, email_to, text)
-        server.quit()
-        
-        print(f"✅ Email de erro enviado para {email_to}")
-        
-        # Remove o screenshot após enviar (opcional)
-        # if screenshot_path and os.path.exists(screenshot_path):
-        #     os.remove(screenshot_path)
-        
-    except Exception as e:
-        print(f"❌ Erro ao enviar email: {e}")
+    from alerts import enqueue_alert
+    enqueue_alert(driver, error_message, screenshot_path)
 
 
 def clean_downloads_folder(download_dir):
     """
-    Limpa todos os arquivos do diretório de downloads
+    Limpa todos os arquivos do diretório de downloads (incluindo subpastas das sessões paralelas)
     
     Args:
         download_dir: Diretório de downloads
@@ -439,7 +869,7 @@ def clean_downloads_folder(download_dir):
     
     try:
         # Remove todos os arquivos CSV
-        csv_files = glob.glob(os.path.join(download_dir, "*.csv"))
+        csv_files = glob.glob(os.path.join(download_dir, "**", "*.csv"), recursive=True)
         for file in csv_files:
             try:
                 os.remove(file)
@@ -448,7 +878,7 @@ def clean_downloads_folder(download_dir):
                 print(f"  ⚠️ Erro ao remover {os.path.basename(file)}: {e}")
         
         # Remove arquivos .crdownload (se houver)
-        crdownload_files = glob.glob(os.path.join(download_dir, "*.crdownload"))
+        crdownload_files = glob.glob(os.path.join(download_dir, "**", "*.crdownload"), recursive=True)
         for file in crdownload_files:
             try:
                 os.remove(file)
@@ -464,135 +894,1082 @@ def clean_downloads_folder(download_dir):
         print(f"⚠️ Erro ao limpar pasta downloads: {e}")
 
 
-def filter_dataframe_by_operation(df, operation_column=None):
+def resolve_filter_columns(columns, filters=None, verbose=True):
     """
-    Filtra o DataFrame mantendo apenas valores específicos na coluna de operação
+    Localiza a coluna de cada filtro: primeiro pelo nome (palavras-chave), depois pela posição
     
     Args:
-        df: DataFrame do pandas
-        operation_column: Nome da coluna de operação (se None, tenta encontrar automaticamente)
+        columns: Colunas do DataFrame
+        filters: Lista de filtros (se None, usa Config.get_dataframe_filters()).
+            Um filtro pode informar 'column' para usar uma coluna específica
+        verbose: Mostra qual coluna foi escolhida para cada filtro
     
     Returns:
-        pd.DataFrame: DataFrame filtrado
+        list: Tuplas (coluna, valores, nome do filtro) dos filtros cujas colunas foram encontradas
     """
-    # Tenta encontrar a coluna de operação
-    if operation_column is None:
-        for col in df.columns:
-            if 'oper' in col.lower() or 'operação' in col.lower():
-                operation_column = col
-                break
+    if filters is None:
+        filters = Config.get_dataframe_filters()
+    columns = list(columns)
+    
+    resolved = []
+    for spec in filters:
+        name = spec.get("name", "")
+        column = spec.get("column")
+        if column is None:
+            keywords = [k.lower() for k in spec.get("keywords", [])]
+            column = next((col for col in columns if any(k in str(col).lower() for k in keywords)), None)
+            
+            # Se não encontrou pelo nome, tenta pela posição
+            index = spec.get("column_index")
+            if column is None and index is not None and len(columns) > index:
+                column = columns[index]
+                if verbose:
+                    print(f"Usando coluna na posição {index + 1}: {column}")
         
-        # Se não encontrou pelo nome, tenta pela posição
-        if operation_column is None and len(df.columns) > Config.OPERATION_COLUMN_INDEX:
-            operation_column = df.columns[Config.OPERATION_COLUMN_INDEX]
-            print(f"Usando coluna na posição {Config.OPERATION_COLUMN_INDEX + 1}: {operation_column}")
-    
-    if operation_column is None:
-        print("⚠️ Aviso: Coluna 'Operação' não encontrada. Retornando DataFrame original.")
-        print(f"Colunas disponíveis: {list(df.columns)}")
-        return df
+        if column is None or column not in columns:
+            print(f"⚠️ Aviso: Coluna '{name}' não encontrada. Filtro ignorado.")
+            print(f"Colunas disponíveis: {columns}")
+            continue
+        
+        if verbose:
+            print(f"Filtrando {name} pela coluna: '{column}'")
+        resolved.append((column, spec["values"], name))
+    return resolved
+
+
+def build_column_mask(series, values):
+    """
+    Retorna a máscara das linhas cujo valor (sem espaços nas pontas, sem diferenciar maiúsculas)
+    está em values; os valores aceitos são comparados como configurados (apenas em maiúsculas)
     
-    print(f"Filtrando pela coluna: '{operation_column}'")
-    valores_antes = len(df)
+    A comparação é feita uma vez por valor distinto (pd.factorize), não por linha, e funciona
+    com colunas object, string, categóricas ou pyarrow.
     
-    # Mostra valores únicos antes do filtro
-    valores_unicos_antes = df[operation_column].unique()
-    print(f"Valores únicos antes do filtro: {valores_unicos_antes}")
+    Args:
+        series: Coluna do DataFrame
+        values: Valores aceitos
     
-    # Remove espaços em branco e converte para string para garantir comparação correta
-    df[operation_column] = df[operation_column].astype(str).str.strip()
+    Returns:
+        np.ndarray: Máscara booleana com o tamanho da coluna
+    """
+    import numpy as np
+    import pandas as pd
     
-    # Filtra mantendo apenas os valores configurados (case-insensitive)
-    df_filtered = df[df[operation_column].str.upper().isin([v.upper() for v in Config.FILTER_VALUES])]
+    codes, uniques = pd.factorize(series, sort=False)
+    if len(uniques) == 0:
+        return np.zeros(len(series), dtype=bool)
     
-    valores_depois = len(df_filtered)
-    print(f"✅ Filtro aplicado: {valores_antes} -> {valores_depois} linhas")
+    accepted = {str(v).upper() for v in values}
+    allowed = np.fromiter(
+        (str(u).strip().upper() in accepted for u in uniques),
+        dtype=bool,
+        count=len(uniques)
+    )
+    # Código -1 representa valores nulos, que nunca passam no filtro
+    return allowed[codes] & (codes >= 0)
+
+
+def _normalize_filtered_columns(df, resolved):
+    """Remove espaços nas pontas das colunas filtradas (apenas nas linhas mantidas)"""
+    return df.assign(**{
+        column: df[column].astype(str).str.strip() for column, _, _ in resolved
+    })
+
+
+def _apply_filters(df, resolved):
+    """
+    Aplica os filtros já resolvidos com uma única máscara combinada
     
-    if valores_depois > 0:
-        print(f"Valores únicos após filtro: {df_filtered[operation_column].unique()}")
-    else:
-        print(f"⚠️ Nenhuma linha corresponde aos filtros {Config.FILTER_VALUES}")
+    Args:
+        df: DataFrame do pandas
+        resolved: Saída de resolve_filter_columns
     
-    return df_filtered
+    Returns:
+        pd.DataFrame: Cópia filtrada com as colunas filtradas normalizadas
+    """
+    import numpy as np
+    
+    mask = np.ones(len(df), dtype=bool)
+    for column, values, _ in resolved:
+        mask &= build_column_mask(df[column], values)
+    return _normalize_filtered_columns(df[mask], resolved)
 
 
-def filter_dataframe_by_region(df, region_column=None):
+def filter_dataframe(df, filters=None, verbose=None):
     """
-    Filtra o DataFrame mantendo apenas valores específicos na coluna de região
+    Aplica todos os filtros em uma única passada, sem alterar o DataFrame de entrada
     
     Args:
         df: DataFrame do pandas
-        region_column: Nome da coluna de região (se None, tenta encontrar automaticamente)
+        filters: Lista de filtros (se None, usa Config.get_dataframe_filters())
+        verbose: Mostra valores únicos e linhas restantes por filtro (se None, usa Config.FILTER_DIAGNOSTICS)
     
     Returns:
-        pd.DataFrame: DataFrame filtrado
+        pd.DataFrame: DataFrame filtrado (colunas filtradas normalizadas, sem espaços nas pontas)
     """
-    # Tenta encontrar a coluna de região
-    if region_column is None:
-        for col in df.columns:
-            if 'regi' in col.lower() or 'região' in col.lower():
-                region_column = col
-                break
-        
-        # Se não encontrou pelo nome, tenta pela posição
-        if region_column is None and len(df.columns) > Config.REGION_COLUMN_INDEX:
-            region_column = df.columns[Config.REGION_COLUMN_INDEX]
-            print(f"Usando coluna na posição {Config.REGION_COLUMN_INDEX + 1}: {region_column}")
-    
-    if region_column is None:
-        print("⚠️ Aviso: Coluna 'Região' não encontrada. Retornando DataFrame original.")
-        print(f"Colunas disponíveis: {list(df.columns)}")
+    if verbose is None:
+        verbose = Config.FILTER_DIAGNOSTICS
+    
+    resolved = resolve_filter_columns(df.columns, filters, verbose=verbose)
+    if not resolved:
+        print("⚠️ Nenhum filtro aplicável. Retornando DataFrame original.")
         return df
     
-    print(f"Filtrando pela coluna de Região: '{region_column}'")
     valores_antes = len(df)
+    if verbose:
+        for column, values, name in resolved:
+            print(f"Valores únicos em '{column}': {df[column].unique()}")
+            print(f"Filtro de {name} {list(values)}: {int(build_column_mask(df[column], values).sum())} linha(s) correspondem")
     
-    # Mostra valores únicos antes do filtro
-    valores_unicos_antes = df[region_column].unique()
-    print(f"Valores únicos antes do filtro de região: {valores_unicos_antes}")
-    
-    # Remove espaços em branco e converte para string para garantir comparação correta
-    df[region_column] = df[region_column].astype(str).str.strip()
-    
-    # Filtra mantendo apenas os valores configurados (case-insensitive)
-    df_filtered = df[df[region_column].str.upper().isin([v.upper() for v in Config.REGION_FILTER_VALUES])]
+    df_filtered = _apply_filters(df, resolved)
     
     valores_depois = len(df_filtered)
-    print(f"✅ Filtro de região aplicado: {valores_antes} -> {valores_depois} linhas")
-    
-    if valores_depois > 0:
-        print(f"Valores únicos após filtro de região: {df_filtered[region_column].unique()}")
-    else:
-        print(f"⚠️ Nenhuma linha corresponde aos filtros de região {Config.REGION_FILTER_VALUES}")
+    print(f"✅ Filtros aplicados: {valores_antes} -> {valores_depois} linhas")
+    if valores_depois == 0:
+        print(f"⚠️ Nenhuma linha corresponde aos filtros {[list(values) for _, values, _ in resolved]}")
+    elif verbose:
+        for column, _, _ in resolved:
+            print(f"Valores únicos após filtro em '{column}': {df_filtered[column].unique()}")
     
     return df_filtered
 
 
-def upload_to_google_sheets(df, spreadsheet_name=None, worksheet_name=None, credentials_path=None):
+class _ReplayStream(io.RawIOBase):
+    """Stream não posicionável que devolve primeiro os bytes já lidos e depois o restante"""
+    
+    def __init__(self, prefix, raw):
+        self._prefix = prefix
+        self._raw = raw
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        data = self._raw.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _read_csv_header(source):
     """
-    Faz upload de um DataFrame para o Google Sheets
+    Lê apenas o cabeçalho do CSV sem consumir o arquivo/stream
     
     Args:
-        df: DataFrame do pandas com os dados
-        spreadsheet_name: Nome da planilha do Google Sheets
-        worksheet_name: Nome da aba (se None, usa a primeira aba)
-        credentials_path: Caminho para o arquivo JSON de credenciais
+        source: Caminho do arquivo, buffer posicionável (io.BytesIO) ou stream (ex.: resposta HTTP)
     
     Returns:
-        str: URL da planilha
+        tuple: (nomes das colunas, source a ser usado na leitura)
     """
-    if spreadsheet_name is None:
-        spreadsheet_name = Config.SPREADSHEET_NAME
-    if worksheet_name is None:
-        worksheet_name = Config.WORKSHEET_NAME
-    if credentials_path is None:
-        credentials_path = os.path.join(os.getcwd(), Config.GOOGLE_CREDENTIALS_FILE)
+    import pandas as pd
+    
+    if isinstance(source, (str, os.PathLike)):
+        return list(pd.read_csv(source, nrows=0).columns), source
+    
+    if source.seekable():
+        position = source.tell()
+        columns = list(pd.read_csv(source, nrows=0).columns)
+        source.seek(position)
+        return columns, source
+    
+    # Stream: lê até o fim da primeira linha e devolve esses bytes antes do restante
+    prefix = b""
+    while b"\n" not in prefix:
+        data = source.read(64 * 1024)
+        if not data:
+            break
+        prefix += data
+    header_line = prefix.split(b"\n", 1)[0]
+    columns = list(pd.read_csv(io.BytesIO(header_line), nrows=0).columns) if header_line.strip() else []
+    return columns, io.BufferedReader(_ReplayStream(prefix, source))
+
+
+def _resolve_csv_engine():
+    """Retorna "pyarrow" se configurado ("pyarrow", ou "auto" com pyarrow instalado), senão "c" """
+    if Config.CSV_ENGINE == "c":
+        return "c"
+    try:
+        import pyarrow.csv  # noqa: F401
+        return "pyarrow"
+    except ImportError:
+        if Config.CSV_ENGINE == "pyarrow":
+            print("⚠️ pyarrow não instalado, usando o leitor padrão do pandas")
+        return "c"
+
+
+def _plan_csv_read(source, filters=None, usecols=None, dtypes=None):
+    """
+    Define colunas, tipos e filtros de uma leitura de CSV
+    
+    Returns:
+        tuple: (cabeçalho, colunas lidas, tipos por coluna, filtros resolvidos, source a ser usado na leitura)
+    """
+    header, source = _read_csv_header(source)
+    resolved = resolve_filter_columns(header, filters, verbose=False)
+    
+    # Mantém apenas as colunas pedidas, sempre incluindo as colunas dos filtros
+    usecols = Config.CSV_USECOLS if usecols is None else usecols
+    if usecols:
+        keep = set(usecols) | {column for column, _, _ in resolved}
+        columns = [col for col in header if col in keep]
+    else:
+        columns = header
+    
+    # Tudo é lido como texto (o destino é o Google Sheets), exceto tipos explícitos
+    dtypes = Config.CSV_DTYPES if dtypes is None else dtypes
+    column_types = {col: "string" for col in columns}
+    column_types.update({col: dtype for col, dtype in (dtypes or {}).items() if col in column_types})
+    return header, columns, column_types, resolved, source
+
+
+def _iter_csv_chunks_pandas(source, columns, column_types, resolved, chunksize):
+    """Lê o CSV em blocos com o leitor do pandas e filtra cada bloco"""
+    import pandas as pd
+    
+    reader = pd.read_csv(source, usecols=columns, dtype=column_types, chunksize=chunksize)
+    for chunk in reader:
+        yield len(chunk), _apply_filters(chunk[columns], resolved)
+
+
+def _iter_csv_chunks_pyarrow(source, header, columns, column_types, resolved, chunksize):
+    """Lê o CSV em blocos com o pyarrow e filtra cada bloco antes de convertê-lo para pandas"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=columns,
+        column_types={col: pa.string() for col, dtype in column_types.items() if dtype == "string"},
+        strings_can_be_null=True
+    )
+    # Aproxima o tamanho do bloco em bytes a partir do número de linhas desejado
+    # Usa os nomes de coluna lidos pelo pandas (colunas repetidas viram "val.1", sem nome
+    # "Unnamed: 0"...), para que os dois leitores devolvam as mesmas colunas
+    read_options = pa_csv.ReadOptions(
+        column_names=header,
+        skip_rows=1,
+        block_size=max(1 << 20, min(chunksize * 256, 64 << 20))
+    )
+    reader = pa_csv.open_csv(source, read_options=read_options, convert_options=convert_options)
+    
+    filters_arrow = [
+        (column, pa.array(sorted({str(v).upper() for v in values}), type=pa.string()))
+        for column, values, _ in resolved
+    ]
+    for batch in reader:
+        mask = None
+        for column, accepted in filters_arrow:
+            values = batch.column(batch.schema.get_field_index(column))
+            if not pa.types.is_string(values.type):
+                values = pc.cast(values, pa.string())
+            column_mask = pc.fill_null(pc.is_in(pc.utf8_upper(pc.utf8_trim_whitespace(values)), value_set=accepted), False)
+            mask = column_mask if mask is None else pc.and_(mask, column_mask)
+        filtered = batch if mask is None else batch.filter(mask)
+        df = filtered.to_pandas()
+        extra_types = {col: dtype for col, dtype in column_types.items() if dtype != "string"}
+        if extra_types:
+            df = df.astype(extra_types)
+        yield batch.num_rows, _normalize_filtered_columns(df, resolved)
+
+
+def iter_filtered_csv_chunks(source, filters=None, usecols=None, dtypes=None, chunksize=None):
+    """
+    Lê o CSV em blocos já filtrados: as linhas descartadas nunca chegam a ser montadas no DataFrame
+    
+    Args:
+        source: Caminho do arquivo, buffer (io.BytesIO) ou stream (ex.: resposta HTTP)
+        filters: Lista de filtros (se None, usa Config.get_dataframe_filters())
+        usecols: Colunas mantidas (se None, usa Config.CSV_USECOLS; vazio = todas)
+        dtypes: Tipos explícitos por coluna (se None, usa Config.CSV_DTYPES); as demais são texto
+        chunksize: Linhas por bloco (se None, usa Config.CSV_CHUNK_SIZE)
+    
+    Yields:
+        tuple: (linhas lidas no bloco, DataFrame filtrado do bloco)
+    """
+    import pandas as pd
+    
+    chunksize = chunksize or Config.CSV_CHUNK_SIZE
+    header, columns, column_types, resolved, source = _plan_csv_read(source, filters, usecols, dtypes)
+    
+    if _resolve_csv_engine() == "pyarrow":
+        chunks = _iter_csv_chunks_pyarrow(source, header, columns, column_types, resolved, chunksize)
+    else:
+        chunks = _iter_csv_chunks_pandas(source, columns, column_types, resolved, chunksize)
+    
+    empty = True
+    for chunk_rows, chunk in chunks:
+        empty = False
+        yield chunk_rows, chunk
+    if empty:
+        # CSV só com cabeçalho: devolve um bloco vazio para preservar as colunas
+        yield 0, pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in column_types.items()})
+
+
+def load_filtered_csv(source, filters=None, usecols=None, dtypes=None, chunksize=None):
+    """
+    Carrega o CSV aplicando os filtros durante a leitura (memória proporcional ao resultado filtrado)
+    
+    Args:
+        source: Caminho do arquivo ou buffer posicionável (io.BytesIO)
+        filters: Lista de filtros (se None, usa Config.get_dataframe_filters())
+        usecols: Colunas mantidas (se None, usa Config.CSV_USECOLS; vazio = todas)
+        dtypes: Tipos explícitos por coluna (se None, usa Config.CSV_DTYPES)
+        chunksize: Linhas por bloco (se None, usa Config.CSV_CHUNK_SIZE)
+    
+    Returns:
+        pd.DataFrame: Linhas que passaram nos filtros
+    """
+    import pandas as pd
+    
+    with stage("parse_filter"):
+        if isinstance(source, (str, os.PathLike)):
+            annotate(bytes=os.path.getsize(source))
+        rows_read = 0
+        frames = []
+        for chunk_rows, chunk in iter_filtered_csv_chunks(source, filters, usecols, dtypes, chunksize):
+            rows_read += chunk_rows
+            if len(chunk) or not frames:
+                frames.append(chunk)
+        
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+        annotate(rows_in=rows_read, rows_out=len(df))
+    
+    print(f"✅ CSV carregado com filtros: {rows_read} linhas lidas -> {len(df)} mantidas")
+    return df
+
+
+def filter_dataframe_by_operation(df, operation_column=None):
+    """
+    Filtra o DataFrame mantendo apenas valores específicos na coluna de operação
+    
+    Args:
+        df: DataFrame do pandas
+        operation_column: Nome da coluna de operação (se None, tenta encontrar automaticamente)
+    
+    Returns:
+        pd.DataFrame: DataFrame filtrado
+    """
+    spec = dict(Config.get_dataframe_filters()[0])
+    if operation_column is not None:
+        spec["column"] = operation_column
+    return filter_dataframe(df, [spec])
+
+
+def filter_dataframe_by_region(df, region_column=None):
+    """
+    Filtra o DataFrame mantendo apenas valores específicos na coluna de região
+    
+    Args:
+        df: DataFrame do pandas
+        region_column: Nome da coluna de região (se None, tenta encontrar automaticamente)
+    
+    Returns:
+        pd.DataFrame: DataFrame filtrado
+    """
+    spec = dict(Config.get_dataframe_filters()[1])
+    if region_column is not None:
+        spec["column"] = region_column
+    return filter_dataframe(df, [spec])
+
+
+def _column_letter(col_number):
+    """
+    Converte o número da coluna (começando em 1) para a letra usada no Google Sheets
+    
+    Args:
+        col_number: Número da coluna (1 = A, 27 = AA)
+    
+    Returns:
+        str: Letra(s) da coluna
+    """
+    letters = ''
+    while col_number > 0:
+        col_number, remainder = divmod(col_number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _series_to_strings(series):
+    """
+    Converte uma coluna do DataFrame em array de strings, sem passar célula a célula
+    
+    Colunas que já são texto são reaproveitadas (só os valores ausentes viram '').
+    
+    Args:
+        series: Coluna do DataFrame
+    
+    Returns:
+        np.ndarray: Array de objetos str (vazio para valores ausentes)
+    """
+    import pandas as pd
+    
+    if pd.api.types.is_string_dtype(series.dtype) and (
+        series.dtype != object or pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty")
+    ):
+        return series.to_numpy(dtype=object, na_value='')
+    
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        # astype(str) omite a hora quando todas são meia-noite; str() mantém o formato de cada valor
+        strings = series.astype(object).map(str).to_numpy(dtype=object)
+    else:
+        strings = series.astype(str).to_numpy(dtype=object)
+    missing = series.isna().to_numpy()
+    if missing.any():
+        strings[missing] = ''
+    return strings
+
+
+def _arrow_column_to_strings(column):
+    """
+    Converte uma coluna de uma tabela pyarrow em array de strings
+    
+    Args:
+        column: pyarrow.ChunkedArray
+    
+    Returns:
+        np.ndarray: Array de objetos str (vazio para valores nulos)
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    
+    if not (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+        column = pc.cast(column, pa.string())
+    return pc.fill_null(column, '').to_numpy(zero_copy_only=False)
+
+
+def dataframe_to_values(data):
+    """
+    Converte os dados em lista de listas de strings (cabeçalho na primeira linha)
+    
+    A conversão é feita coluna a coluna de forma vetorizada; as linhas apenas referenciam
+    as strings já criadas, sem cópias intermediárias do DataFrame.
+    
+    Args:
+        data: DataFrame do pandas ou tabela pyarrow
+    
+    Returns:
+        list: Linhas prontas para envio ao Google Sheets
+    """
+    import numpy as np
+    
+    if hasattr(data, "column_names") and hasattr(data, "schema"):
+        header = [str(col) for col in data.column_names]
+        columns = [_arrow_column_to_strings(data.column(i)) for i in range(data.num_columns)]
+    else:
+        header = [str(col) for col in data.columns]
+        columns = [_series_to_strings(data.iloc[:, i]) for i in range(data.shape[1])]
+    
+    values = [header]
+    if columns and len(columns[0]):
+        # As linhas só contêm strings (sem ciclos): pausa o coletor de lixo enquanto são criadas
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            values.extend(np.column_stack(columns).tolist())
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    return values
+
+
+def destination_state_file(path, spreadsheet_name=None, worksheet_name=None):
+    """
+    Retorna o arquivo de estado (snapshot, checkpoint) de um destino do Google Sheets
+    
+    O destino padrão (Config.SPREADSHEET_NAME / Config.WORKSHEET_NAME) usa o próprio path;
+    os demais recebem um sufixo, para que envios a destinos diferentes não se misturem.
+    
+    Args:
+        path: Arquivo de estado do destino padrão
+        spreadsheet_name: Nome da planilha (se None, usa Config.SPREADSHEET_NAME)
+        worksheet_name: Nome da aba (se None, usa Config.WORKSHEET_NAME)
+    
+    Returns:
+        str: Caminho do arquivo para o destino
+    """
+    spreadsheet_name = Config.SPREADSHEET_NAME if spreadsheet_name is None else spreadsheet_name
+    worksheet_name = Config.WORKSHEET_NAME if worksheet_name is None else worksheet_name
+    if (spreadsheet_name, worksheet_name) == (Config.SPREADSHEET_NAME, Config.WORKSHEET_NAME):
+        return path
+    slug = re.sub(r"[^\w-]+", "_", f"{spreadsheet_name}_{worksheet_name}")
+    root, ext = os.path.splitext(path)
+    return f"{root}.{slug}{ext}"
+
+
+def load_sheet_snapshot(snapshot_path=None):
+    """
+    Carrega o snapshot do último conteúdo enviado ao Google Sheets
+    
+    Args:
+        snapshot_path: Caminho do arquivo de snapshot (se None, usa Config.SHEETS_SNAPSHOT_FILE)
+    
+    Returns:
+        dict: Snapshot salvo ou None se não existir/for inválido
+    """
+    if snapshot_path is None:
+        snapshot_path = Config.SHEETS_SNAPSHOT_FILE
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ Snapshot inválido, será feito envio completo: {e}")
+        return None
+
+
+def save_sheet_snapshot(snapshot, snapshot_path=None):
+    """
+    Salva o snapshot do conteúdo enviado ao Google Sheets
+    
+    Args:
+        snapshot: Dicionário com ids da planilha/aba, cabeçalho e linhas
+        snapshot_path: Caminho do arquivo de snapshot (se None, usa Config.SHEETS_SNAPSHOT_FILE)
+    """
+    if snapshot_path is None:
+        snapshot_path = Config.SHEETS_SNAPSHOT_FILE
+    # Grava em arquivo temporário e renomeia para não deixar snapshot corrompido
+    tmp_path = f"{snapshot_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f)
+    os.replace(tmp_path, snapshot_path)
+
+
+def forget_sheet_snapshot(snapshot_path=None):
+    """
+    Remove o snapshot antes de alterar a aba
+    
+    Se o envio falhar no meio, a aba não corresponde mais ao snapshot; sem ele, a próxima
+    execução faz um envio completo em vez de calcular o delta sobre linhas deslocadas.
+    
+    Args:
+        snapshot_path: Caminho do arquivo de snapshot (se None, usa Config.SHEETS_SNAPSHOT_FILE)
+    """
+    if snapshot_path is None:
+        snapshot_path = Config.SHEETS_SNAPSHOT_FILE
+    if os.path.exists(snapshot_path):
+        os.remove(snapshot_path)
+
+
+def _build_row_keys(header, rows, key_columns=None):
+    """
+    Gera uma chave por linha a partir das colunas-chave
+    
+    Linhas com a mesma chave recebem o número da ocorrência, para continuarem distintas.
+    
+    Args:
+        header: Lista com os nomes das colunas
+        rows: Lista de linhas (listas de strings)
+        key_columns: Colunas que identificam a linha (se None, usa a linha inteira)
+    
+    Returns:
+        list: Chaves na mesma ordem das linhas
+    """
+    if key_columns:
+        missing = [col for col in key_columns if col not in header]
+        if missing:
+            raise ValueError(f"Colunas-chave não encontradas no DataFrame: {missing}")
+        indexes = [header.index(col) for col in key_columns]
+    else:
+        indexes = range(len(header))
+    
+    keys = []
+    occurrences = {}
+    for row in rows:
+        base_key = tuple(row[i] for i in indexes)
+        count = occurrences.get(base_key, 0)
+        occurrences[base_key] = count + 1
+        keys.append((base_key, count))
+    return keys
+
+
+def _plan_delta_layout(old_keys, new_rows, new_keys):
+    """
+    Calcula a nova disposição das linhas na aba mantendo as existentes na mesma posição
+    
+    Linhas removidas deixam posições livres, que são ocupadas pelas linhas novas.
+    Se sobrarem posições livres, as últimas linhas sobem para ocupá-las, sem deixar buracos.
+    
+    Args:
+        old_keys: Chaves das linhas atualmente na aba (na ordem da aba)
+        new_rows: Linhas novas
+        new_keys: Chaves das linhas novas
+    
+    Returns:
+        list: Linhas na ordem em que devem ficar na aba (sem o cabeçalho)
+    """
+    new_by_key = dict(zip(new_keys, new_rows))
+    old_key_set = set(old_keys)
+    
+    layout = [key if key in new_by_key else None for key in old_keys]
+    pending = deque(key for key in new_keys if key not in old_key_set)
+    
+    # Ocupa as posições das linhas removidas com as linhas inseridas
+    for position, key in enumerate(layout):
+        if not pending:
+            break
+        if key is None:
+            layout[position] = pending.popleft()
+    layout.extend(pending)
+    
+    # Compacta: move linhas do final para as posições que ficaram livres
+    while layout and layout[-1] is None:
+        layout.pop()
+    position = 0
+    while position < len(layout):
+        if layout[position] is None:
+            layout[position] = layout.pop()
+            while layout and layout[-1] is None:
+                layout.pop()
+        position += 1
+    
+    return [new_by_key[key] for key in layout]
+
+
+def _contiguous_ranges(positions):
+    """
+    Agrupa posições ordenadas em intervalos contíguos
+    
+    Args:
+        positions: Lista ordenada de inteiros
+    
+    Returns:
+        list: Lista de tuplas (inicio, fim), ambos inclusivos
+    """
+    ranges = []
+    for position in positions:
+        if ranges and ranges[-1][1] == position - 1:
+            ranges[-1] = (ranges[-1][0], position)
+        else:
+            ranges.append((position, position))
+    return ranges
+
+
+def _sync_worksheet_delta(worksheet, values, snapshot, key_columns=None, batch_size=10000):
+    """
+    Envia para a aba apenas as linhas inseridas, alteradas e removidas desde o último envio
+    
+    Args:
+        worksheet: Aba do gspread
+        values: Linhas novas (cabeçalho na primeira linha)
+        snapshot: Snapshot do último envio (mesmo cabeçalho)
+        key_columns: Colunas que identificam uma linha (se None, usa a linha inteira)
+        batch_size: Máximo de linhas por requisição
+    
+    Returns:
+        list: Linhas como ficaram na aba (sem o cabeçalho)
+    """
+    header, new_rows = values[0], values[1:]
+    old_rows = snapshot["rows"]
+    
+    old_keys = _build_row_keys(header, old_rows, key_columns)
+    new_keys = _build_row_keys(header, new_rows, key_columns)
+    target_rows = _plan_delta_layout(old_keys, new_rows, new_keys)
     
-    # Configura o escopo necessário
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive"
+    old_key_set = set(old_keys)
+    new_key_set = set(new_keys)
+    inserted = sum(1 for key in new_keys if key not in old_key_set)
+    removed = sum(1 for key in old_keys if key not in new_key_set)
+    
+    # Posições (0 = primeira linha de dados) cujo conteúdo mudou
+    changed = [
+        i for i, row in enumerate(target_rows)
+        if i >= len(old_rows) or old_rows[i] != row
     ]
+    last_col = _column_letter(len(header))
+    
+    # Garante que a aba tenha linhas suficientes (linha 1 é o cabeçalho)
+    needed_rows = len(target_rows) + 1
+    if needed_rows > worksheet.row_count:
+        worksheet.add_rows(needed_rows - worksheet.row_count)
+    
+    # Agrupa os intervalos alterados em requisições de até batch_size linhas
+    requests_sent = 0
+    data, data_rows = [], 0
+    for start, end in _contiguous_ranges(changed):
+        for chunk_start in range(start, end + 1, batch_size):
+            chunk_end = min(chunk_start + batch_size - 1, end)
+            data.append({
+                'range': f'A{chunk_start + 2}:{last_col}{chunk_end + 2}',
+                'values': target_rows[chunk_start:chunk_end + 1]
+            })
+            data_rows += chunk_end - chunk_start + 1
+            if data_rows >= batch_size:
+                call_sheets_api(lambda: worksheet.batch_update(data, value_input_option='USER_ENTERED'))
+                requests_sent += 1
+                data, data_rows = [], 0
+    if data:
+        call_sheets_api(lambda: worksheet.batch_update(data, value_input_option='USER_ENTERED'))
+        requests_sent += 1
+    
+    # Limpa as linhas que sobraram no final da aba
+    if len(target_rows) < len(old_rows):
+        tail = f'A{len(target_rows) + 2}:{last_col}{len(old_rows) + 1}'
+        call_sheets_api(lambda: worksheet.batch_clear([tail]))
+        requests_sent += 1
+    
+    print(f"Sincronização delta: {inserted} inserida(s), {removed} removida(s), "
+          f"{len(changed)} linha(s) reescrita(s) em {requests_sent} requisição(ões)")
+    
+    return target_rows
+
+
+class TokenBucket:
+    """
+    Limitador de taxa (token bucket) compartilhado entre threads
+    
+    Cada requisição consome um token; os tokens são repostos continuamente até a capacidade.
+    """
+    
+    def __init__(self, rate_per_minute, capacity=None):
+        """
+        Args:
+            rate_per_minute: Requisições permitidas por minuto
+            capacity: Rajada máxima de requisições (se None, usa 1/6 da taxa por minuto)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, rate_per_minute // 6)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def acquire(self):
+        """Aguarda até haver um token disponível e o consome"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+    
+    def drain(self):
+        """Esvazia o balde (após um 429, todas as threads desaceleram juntas)"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+
+_SHEETS_RATE_LIMITER = None
+_SHEETS_RATE_LIMITER_LOCK = threading.Lock()
+_RETRYABLE_SHEETS_STATUS = {429, 500, 502, 503, 504}
+
+
+def get_sheets_rate_limiter():
+    """
+    Retorna o limitador de taxa do Google Sheets compartilhado pelo processo
+    
+    Returns:
+        TokenBucket: Limitador configurado com Config.SHEETS_WRITE_REQUESTS_PER_MINUTE
+    """
+    global _SHEETS_RATE_LIMITER
+    with _SHEETS_RATE_LIMITER_LOCK:
+        if _SHEETS_RATE_LIMITER is None:
+            _SHEETS_RATE_LIMITER = TokenBucket(Config.SHEETS_WRITE_REQUESTS_PER_MINUTE)
+        return _SHEETS_RATE_LIMITER
+
+
+def _sheets_error_status(error):
+    """Retorna o status HTTP de um erro da API do Google Sheets (None se não houver)"""
+    import gspread
+    
+    if isinstance(error, gspread.exceptions.APIError):
+        return getattr(getattr(error, "response", None), "status_code", None)
+    return None
+
+
+def call_sheets_api(func, limiter=None, max_retries=None, base_delay=1.0, max_delay=64.0):
+    """
+    Executa uma chamada ao Google Sheets respeitando a cota e repetindo em falhas transitórias
+    
+    Erros 429/5xx e falhas de conexão são repetidos com backoff exponencial e jitter.
+    
+    Args:
+        func: Função sem argumentos que faz a chamada
+        limiter: Limitador de taxa (se None, usa o limitador compartilhado)
+        max_retries: Máximo de novas tentativas (se None, usa Config.SHEETS_MAX_RETRIES)
+        base_delay: Espera base em segundos (dobra a cada tentativa)
+        max_delay: Espera máxima em segundos
+    
+    Returns:
+        Retorno de func
+    """
+    import gspread
+    import requests
+    
+    limiter = limiter or get_sheets_rate_limiter()
+    if max_retries is None:
+        max_retries = Config.SHEETS_MAX_RETRIES
+    
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        try:
+            return func()
+        except (gspread.exceptions.APIError, requests.ConnectionError, requests.Timeout) as e:
+            status = _sheets_error_status(e)
+            retryable = status in _RETRYABLE_SHEETS_STATUS or not isinstance(e, gspread.exceptions.APIError)
+            if attempt >= max_retries or not retryable:
+                raise
+            increment("sheets_retries")
+            if status == 429:
+                increment("sheets_rate_limited")
+                limiter.drain()
+            ceiling = min(max_delay, base_delay * 2 ** attempt)
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+            print(f"⚠️ Google Sheets respondeu {status or type(e).__name__}, "
+                  f"nova tentativa {attempt + 1}/{max_retries} em {delay:.1f}s")
+            time.sleep(delay)
+
+
+def _values_fingerprint(values):
+    """Hash do conteúdo a enviar (identifica o mesmo envio entre execuções)"""
+    digest = hashlib.sha256()
+    for row in values:
+        digest.update("\x1f".join(row).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+_FINGERPRINT_LOCK = threading.Lock()
+
+
+def file_fingerprint(path, extra=None, chunk_size=1024 * 1024):
+    """
+    Calcula o hash SHA-256 de um arquivo (lido em blocos)
+    
+    Args:
+        path: Caminho do arquivo
+        extra: Texto adicional incluído no hash (ex.: configurações que alteram o resultado)
+        chunk_size: Tamanho de cada bloco lido
+    
+    Returns:
+        str: Hash em hexadecimal
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    if extra:
+        digest.update(extra.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_run_fingerprints():
+    """
+    Carrega os hashes da última execução bem-sucedida
+    
+    Returns:
+        dict: {chave: {"digest": hash, "saved_at": data/hora, ...}}
+    """
+    if not os.path.exists(Config.FINGERPRINT_FILE):
+        return {}
+    try:
+        with open(Config.FINGERPRINT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def sheet_fingerprint_key(spreadsheet_name=None, worksheet_name=None):
+    """Chave do hash do último envio para um destino do Google Sheets"""
+    spreadsheet_name = Config.SPREADSHEET_NAME if spreadsheet_name is None else spreadsheet_name
+    worksheet_name = Config.WORKSHEET_NAME if worksheet_name is None else worksheet_name
+    return f"sheet:{spreadsheet_name}/{worksheet_name}"
+
+
+def get_run_fingerprint(key):
+    """Retorna o hash salvo para a chave (None se não houver)"""
+    return load_run_fingerprints().get(key, {}).get("digest")
+
+
+def _write_run_fingerprints(fingerprints):
+    tmp_path = Config.FINGERPRINT_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(fingerprints, f, indent=2)
+    os.replace(tmp_path, Config.FINGERPRINT_FILE)
+
+
+def save_run_fingerprint(key, digest, **extra):
+    """
+    Salva o hash de um resultado enviado com sucesso
+    
+    Args:
+        key: Identificação do que foi enviado (ex.: "export" ou "sheet:Planilha/Aba")
+        digest: Hash do conteúdo
+        **extra: Informações adicionais guardadas junto (ex.: url)
+    """
+    with _FINGERPRINT_LOCK:
+        fingerprints = load_run_fingerprints()
+        fingerprints[key] = dict(extra, digest=digest, saved_at=datetime.now().isoformat(timespec="seconds"))
+        _write_run_fingerprints(fingerprints)
+
+
+def forget_run_fingerprint(key):
+    """Remove o hash salvo (chamado antes de alterar o destino, para não pular um envio incompleto)"""
+    with _FINGERPRINT_LOCK:
+        fingerprints = load_run_fingerprints()
+        if fingerprints.pop(key, None) is not None:
+            _write_run_fingerprints(fingerprints)
+
+
+def _plan_upload_requests(total_rows, rows_per_range, ranges_per_request):
+    """
+    Divide as linhas em intervalos e agrupa os intervalos em requisições
+    
+    Returns:
+        list: Requisições, cada uma com a lista de (início, fim) dos intervalos (fim exclusivo)
+    """
+    ranges = [(start, min(start + rows_per_range, total_rows)) for start in range(0, total_rows, rows_per_range)]
+    return [ranges[i:i + ranges_per_request] for i in range(0, len(ranges), ranges_per_request)]
+
+
+def _load_upload_checkpoint(checkpoint_path, identity):
+    """Retorna os índices de requisições já confirmadas se o checkpoint for deste mesmo envio"""
+    if not os.path.exists(checkpoint_path):
+        return set()
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if checkpoint.get("identity") != identity:
+        return set()
+    return set(checkpoint.get("completed", []))
+
+
+def _save_upload_checkpoint(checkpoint_path, identity, completed):
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"identity": identity, "completed": sorted(completed)}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def upload_values_concurrently(worksheet, values, rows_per_range=None, ranges_per_request=None,
+                               workers=None, checkpoint_path=None, fingerprint=None):
+    """
+    Substitui o conteúdo da aba enviando vários intervalos por requisição (values.batchUpdate),
+    com requisições em paralelo limitadas pela cota do Google Sheets
+    
+    Cada requisição confirmada é registrada em um checkpoint; se o envio for interrompido,
+    a próxima chamada com os mesmos dados continua a partir dos lotes que faltaram.
+    
+    Args:
+        worksheet: Aba do gspread
+        values: Linhas a enviar (cabeçalho na primeira linha)
+        rows_per_range: Linhas por intervalo (se None, usa Config.SHEETS_BATCH_ROWS)
+        ranges_per_request: Intervalos por requisição (se None, usa Config.SHEETS_RANGES_PER_REQUEST)
+        workers: Requisições simultâneas (se None, usa Config.SHEETS_UPLOAD_WORKERS)
+        checkpoint_path: Arquivo do checkpoint (se None, usa Config.SHEETS_UPLOAD_CHECKPOINT_FILE)
+        fingerprint: Hash de values, se já calculado
+    
+    Returns:
+        int: Número de requisições enviadas nesta chamada
+    """
+    from gspread.utils import absolute_range_name
+    
+    rows_per_range = rows_per_range or Config.SHEETS_BATCH_ROWS
+    ranges_per_request = ranges_per_request or Config.SHEETS_RANGES_PER_REQUEST
+    workers = workers or Config.SHEETS_UPLOAD_WORKERS
+    checkpoint_path = checkpoint_path or Config.SHEETS_UPLOAD_CHECKPOINT_FILE
+    
+    plan = _plan_upload_requests(len(values), rows_per_range, ranges_per_request)
+    identity = {
+        "spreadsheet_id": worksheet.spreadsheet.id,
+        "worksheet_id": worksheet.id,
+        "fingerprint": fingerprint or _values_fingerprint(values),
+        "rows_per_range": rows_per_range,
+        "ranges_per_request": ranges_per_request
+    }
+    completed = _load_upload_checkpoint(checkpoint_path, identity)
+    
+    if completed:
+        print(f"Retomando envio interrompido: {len(completed)}/{len(plan)} requisição(ões) já confirmada(s)")
+    else:
+        # Envio novo: limpa a aba e garante linhas suficientes antes das escritas em paralelo
+        call_sheets_api(worksheet.clear)
+        if len(values) > worksheet.row_count:
+            call_sheets_api(lambda: worksheet.add_rows(len(values) - worksheet.row_count))
+        _save_upload_checkpoint(checkpoint_path, identity, completed)
+    
+    pending = [index for index in range(len(plan)) if index not in completed]
+    lock = threading.Lock()
+    failed = threading.Event()
+    
+    def send(index):
+        if failed.is_set():
+            return False
+        data = [
+            {
+                "range": absolute_range_name(worksheet.title, f"A{start + 1}"),
+                "values": values[start:end]
+            }
+            for start, end in plan[index]
+        ]
+        body = {"valueInputOption": "USER_ENTERED", "data": data}
+        call_sheets_api(lambda: worksheet.spreadsheet.values_batch_update(body=body))
+        with lock:
+            completed.add(index)
+            _save_upload_checkpoint(checkpoint_path, identity, completed)
+        first, last = plan[index][0][0] + 1, plan[index][-1][1]
+        print(f"Lote enviado: linhas {first} a {last}")
+        return True
+    
+    sent = 0
+    error = None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(send, index) for index in pending]
+        for future in as_completed(futures):
+            try:
+                sent += future.result()
+            except Exception as e:
+                failed.set()
+                error = error or e
+    
+    if error is not None:
+        print(f"❌ Envio interrompido com {len(completed)}/{len(plan)} requisição(ões) confirmada(s); "
+              "a próxima execução continua de onde parou")
+        raise error
+    
+    os.remove(checkpoint_path)
+    print(f"Dados enviados em {sent} requisição(ões) ({workers} em paralelo)")
+    return sent
+
+
+_SHEETS_CLIENTS = {}
+_SPREADSHEETS = {}
+_SHEETS_CLIENT_LOCK = threading.Lock()
+
+
+def get_sheets_client(credentials_path=None):
+    """
+    Retorna o cliente do gspread autenticado, reaproveitado entre chamadas
+    
+    O token de acesso é renovado automaticamente só quando expira e as conexões HTTP ficam
+    em um pool persistente. O cliente é recriado se o arquivo de credenciais mudar.
+    
+    Args:
+        credentials_path: Caminho para o arquivo JSON de credenciais (se None, usa Config.GOOGLE_CREDENTIALS_FILE)
+    
+    Returns:
+        gspread.Client: Cliente autenticado
+    """
+    import gspread
+    from google.oauth2.service_account import Credentials
+    from google.auth.transport.requests import AuthorizedSession
+    from requests.adapters import HTTPAdapter
+    
+    if credentials_path is None:
+        credentials_path = os.path.join(os.getcwd(), Config.GOOGLE_CREDENTIALS_FILE)
     
     if not os.path.exists(credentials_path):
         raise FileNotFoundError(
@@ -600,68 +1977,230 @@ def upload_to_google_sheets(df, spreadsheet_name=None, worksheet_name=None, cred
             "Por favor, baixe o arquivo JSON de credenciais do Google Cloud Console"
         )
     
-    # Autentica usando service account
-    creds = Credentials.from_service_account_file(credentials_path, scopes=scope)
-    client = gspread.authorize(creds)
+    cache_key = (os.path.abspath(credentials_path), os.path.getmtime(credentials_path))
+    with _SHEETS_CLIENT_LOCK:
+        client = _SHEETS_CLIENTS.get(cache_key)
+        if client is not None:
+            return client
+        
+        # Configura o escopo necessário
+        scope = [
+            "https://spreadsheets.google.com/feeds",
+            "https://www.googleapis.com/auth/drive"
+        ]
+        
+        # Autentica usando service account, com pool de conexões para os envios em paralelo
+        creds = Credentials.from_service_account_file(credentials_path, scopes=scope)
+        session = AuthorizedSession(creds)
+        pool_size = max(10, Config.SHEETS_UPLOAD_WORKERS * 2)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        client = gspread.authorize(creds, session=session)
+        
+        # Credenciais antigas (arquivo alterado) não são mais usadas
+        for key in [key for key in _SHEETS_CLIENTS if key[0] == cache_key[0]]:
+            _SHEETS_CLIENTS.pop(key).http_client.session.close()
+        _SHEETS_CLIENTS[cache_key] = client
+        return client
+
+
+def _load_spreadsheet_ids():
+    """Carrega o cache nome da planilha -> ID"""
+    if not os.path.exists(Config.SHEETS_ID_CACHE_FILE):
+        return {}
+    try:
+        with open(Config.SHEETS_ID_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_spreadsheet_id(spreadsheet_name, spreadsheet_id):
+    with _SHEETS_CLIENT_LOCK:
+        ids = _load_spreadsheet_ids()
+        if ids.get(spreadsheet_name) == spreadsheet_id:
+            return
+        ids[spreadsheet_name] = spreadsheet_id
+        try:
+            with open(Config.SHEETS_ID_CACHE_FILE, "w", encoding="utf-8") as f:
+                json.dump(ids, f, indent=2)
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar o cache de planilhas: {e}")
+
+
+def _open_spreadsheet(client, spreadsheet_name):
+    """
+    Abre a planilha pelo ID (Config.SPREADSHEET_ID ou cache) e só busca pelo nome na primeira vez
+    
+    A busca pelo nome passa pela API do Drive e é bem mais lenta que open_by_key.
+    
+    Args:
+        client: Cliente do gspread
+        spreadsheet_name: Nome da planilha
+    
+    Returns:
+        gspread.Spreadsheet: Planilha aberta
+    """
+    import gspread
+    
+    spreadsheet_id = None
+    if spreadsheet_name == Config.SPREADSHEET_NAME and Config.SPREADSHEET_ID:
+        spreadsheet_id = Config.SPREADSHEET_ID
+    else:
+        spreadsheet_id = _load_spreadsheet_ids().get(spreadsheet_name)
+    
+    if spreadsheet_id:
+        spreadsheet = _SPREADSHEETS.get(spreadsheet_id)
+        if spreadsheet is not None and spreadsheet.client is client:
+            return spreadsheet
+        try:
+            spreadsheet = client.open_by_key(spreadsheet_id)
+            _SPREADSHEETS[spreadsheet_id] = spreadsheet
+            return spreadsheet
+        except (gspread.exceptions.SpreadsheetNotFound, gspread.exceptions.APIError) as e:
+            print(f"⚠️ Planilha não encontrada pelo ID em cache, buscando pelo nome: {e}")
     
-    # Abre a planilha
     try:
         spreadsheet = client.open(spreadsheet_name)
     except gspread.exceptions.SpreadsheetNotFound:
         raise ValueError(f"Planilha '{spreadsheet_name}' não encontrada. Verifique o nome e se a conta de serviço tem acesso.")
     
+    _save_spreadsheet_id(spreadsheet_name, spreadsheet.id)
+    _SPREADSHEETS[spreadsheet.id] = spreadsheet
+    return spreadsheet
+
+
+def open_worksheet(spreadsheet_name=None, worksheet_name=None, credentials_path=None, rows=1000, cols=26):
+    """
+    Autentica no Google Sheets e abre a aba de destino (criando-a se não existir)
+    
+    Args:
+        spreadsheet_name: Nome da planilha do Google Sheets (se None, usa Config.SPREADSHEET_NAME)
+        worksheet_name: Nome da aba (se None, usa Config.WORKSHEET_NAME; vazio = primeira aba)
+        credentials_path: Caminho para o arquivo JSON de credenciais
+        rows: Linhas da aba, caso precise ser criada
+        cols: Colunas da aba, caso precise ser criada
+    
+    Returns:
+        tuple: (spreadsheet, worksheet) do gspread
+    """
+    import gspread
+    
+    if spreadsheet_name is None:
+        spreadsheet_name = Config.SPREADSHEET_NAME
+    if worksheet_name is None:
+        worksheet_name = Config.WORKSHEET_NAME
+    
+    client = get_sheets_client(credentials_path)
+    spreadsheet = _open_spreadsheet(client, spreadsheet_name)
+    
     # Seleciona a aba (worksheet)
     if worksheet_name:
         try:
             worksheet = spreadsheet.worksheet(worksheet_name)
         except gspread.exceptions.WorksheetNotFound:
             # Cria a aba se não existir
-            worksheet = spreadsheet.add_worksheet(title=worksheet_name, rows=len(df)+1, cols=len(df.columns))
+            worksheet = spreadsheet.add_worksheet(title=worksheet_name, rows=rows, cols=cols)
     else:
         worksheet = spreadsheet.sheet1
     
-    # Limpa a aba existente
-    worksheet.clear()
+    return spreadsheet, worksheet
+
+
+@instrumented("sheets_upload")
+def upload_to_google_sheets(df, spreadsheet_name=None, worksheet_name=None, credentials_path=None,
+                            sync_mode=None, key_columns=None, skip_unchanged=None):
+    """
+    Faz upload de um DataFrame para o Google Sheets
+    
+    Args:
+        df: DataFrame do pandas com os dados
+        spreadsheet_name: Nome da planilha do Google Sheets
+        worksheet_name: Nome da aba (se None, usa a primeira aba)
+        credentials_path: Caminho para o arquivo JSON de credenciais
+        sync_mode: "full" (limpa e reenvia tudo) ou "delta" (envia apenas as diferenças).
+            Se None, usa Config.SHEETS_SYNC_MODE
+        key_columns: Colunas que identificam uma linha no modo delta (se None, usa Config.SHEETS_ROW_KEY_COLUMNS)
+        skip_unchanged: Não envia nada se os dados forem idênticos ao último envio bem-sucedido
+            para este destino (se None, usa Config.SKIP_UNCHANGED_UPLOADS)
+    
+    Returns:
+        str: URL da planilha
+    """
+    if spreadsheet_name is None:
+        spreadsheet_name = Config.SPREADSHEET_NAME
+    if worksheet_name is None:
+        worksheet_name = Config.WORKSHEET_NAME
+    if sync_mode is None:
+        sync_mode = Config.SHEETS_SYNC_MODE
+    if key_columns is None:
+        key_columns = Config.SHEETS_ROW_KEY_COLUMNS
+    if skip_unchanged is None:
+        skip_unchanged = Config.SKIP_UNCHANGED_UPLOADS
+    snapshot_path = destination_state_file(Config.SHEETS_SNAPSHOT_FILE, spreadsheet_name, worksheet_name)
+    annotate(destination=f"{spreadsheet_name}/{worksheet_name}", rows_out=len(df))
+    
+    # Prepara os dados: cabeçalho + linhas convertidas para string
+    values = dataframe_to_values(df)
     
-    # Prepara os dados: substitui NaN por strings vazias
-    df_clean = df.fillna('')
+    # Dados idênticos ao último envio bem-sucedido: nada a fazer (nem autenticar)
+    fingerprint_key = sheet_fingerprint_key(spreadsheet_name, worksheet_name)
+    digest = _values_fingerprint(values)
+    previous = load_run_fingerprints().get(fingerprint_key, {})
+    if skip_unchanged and previous.get("digest") == digest:
+        print(f"✅ Dados idênticos ao último envio para {spreadsheet_name} / {worksheet_name}, upload ignorado")
+        annotate(skipped=True)
+        return previous.get("url")
     
-    # Converte DataFrame para lista de listas
-    # Primeiro adiciona os cabeçalhos
-    values = [df_clean.columns.tolist()]
-    # Depois adiciona os dados, convertendo tudo para string para evitar problemas
-    for row in df_clean.values.tolist():
-        values.append([str(val) if val is not None else '' for val in row])
+    spreadsheet, worksheet = open_worksheet(
+        spreadsheet_name, worksheet_name, credentials_path,
+        rows=len(df) + 1, cols=len(df.columns)
+    )
     
     print(f"Preparando para enviar {len(values)} linhas (incluindo cabeçalho) e {len(values[0])} colunas...")
     
-    # Faz upload dos dados usando batch_update para melhor performance
-    batch_size = 10000
-    total_rows = len(values)
+    # Verifica se o snapshot corresponde a esta aba e ao mesmo layout de colunas
+    snapshot = None
+    if sync_mode == "delta":
+        snapshot = load_sheet_snapshot(snapshot_path)
+        if snapshot is not None and (
+            snapshot.get("spreadsheet_id") != spreadsheet.id
+            or snapshot.get("worksheet_id") != worksheet.id
+            or snapshot.get("header") != values[0]
+            or snapshot.get("key_columns") != key_columns
+        ):
+            print("⚠️ Snapshot não corresponde à aba atual, será feito envio completo")
+            snapshot = None
     
-    if total_rows <= batch_size:
-        # Se couber em um lote, envia tudo de uma vez
-        worksheet.update('A1', values, value_input_option='USER_ENTERED')
-        print(f"Dados enviados em 1 lote")
+    # A aba vai mudar: se o envio falhar no meio, a próxima execução não pode ser ignorada
+    # nem sincronizar o delta contra o conteúdo anterior
+    forget_run_fingerprint(fingerprint_key)
+    forget_sheet_snapshot(snapshot_path)
+    if snapshot is not None:
+        rows_in_sheet = _sync_worksheet_delta(worksheet, values, snapshot, key_columns, batch_size=Config.SHEETS_BATCH_ROWS)
     else:
-        # Divide em múltiplos lotes
-        print(f"Dividindo em lotes de {batch_size} linhas...")
-        # Envia cabeçalho primeiro
-        worksheet.update('A1', [values[0]], value_input_option='USER_ENTERED')
-        
-        # Envia os dados em lotes
-        for i in range(1, total_rows, batch_size):
-            batch = values[i:i+batch_size]
-            start_row = i + 1  # +1 porque a linha 1 é o cabeçalho
-            range_name = f'A{start_row}'
-            worksheet.update(range_name, batch, value_input_option='USER_ENTERED')
-            print(f"Lote enviado: linhas {start_row} a {start_row + len(batch) - 1}")
+        # Substitui a aba com requisições em paralelo (retomáveis se interrompidas)
+        checkpoint_path = destination_state_file(Config.SHEETS_UPLOAD_CHECKPOINT_FILE, spreadsheet_name, worksheet_name)
+        upload_values_concurrently(worksheet, values, checkpoint_path=checkpoint_path, fingerprint=digest)
+        rows_in_sheet = values[1:]
+    
+    # Todas as escritas terminaram: grava o snapshot para a próxima sincronização delta
+    if sync_mode == "delta":
+        save_sheet_snapshot({
+            "spreadsheet_id": spreadsheet.id,
+            "worksheet_id": worksheet.id,
+            "header": values[0],
+            "key_columns": key_columns,
+            "rows": rows_in_sheet
+        }, snapshot_path)
+    
+    save_run_fingerprint(fingerprint_key, digest, url=spreadsheet.url)
     
     print(f"Dados enviados para o Google Sheets com sucesso!")
     print(f"Planilha: {spreadsheet_name}")
     print(f"Aba: {worksheet.title}")
-    print(f"Total de linhas enviadas: {len(df_clean)}")
-    print(f"Total de colunas: {len(df_clean.columns)}")
+    print(f"Total de linhas enviadas: {len(df)}")
+    print(f"Total de colunas: {len(df.columns)}")
     print(f"URL: {spreadsheet.url}")
     
     return spreadsheet.url